@@ -0,0 +1,224 @@
+"""Benchmark the CSV import on synthetic data.
+
+Generates referentially consistent, scaled-up copies of the CSV files in
+CSV_DIR and times import_csvs.py on them for several configurations.
+
+    python benchmark_import.py generate --scale 100 --out bench_csv
+    python benchmark_import.py run --scales 1,10,100 --configs age-row,age-server
+
+Every run appends one record per scale and configuration to the results
+file (benchmark_results.json by default).
+"""
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE_DIR = os.getenv('CSV_DIR', os.path.join(SCRIPT_DIR, 'csv'))
+
+# Node label referenced by each FK column of the relationship files
+FOREIGN_KEYS = {
+    'exoId': 'Exo', 'dofId': 'Dof', 'partId': 'Part', 'aimId': 'Aim', 'aimTypeId': 'AimType',
+    'sknId': 'StructureKinematicName', 'sknTypeId': 'StructureKinematicNameType',
+    'jointTId': 'JointT', 'exoPropertyId': 'ExoProperty',
+}
+
+# Environment of import_csvs.py per benchmark configuration; None removes the variable
+CONFIGS = {
+    'age-row': {'AGE_EDGE_MODE': 'row', 'AGE_PREPARED': '0', 'NEO4J_URI': None},
+    'age-prepared': {'AGE_EDGE_MODE': 'row', 'AGE_PREPARED': '1', 'NEO4J_URI': None},
+    'age-server': {'AGE_EDGE_MODE': 'server', 'AGE_PREPARED': '0', 'NEO4J_URI': None},
+    'age-server-neo4j': {'AGE_EDGE_MODE': 'server', 'AGE_PREPARED': '0'},
+}
+
+# Output lines of import_csvs.py that mark the start of each phase
+PHASE_MARKERS = [('node_phase', 'PHASE 1:'), ('edge_phase', 'PHASE 2:')]
+
+# Same quoting rules as CSV_READ_OPTIONS in import_csvs.py
+READ_OPTIONS = dict(sep=';', quotechar='"', escapechar="'", skipinitialspace=True, on_bad_lines='skip')
+
+
+# === Synthetic data ===
+def read_template(path):
+    """Read a CSV file of the real data set as a template."""
+    with open(path, 'r', encoding='utf-8') as f:
+        first_line = f.readline()
+    options = dict(READ_OPTIONS, sep=';' if ';' in first_line else ',')
+    df = pd.read_csv(path, engine='c', **options)
+    return df[[col for col in df.columns if not str(col).startswith('Unnamed')]]
+
+def generate_dataset(template_dir, out_dir, scale, seed=0):
+    """Write scaled copies of the template CSVs to out_dir.
+
+    Node files get `scale` times their rows with new, globally unique _ids.
+    Relationship files get `scale` times their rows with properties copied
+    from the template and FKs drawn from the generated ids of their labels.
+    Returns the row counts as ({node_file: rows}, {edge_file: rows}).
+    """
+    rng = np.random.default_rng(seed)
+    templates = {os.path.splitext(f)[0]: read_template(os.path.join(template_dir, f))
+                 for f in sorted(os.listdir(template_dir)) if f.endswith('.csv')}
+    os.makedirs(out_dir, exist_ok=True)
+
+    node_ids = {}
+    next_id = 1
+    node_counts = {}
+    edge_counts = {}
+    for name, template in templates.items():
+        if '_id' not in template.columns:
+            continue
+        df = pd.concat([template] * scale, ignore_index=True)
+        df['_id'] = np.arange(next_id, next_id + len(df))
+        next_id += len(df)
+        node_ids[name] = df['_id'].to_numpy()
+        node_counts[f"{name}.csv"] = write_csv(df, os.path.join(out_dir, f"{name}.csv"))
+
+    for name, template in templates.items():
+        if '_id' in template.columns:
+            continue
+        df = pd.concat([template] * scale, ignore_index=True)
+        for col in df.columns:
+            if col in FOREIGN_KEYS:
+                df[col] = rng.choice(node_ids[FOREIGN_KEYS[col]], size=len(df))
+        edge_counts[f"{name}.csv"] = write_csv(df, os.path.join(out_dir, f"{name}.csv"))
+    return node_counts, edge_counts
+
+def write_csv(df, path):
+    """Write a frame with the delimiter and escaping of the real files; returns the row count."""
+    df.to_csv(path, sep=';', index=False, quotechar='"', escapechar="'", doublequote=False,
+              quoting=csv.QUOTE_MINIMAL)
+    return len(df)
+
+
+# === Runner ===
+def git_commit():
+    """Return the current commit of the repository, or None outside a git checkout."""
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=SCRIPT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_import(csv_dir, config, import_args=()):
+    """Run import_csvs.py on csv_dir with a configuration and time its phases.
+
+    Phases are timed from the PHASE markers in the output, so nothing has
+    to be imported into this process. The phase and per-backend totals of
+    the import's metrics report are added when it was written. Returns a
+    dict with the timings.
+    """
+    metrics_path = os.path.join(csv_dir, 'import_metrics.json')
+    env = dict(os.environ, CSV_DIR=csv_dir, METRICS_FILE=metrics_path)
+    for key, value in CONFIGS[config].items():
+        if value is None:
+            env.pop(key, None)
+        else:
+            env[key] = value
+
+    marks = {}
+    tail = []
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, os.path.join(SCRIPT_DIR, 'import_csvs.py'), *import_args],
+                               cwd=SCRIPT_DIR, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                               text=True, encoding='utf-8', errors='replace')
+    for line in process.stdout:
+        for phase, marker in PHASE_MARKERS:
+            if phase not in marks and marker in line:
+                marks[phase] = time.perf_counter() - start
+        tail = (tail + [line.rstrip()])[-20:]
+    returncode = process.wait()
+    total = time.perf_counter() - start
+
+    result = {'returncode': returncode, 'total_s': round(total, 3)}
+    if 'node_phase' in marks:
+        result['setup_s'] = round(marks['node_phase'], 3)
+        result['node_phase_s'] = round(marks.get('edge_phase', total) - marks['node_phase'], 3)
+    if 'edge_phase' in marks:
+        result['edge_phase_s'] = round(total - marks['edge_phase'], 3)
+    if os.path.exists(metrics_path):
+        with open(metrics_path, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+        result['phases'] = report['phases']
+        result['backends'] = report['totals']
+        os.remove(metrics_path)
+    if returncode != 0:
+        result['output_tail'] = tail
+    return result
+
+def append_results(path, records):
+    """Append benchmark records to a JSON list file."""
+    results = []
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            results = json.load(f)
+    results.extend(records)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+def run_benchmarks(scales, configs, results_path, template_dir=TEMPLATE_DIR, import_args=()):
+    """Generate a data set per scale, import it with every configuration and record the timings."""
+    commit = git_commit()
+    records = []
+    for scale in scales:
+        with tempfile.TemporaryDirectory(prefix=f'bench_csv_{scale}_') as csv_dir:
+            node_counts, edge_counts = generate_dataset(template_dir, csv_dir, scale)
+            node_rows = sum(node_counts.values())
+            edge_rows = sum(edge_counts.values())
+            print(f"Scale {scale}: {node_rows} nodes, {edge_rows} edges")
+            for config in configs:
+                result = run_import(csv_dir, config, import_args)
+                status = '✓' if result['returncode'] == 0 else '✗'
+                print(f"  {status} {config}: {result['total_s']}s "
+                      f"(nodes {result.get('node_phase_s')}s, edges {result.get('edge_phase_s')}s)")
+                records.append(dict(
+                    timestamp=datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                    commit=commit, scale=scale, config=config, import_args=list(import_args),
+                    node_rows=node_rows, edge_rows=edge_rows, **result,
+                ))
+    append_results(results_path, records)
+    print(f"Results appended to {results_path}")
+    return records
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the CSV import on synthetic data.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    generate = commands.add_parser('generate', help='Write a scaled synthetic data set')
+    generate.add_argument('--scale', type=int, default=10, help='Multiplier for the row count of every file')
+    generate.add_argument('--out', required=True, help='Directory for the generated CSV files')
+    generate.add_argument('--seed', type=int, default=0)
+
+    run = commands.add_parser('run', help='Generate data sets and time the import on them')
+    run.add_argument('--scales', default='1,10,100', help='Comma separated scale factors')
+    run.add_argument('--configs', default=','.join(CONFIGS), help='Comma separated configurations')
+    run.add_argument('--results', default=os.path.join(SCRIPT_DIR, 'benchmark_results.json'))
+    run.add_argument('import_args', nargs='*', help='Extra arguments for import_csvs.py, after --')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    if args.command == 'generate':
+        node_counts, edge_counts = generate_dataset(TEMPLATE_DIR, args.out, args.scale, args.seed)
+        print(f"Wrote {sum(node_counts.values())} nodes and {sum(edge_counts.values())} edges "
+              f"in {len(node_counts) + len(edge_counts)} files to {args.out}")
+    else:
+        configs = args.configs.split(',')
+        unknown = [c for c in configs if c not in CONFIGS]
+        if unknown:
+            sys.exit(f"Unknown configurations: {', '.join(unknown)} (choose from {', '.join(CONFIGS)})")
+        run_benchmarks([int(s) for s in args.scales.split(',')], configs, args.results,
+                       import_args=args.import_args)
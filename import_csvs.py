@@ -1,9 +1,25 @@
+import argparse
+import csv
+import hashlib
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import io
+import json
+import logging
+import mmap
+import numpy as np
 import os
 import psycopg2
+import psycopg2.pool
 import pandas as pd
 from dotenv import load_dotenv
 from neo4j import GraphDatabase
 import sys
+import threading
+import time
+import weakref
 
 load_dotenv()
 
@@ -14,83 +30,639 @@ db_host = os.getenv('DB_HOST')
 db_port = os.getenv('DB_PORT', '5432')
 db_name = os.getenv('DB_NAME')
 CSV_DIR = os.getenv('CSV_DIR')
+# JSON file with column type overrides, e.g. {"HAS_PROPERTY": {"exoPropertyValue": "TEXT"}}
+COLUMN_TYPES_FILE = os.getenv('COLUMN_TYPES_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'column_types.json'))
+
+# === Import tuning ===
+AGE_BATCH_SIZE = int(os.getenv('AGE_BATCH_SIZE', '500'))
+# 'row' creates AGE edges with one cypher() call per row, 'server' with one
+# INSERT ... SELECT per relationship type from its PostgreSQL table
+AGE_EDGE_MODE = os.getenv('AGE_EDGE_MODE', 'row')
+# '1' runs AGE node and row-mode edge writes as prepared statements with an agtype parameter
+AGE_PREPARED = os.getenv('AGE_PREPARED', '0') == '1'
+NEO4J_BATCH_SIZE = int(os.getenv('NEO4J_BATCH_SIZE', '1000'))
+# Number of rows per column used to infer PostgreSQL column types of a streamed file
+TYPE_INFERENCE_SAMPLE = int(os.getenv('TYPE_INFERENCE_SAMPLE', '10000'))
+# JSON report with the timings and row counts of the run
+METRICS_FILE = os.getenv('METRICS_FILE', 'import_metrics.json')
+# CSV file with the rows rejected by PostgreSQL or AGE in the last import, with the error
+REJECT_FILE = os.getenv('REJECT_FILE', 'import_rejects.csv')
+# Files above this size are split into byte ranges of about this size for --parse-workers
+PARSE_SPLIT_BYTES = int(os.getenv('PARSE_SPLIT_BYTES', str(16 * 1024 * 1024)))
+
+# === Blue/green import ===
+# --blue-green loads into the staging graph and schema and swaps them with the
+# live graph and tables at the end; the previous generation is kept under the
+# old names until it is dropped
+LIVE_GRAPH = 'exo_graph'
+STAGING_GRAPH = 'exo_graph_next'
+OLD_GRAPH = 'exo_graph_old'
+STAGING_SCHEMA = 'exo_next'
+OLD_SCHEMA = 'exo_old'
+
+# Bump when the tables or graph produced by this script change shape, so the
+# next incremental run falls back to a full import
+SCHEMA_VERSION = '2'
+
+# === Command line options ===
+def parse_args(argv=None):
+    """Parse the command line options of the import script."""
+    parser = argparse.ArgumentParser(description="Import the exo CSV files into PostgreSQL, AGE and Neo4j.")
+    parser.add_argument('--incremental', action='store_true',
+                        help="only reload CSV files whose content changed since the last import")
+    parser.add_argument('--delta', action='store_true',
+                        help="like --incremental, but apply changed files as row-level inserts, updates and deletes")
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help="stream each CSV in chunks of this many rows to keep memory use constant")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="number of PostgreSQL connections used to load edge files in parallel (default: 1)")
+    parser.add_argument('--parse-workers', type=int, default=1,
+                        help="number of processes that parse the CSV files before validation (default: 1)")
+    parser.add_argument('--validate-only', action='store_true',
+                        help="check ids and foreign keys of the CSV files without connecting to a database")
+    parser.add_argument('--resume', action='store_true',
+                        help="continue an interrupted import from its last committed checkpoints")
+    parser.add_argument('--blue-green', action='store_true',
+                        help="load a staging AGE graph and tables and swap them into place in one transaction; "
+                             "Neo4j is not staged and is still cleared and reloaded in place")
+    parser.add_argument('--log-level', default=os.getenv('LOG_LEVEL', 'INFO'),
+                        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help="DEBUG adds per-row and per-chunk output (default: INFO)")
+    args = parser.parse_args(argv)
+    if args.blue_green and (args.incremental or args.delta):
+        parser.error("--blue-green always runs a full import and cannot be combined with --incremental or --delta")
+    return args
+
+# Options of the current run; the defaults until configure() applies the options of an importer
+args = parse_args([])
+
+# Graph and table schema written by this run; None keeps tables in the live schema
+GRAPH_NAME = STAGING_GRAPH if args.blue_green else LIVE_GRAPH
+TABLE_SCHEMA = STAGING_SCHEMA if args.blue_green else None
+
+# Row-level output goes through the logger so it can be silenced on large runs
+log = logging.getLogger('import_csvs')
+if not log.handlers:
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    log.addHandler(handler)
+    log.propagate = False
+log.setLevel(args.log_level)
+
+# === Metrics ===
+# Counters per table and backend ('csv', 'postgres', 'age', 'neo4j') and timings per phase
+metrics = {'started_at': datetime.now(timezone.utc).isoformat(timespec='seconds'), 'phases': {}, 'tables': {}}
+_metrics_lock = threading.Lock()
+_active_metrics = threading.local()
+
+def table_metrics(table_name, backend):
+    """Return the counters of a table and backend, creating them on first use."""
+    with _metrics_lock:
+        backends = metrics['tables'].setdefault(table_name, {})
+        return backends.setdefault(backend, dict(seconds=0.0, rows=0, skipped_rows=0, failed_rows=0,
+                                                 round_trips=0, bytes_read=0))
+
+@contextmanager
+def measure(table_name, backend):
+    """Add the wall time of a block to a table and backend; round trips inside it are counted there."""
+    entry = table_metrics(table_name, backend)
+    previous = getattr(_active_metrics, 'entry', None)
+    _active_metrics.entry = entry
+    start = time.perf_counter()
+    try:
+        yield entry
+    finally:
+        entry['seconds'] += time.perf_counter() - start
+        _active_metrics.entry = previous
+
+@contextmanager
+def measure_phase(name):
+    """Add the wall time of a block to an import phase."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phase = metrics['phases'].setdefault(name, {'seconds': 0.0})
+        phase['seconds'] += time.perf_counter() - start
+
+def count_round_trip(count=1):
+    """Count database round trips for the table and backend being measured in this thread."""
+    entry = getattr(_active_metrics, 'entry', None)
+    if entry is not None:
+        entry['round_trips'] += count
+
+def measured_frames(table_name, frames):
+    """Yield the frames of a CSV reader, timing the parsing as the table's csv backend."""
+    frames = iter(frames)
+    while True:
+        with measure(table_name, 'csv') as entry:
+            df = next(frames, None)
+            if df is not None:
+                entry['rows'] += len(df)
+        if df is None:
+            return
+        yield df
+
+class CountingCursor(psycopg2.extensions.cursor):
+    """psycopg2 cursor that counts its statements as round trips in the metrics."""
+
+    def execute(self, query, vars=None):
+        count_round_trip()
+        return super().execute(query, vars)
+
+    def copy_expert(self, sql, file, size=8192):
+        count_round_trip()
+        return super().copy_expert(sql, file, size)
+
+def metrics_report(status='ok'):
+    """Build the JSON metrics report, with rows per second and totals per backend."""
+    totals = {}
+    tables = {}
+    for table_name, backends in sorted(metrics['tables'].items()):
+        tables[table_name] = {}
+        for backend, entry in backends.items():
+            report = dict(entry, seconds=round(entry['seconds'], 4),
+                          rows_per_second=round(entry['rows'] / entry['seconds'], 1) if entry['seconds'] else None)
+            tables[table_name][backend] = report
+            total = totals.setdefault(backend, dict(seconds=0.0, rows=0, skipped_rows=0, failed_rows=0,
+                                                    round_trips=0, bytes_read=0))
+            for key in total:
+                total[key] += entry[key]
+    for total in totals.values():
+        total['seconds'] = round(total['seconds'], 4)
+    return {
+        'status': status,
+        'started_at': metrics['started_at'],
+        'finished_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'options': {k: v for k, v in vars(args).items()},
+        'settings': {'AGE_EDGE_MODE': AGE_EDGE_MODE, 'AGE_PREPARED': AGE_PREPARED,
+                     'AGE_BATCH_SIZE': AGE_BATCH_SIZE, 'NEO4J_BATCH_SIZE': NEO4J_BATCH_SIZE},
+        'phases': {name: {'seconds': round(phase['seconds'], 4)} for name, phase in metrics['phases'].items()},
+        'totals': totals,
+        'tables': tables,
+    }
+
+def write_metrics_report(path=METRICS_FILE, status='ok'):
+    """Write the metrics report as JSON and print the per-phase timings."""
+    report = metrics_report(status)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    for name, phase in report['phases'].items():
+        print(f"  {name}: {phase['seconds']:.2f}s")
+    print(f"Metrics written to {path}")
+    return report
 
 # === Neo4j config ===
 neo4j_uri = os.getenv("NEO4J_URI")
 neo4j_user = os.getenv("NEO4J_USER")
 neo4j_password = os.getenv("NEO4J_PASSWORD")
 
-# === Try to connect to Neo4j (optional) ===
+# === Neo4j connection (optional, opened by CsvImporter.connect) ===
 neo4j_available = False
 neo4j_driver = None
 
-if neo4j_uri and neo4j_user and neo4j_password:
+def open_neo4j_driver():
+    """Return a connected Neo4j driver, or None when Neo4j is not configured or not reachable."""
+    if not (neo4j_uri and neo4j_user and neo4j_password):
+        print("⚠ Neo4j credentials not configured. Continuing with AGE only...")
+        return None
     try:
-        neo4j_driver = GraphDatabase.driver(neo4j_uri, auth=(neo4j_user, neo4j_password))
-        print("Clearing Neo4j database...")
-        with neo4j_driver.session() as session:
-            session.run("MATCH (n) DETACH DELETE n")
-        print("Neo4j database cleared successfully!")
-        neo4j_available = True
+        driver = GraphDatabase.driver(neo4j_uri, auth=(neo4j_user, neo4j_password))
+        driver.verify_connectivity()
+        return driver
     except Exception as e:
         print(f"⚠ Warning: Could not connect to Neo4j: {e}")
         print("Continuing with AGE only...")
-        neo4j_driver = None
-else:
-    print("⚠ Neo4j credentials not configured. Continuing with AGE only...")
+        return None
 
-# === Connect to PostgreSQL/AGE ===
-conn = psycopg2.connect(
+# === PostgreSQL/AGE connection (opened by CsvImporter.connect) ===
+postgres_connect_kwargs = dict(
     user=db_user,
     password=db_password,
     host=db_host,
     port=db_port,
     database=db_name,
     sslmode='disable',
-    connect_timeout=10
+    connect_timeout=10,
+    cursor_factory=CountingCursor
 )
-cur = conn.cursor()
-
-# === Enable AGE and check if graph exists ===
-cur.execute("LOAD 'age';")
-cur.execute("SET search_path = ag_catalog, \"$user\", public;")
-cur.execute("SELECT count(*) FROM ag_catalog.ag_graph WHERE name = %s;", ('exo_graph',))
-row = cur.fetchone()
-graph_exists = bool(row and row[0])
-
-# === Clear AGE graph if it exists ===
-if graph_exists:
-    print("Clearing AGE graph 'exo_graph'...")
-    cur.execute("SELECT drop_graph('exo_graph', true);")
-    conn.commit()
-    print("AGE graph cleared successfully!")
-
-# === Create fresh graph ===
-cur.execute("SELECT create_graph('exo_graph');")
-conn.commit()
-print("AGE graph 'exo_graph' created successfully!")
 
-# === Create PostgreSQL tables for each node type ===
-def create_table_from_csv(table_name, csv_path):
-    """Create a PostgreSQL table with columns matching the CSV structure."""
+def prepare_age_session(cursor, schema=None):
+    """Load AGE and put ag_catalog on the search path of a connection.
+
+    With a schema, tables are created in and resolved from that schema first.
+    """
+    cursor.execute("LOAD 'age';")
+    cursor.execute(f"SET search_path = {f'{schema}, ' if schema else ''}ag_catalog, \"$user\", public;")
+
+def age_graph_exists(name, cursor=None):
+    """Check whether an AGE graph exists."""
+    cursor = cursor or cur
+    cursor.execute("SELECT count(*) FROM ag_catalog.ag_graph WHERE name = %s;", (name,))
+    row = cursor.fetchone()
+    return bool(row and row[0])
+
+# Connection of the current run; graph_exists and live_schema describe the live graph when it was opened
+conn = cur = None
+graph_exists = False
+live_schema = None
+
+# === CSV ingestion ===
+# Every CSV is parsed once with these options; the frame is shared by all later steps
+CSV_READ_OPTIONS = dict(quotechar='"', escapechar="'", skipinitialspace=True, on_bad_lines='warn')
+
+ParsedCsv = namedtuple('ParsedCsv', ['frame', 'columns', 'delimiter'])
+
+_parsed_csv_cache = {}
+
+def detect_delimiter(first_line):
+    """Detect the delimiter from the header line: ',' only if there is no ';'."""
+    return ',' if ',' in first_line and ';' not in first_line else ';'
+
+def parse_csv(source, delimiter):
+    """Parse a CSV path or buffer with pandas' C engine and the shared read options."""
+    return pd.read_csv(source, sep=delimiter, engine='c', **CSV_READ_OPTIONS)
+
+def read_csv_file(csv_path):
+    """Parse a CSV file once and return a ParsedCsv.
+
+    The delimiter is detected from the first line and the file is parsed a
+    single time. Results are cached per path until the file changes on
+    disk, so DDL creation, ID detection and every writer share one frame.
+    `columns` excludes the unnamed columns left by trailing delimiters.
+    """
+    stat = os.stat(csv_path)
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = _parsed_csv_cache.get(csv_path)
+    if cached and cached[0] == version:
+        return cached[1]
+
     with open(csv_path, 'r', encoding='utf-8') as f:
-        first_line = f.readline()
-        delimiter = ',' if ',' in first_line and ';' not in first_line else ';'
-    
-    df = pd.read_csv(csv_path, sep=delimiter, quotechar='"', escapechar="'", 
-                    skipinitialspace=True, engine='python', on_bad_lines='warn', nrows=0)
-    
+        delimiter = detect_delimiter(f.readline())
+    return cache_parsed_csv(csv_path, version, parse_csv(csv_path, delimiter), delimiter)
+
+def cache_parsed_csv(csv_path, version, df, delimiter):
+    """Store a parsed frame for read_csv_file and return its ParsedCsv."""
     columns = [col for col in df.columns if not str(col).startswith('Unnamed')]
+    parsed = ParsedCsv(df, columns, delimiter)
+    _parsed_csv_cache[csv_path] = (version, parsed)
+    return parsed
+
+def read_csv_header(csv_path):
+    """Return (delimiter, columns) of a CSV file without reading its rows."""
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        delimiter = detect_delimiter(f.readline())
+    df = pd.read_csv(csv_path, sep=delimiter, engine='c', nrows=0, **CSV_READ_OPTIONS)
+    return delimiter, [col for col in df.columns if not str(col).startswith('Unnamed')]
+
+def iter_csv_frames(csv_path, chunk_size=None):
+    """Yield the rows of a CSV file as DataFrames.
+
+    Without a chunk size the whole cached frame from read_csv_file is
+    yielded once. With a chunk size the file is streamed in chunks of that
+    many rows and nothing is cached, so memory use does not grow with the
+    file size. Row labels keep counting across chunks.
+    """
+    if not chunk_size:
+        yield read_csv_file(csv_path).frame
+        return
+    delimiter, _ = read_csv_header(csv_path)
+    with pd.read_csv(csv_path, sep=delimiter, engine='c', chunksize=chunk_size, **CSV_READ_OPTIONS) as reader:
+        for chunk in reader:
+            yield chunk
+
+def find_id_column(table_name, columns):
+    """Return the ID column of a node table, or None if it has none."""
+    for col in columns:
+        if col.lower() in ['id', '_id', f'{table_name.lower()}id']:
+            return col
+    return None
+
+def read_csv_sample(csv_path, nrows=TYPE_INFERENCE_SAMPLE):
+    """Return the first rows of a CSV file for type inference."""
+    delimiter, _ = read_csv_header(csv_path)
+    return pd.read_csv(csv_path, sep=delimiter, engine='c', nrows=nrows, **CSV_READ_OPTIONS)
+
+# === Parallel parsing ===
+# A parsed frame as numpy arrays; non-numeric columns are (codes, distinct values)
+ColumnarFrame = namedtuple('ColumnarFrame', ['columns', 'dtypes', 'arrays'])
+
+def encode_frame(df):
+    """Pack a parsed frame into a ColumnarFrame for the trip from a parse process.
+
+    Numeric and boolean columns are sent as their arrays. Every other column
+    is sent as codes into its distinct values, in the smallest integer type
+    that holds them, so a repeated string is pickled once per range.
+    """
+    dtypes, arrays = [], []
+    for col in df.columns:
+        series = df[col]
+        dtypes.append(series.dtype)
+        if isinstance(series.dtype, np.dtype) and series.dtype.kind in 'biuf':
+            arrays.append(series.to_numpy())
+        else:
+            codes, uniques = pd.factorize(series)
+            code_type = next(t for t in (np.int8, np.int16, np.int32, np.int64) if len(uniques) <= np.iinfo(t).max)
+            arrays.append((codes.astype(code_type), np.asarray(uniques, dtype=object)))
+    return ColumnarFrame(list(df.columns), dtypes, arrays)
+
+def decode_frame(columnar):
+    """Rebuild the DataFrame of a ColumnarFrame with the dtypes it was parsed with."""
+    data = {}
+    for col, dtype, array in zip(columnar.columns, columnar.dtypes, columnar.arrays):
+        if isinstance(array, tuple):
+            codes, uniques = array
+            data[col] = pd.Series(pd.Categorical.from_codes(codes, categories=uniques)).astype(dtype)
+        else:
+            data[col] = array
+    return pd.DataFrame(data, columns=columnar.columns)
+
+def count_quotes(data):
+    """Count the quote characters in bytes that are not escaped."""
+    return data.count(b'"') - data.count(b"'\"")
+
+def csv_row_ranges(csv_path, pieces):
+    """Split the rows of a CSV file into up to `pieces` byte ranges [(start, end)].
+
+    Ranges end on a newline with an even number of unescaped quotes before
+    it, so a quoted field with a line break is never cut in two. The first
+    range starts after the header line.
+    """
+    size = os.path.getsize(csv_path)
+    with open(csv_path, 'rb') as f:
+        header_end = len(f.readline())
+        bounds = [header_end]
+        if pieces > 1 and size > header_end:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                pos, quotes = header_end, 0
+                for i in range(1, pieces):
+                    target = max(pos, size * i // pieces)
+                    while True:
+                        newline = data.find(b'\n', target)
+                        if newline == -1:
+                            break
+                        quotes += count_quotes(data[pos:newline + 1])
+                        pos = target = newline + 1
+                        if quotes % 2 == 0:
+                            break
+                    if newline == -1:
+                        break
+                    bounds.append(pos)
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+def parse_csv_range(csv_path, delimiter, start, end):
+    """Parse the rows between two byte offsets of a CSV file; runs in a parse process."""
+    with open(csv_path, 'rb') as f:
+        header = f.readline()
+        f.seek(start)
+        data = f.read(end - start)
+    return encode_frame(parse_csv(io.BytesIO(header + data), delimiter))
+
+def parse_csv_files(csv_paths, workers):
+    """Parse CSV files in a pool of processes and cache them for read_csv_file.
+
+    Every file, or every range of PARSE_SPLIT_BYTES of a larger file, is one
+    task. Processes return ColumnarFrames, which are decoded and joined per
+    file. A split file whose ranges were parsed into different non-numeric
+    dtypes is parsed again as a whole, so the cached frame is always the
+    same as the one of a single parse.
+    """
+    tasks = []
+    for csv_path in csv_paths:
+        stat = os.stat(csv_path)
+        with open(csv_path, 'r', encoding='utf-8') as f:
+            delimiter = detect_delimiter(f.readline())
+        pieces = -(-stat.st_size // PARSE_SPLIT_BYTES)
+        for start, end in csv_row_ranges(csv_path, pieces) or [(0, 0)]:
+            tasks.append((csv_path, (stat.st_mtime_ns, stat.st_size), delimiter, start, end))
+
+    frames = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(parse_csv_range, csv_path, delimiter, start, end)
+                   for csv_path, _, delimiter, start, end in tasks]
+        for (csv_path, version, delimiter, _, _), future in zip(tasks, futures):
+            frames.setdefault((csv_path, version, delimiter), []).append(decode_frame(future.result()))
+
+    for (csv_path, version, delimiter), parts in frames.items():
+        df = parts[0] if len(parts) == 1 else pd.concat(parts, ignore_index=True)
+        if any(len({str(part[col].dtype) for part in parts}) > 1 and df[col].dtype.kind not in 'biuf'
+               for col in df.columns):
+            df = parse_csv(csv_path, delimiter)
+        cache_parsed_csv(csv_path, version, df, delimiter)
+
+# === Column types ===
+BOOLEAN_VALUES = {'ja': True, 'nee': False, 'true': True, 'false': False}
+INTEGER_TYPES = ('INTEGER', 'BIGINT')
+COLUMN_TYPES = ('INTEGER', 'BIGINT', 'NUMERIC', 'BOOLEAN', 'TEXT')
+
+def load_column_type_overrides(path=COLUMN_TYPES_FILE):
+    """Load the column type overrides as {table_name: {column: type}}; empty if there is no file."""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        overrides = json.load(f)
+    for table_name, columns in overrides.items():
+        for column, sql_type in columns.items():
+            if sql_type.upper() not in COLUMN_TYPES:
+                raise ValueError(f"Unsupported type {sql_type!r} for {table_name}.{column} in {path}")
+    return {table_name: {col: t.upper() for col, t in columns.items()} for table_name, columns in overrides.items()}
+
+COLUMN_TYPE_OVERRIDES = load_column_type_overrides()
+
+def infer_column_type(series):
+    """Pick INTEGER, BIGINT, NUMERIC, BOOLEAN or TEXT for the values of a column."""
+    text = series.dropna().astype(str).str.strip()
+    text = text[text != '']
+    if text.empty:
+        return 'TEXT'
+    if text.str.lower().isin(BOOLEAN_VALUES.keys()).all():
+        return 'BOOLEAN'
+    numbers = pd.to_numeric(text, errors='coerce')
+    if numbers.isna().any():
+        return 'TEXT'
+    if (numbers == numbers.round()).all():
+        return 'BIGINT' if numbers.abs().max() > 2**31 - 1 else 'INTEGER'
+    return 'NUMERIC'
+
+def resolve_column_types(table_name, sample, columns):
+    """Infer the SQL type of each column from a frame, then apply the declared types and overrides.
+
+    Every row of the frame is used; pass the whole parsed file when it is in
+    memory, or a sample from read_csv_sample when it is streamed.
+    """
+    column_types = {col: infer_column_type(sample[col]) for col in columns}
+    # Relationship tables use the graph value types, so PostgreSQL and the graphs agree
+    if table_name in RELATIONSHIPS:
+        column_types.update({col: t for col, t in edge_value_types(table_name).items() if col in column_types})
+    for col, sql_type in COLUMN_TYPE_OVERRIDES.get(table_name, {}).items():
+        if col in column_types:
+            column_types[col] = sql_type
+    return column_types
+
+def apply_column_types(table_name, df, column_types):
+    """Convert the columns of a frame to the values PostgreSQL expects for their types.
+
+    Returns the converted frame and [(position, error)] of the rows with a
+    value that does not fit its column type, e.g. text after the inferred
+    sample of a streamed file. Those rows belong in the reject file; their
+    values are never stored as NULL.
+    """
+    data = df.copy()
+    errors = pd.Series('', index=df.index)
+    for col, sql_type in column_types.items():
+        if sql_type == 'TEXT' or col not in data.columns:
+            continue
+        original = data[col]
+        if sql_type == 'BOOLEAN':
+            converted = original.astype(str).str.strip().str.lower().map(BOOLEAN_VALUES)
+        else:
+            numbers = pd.to_numeric(original, errors='coerce')
+            if sql_type in INTEGER_TYPES:
+                numbers = numbers.where(numbers == numbers.round()).astype('Int64')
+            converted = numbers
+        converted = converted.astype(object).where(converted.notna(), None)
+        misfit = original.notna() & (original.astype(str).str.strip() != '') & converted.isna()
+        if misfit.any():
+            errors[misfit] += original[misfit].map(lambda value: f"{col} {value!r} is not {sql_type}; ")
+        data[col] = converted
+    misfits = [(int(position), error.rstrip('; ')) for position, error in zip(np.flatnonzero(errors != ''), errors[errors != ''])]
+    return data, misfits
+
+def copy_typed_rows(cursor, table_name, typed, misfits):
+    """COPY the rows of a typed frame that fit their column types, isolating rows PostgreSQL rejects.
+
+    Returns [(position, error)] of the misfits and the rejected rows, by
+    position in the frame.
+    """
+    fits = np.ones(len(typed), dtype=bool)
+    fits[[position for position, _ in misfits]] = False
+    rows, positions = typed[fits], np.flatnonzero(fits)
+    rejected = write_isolated(cursor, len(rows), lambda start, stop: copy_dataframe_postgres(
+        table_name, rows.iloc[start:stop], cursor))
+    return sorted(misfits + [(int(positions[position]), error) for position, error in rejected])
+
+def to_postgres_value(value, sql_type='TEXT'):
+    """Convert a single value for a column of the given SQL type; NaN and '' become None."""
+    if value is None or pd.isna(value) or value == '':
+        return None
+    if sql_type == 'BOOLEAN':
+        return BOOLEAN_VALUES.get(str(value).strip().lower())
+    if sql_type in INTEGER_TYPES:
+        return int(float(value))
+    return str(value)
+
+def to_graph_value(value, value_type='TEXT'):
+    """Convert a single value to the Python type written to AGE and Neo4j.
+
+    BOOLEAN gives True/False for Ja/Nee, INTEGER gives int, NUMERIC gives
+    int for whole numbers and float otherwise. Missing values and values
+    that do not fit the type become None.
+    """
+    if value is None or pd.isna(value) or value == '':
+        return None
+    if value_type == 'BOOLEAN':
+        if isinstance(value, bool):
+            return value
+        return BOOLEAN_VALUES.get(str(value).strip().lower())
+    if value_type in INTEGER_TYPES + ('NUMERIC',):
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return None
+        if number.is_integer():
+            return int(number)
+        return number if value_type == 'NUMERIC' else None
+    return str(value)
+
+def graph_column(series, value_type=None):
+    """Convert a whole column with the rules of to_graph_value; missing values become None.
+
+    Without a value type the values are kept as they are.
+    """
+    present = series.notna() & (series != '')
+    if value_type == 'BOOLEAN':
+        converted = series.astype(str).str.strip().str.lower().map(BOOLEAN_VALUES)
+    elif value_type in INTEGER_TYPES + ('NUMERIC',):
+        numbers = pd.to_numeric(series, errors='coerce')
+        whole = numbers == numbers.round()
+        converted = numbers.where(whole).astype('Int64').astype(object)
+        if value_type == 'NUMERIC':
+            converted = converted.where(whole, numbers.astype(object))
+    elif value_type is not None:
+        converted = series.astype(str)
+    else:
+        converted = series
+    converted = converted.astype(object)
+    return converted.where(present & converted.notna(), None)
+
+def graph_records(df, value_types, columns=None):
+    """Turn a frame into the row dicts written to AGE and Neo4j.
+
+    Unnamed columns are dropped and every column is converted at once with
+    graph_column, so the writers get clean rows. With `columns` only those
+    keys are returned, missing ones as None.
+    """
+    columns = [col for col in (df.columns if columns is None else columns) if not str(col).startswith('Unnamed')]
+    data = df.reindex(columns=columns)
+    clean = pd.DataFrame({col: graph_column(data[col], value_types.get(col)) for col in columns},
+                         index=data.index, columns=columns)
+    return clean.to_dict('records')
+
+def postgres_column_types(table_name, cursor=None):
+    """Return the SQL types of an existing table's columns as used by to_postgres_value.
+
+    The table is looked up in the schema it was created in, the first one of
+    the search path (ag_catalog after prepare_age_session).
+    """
+    cursor = cursor or cur
+    cursor.execute("""
+        SELECT column_name, data_type FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = %s;
+    """, (table_name.lower(),))
+    return {column: data_type.upper() for column, data_type in cursor.fetchall()}
+
+# === Create PostgreSQL tables for each node type ===
+def create_table_from_csv(table_name, columns, cursor=None, column_types=None):
+    """Create a PostgreSQL table with the columns of a parsed CSV.
+
+    Columns get the types from `column_types` (TEXT when not given) and
+    node tables get a primary key on _id.
+    """
+    cursor = cursor or cur
+    column_types = column_types or {}
     
-    # Drop table if exists
-    cur.execute(f"DROP TABLE IF EXISTS {table_name} CASCADE;")
+    # Drop table if exists; in the staging schema only, never the live table further down the search path
+    table_ref = f"{TABLE_SCHEMA}.{table_name}" if TABLE_SCHEMA else table_name
+    cursor.execute(f"DROP TABLE IF EXISTS {table_ref} CASCADE;")
     
-    # Create table with TEXT columns (can be refined later)
-    column_defs = ', '.join([f'"{col}" TEXT' for col in columns])
-    create_sql = f"CREATE TABLE {table_name} ({column_defs});"
-    cur.execute(create_sql)
+    column_defs = [f'"{col}" {column_types.get(col, "TEXT")}' for col in columns]
+    if table_name in MAIN_TABLES and '_id' in columns:
+        column_defs.append('PRIMARY KEY ("_id")')
+    if table_name in ANGLE_RANGES and all(col in columns for col in ANGLE_RANGES[table_name]):
+        column_defs.append(angle_range_column_sql(*ANGLE_RANGES[table_name]))
+    create_sql = f"CREATE TABLE {table_ref} ({', '.join(column_defs)});"
+    cursor.execute(create_sql)
     print(f"Created PostgreSQL table: {table_name}")
 
+def angle_range_column_sql(lower, upper):
+    """Column definition of the generated angle_range column; NULL unless both bounds are known."""
+    return (f'angle_range numrange GENERATED ALWAYS AS (CASE WHEN "{lower}" IS NULL OR "{upper}" IS NULL THEN NULL '
+            f'ELSE numrange(LEAST("{lower}"::numeric, "{upper}"::numeric), '
+            f'GREATEST("{lower}"::numeric, "{upper}"::numeric), \'[]\') END) STORED')
+
+def create_foreign_key_indexes(table_name, columns, cursor=None):
+    """Index the FK columns of a relationship table, and its angle_range column with GiST."""
+    cursor = cursor or cur
+    relationship = RELATIONSHIPS[table_name]
+    for _, fk in (relationship["source"], relationship["target"]):
+        if fk in columns:
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS "{table_name}_{fk}_idx" ON {table_name} ("{fk}");')
+    if table_name in ANGLE_RANGES and all(col in columns for col in ANGLE_RANGES[table_name]):
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS "{table_name}_angle_range_idx" '
+                       f'ON {table_name} USING gist (angle_range);')
+        cursor.execute(f'ANALYZE {table_name};')
+
 # === Helpers ===
 MAIN_TABLES = [
     "Aim", "AimType", "Dof", "Exo", "ExoProperty", "JointT", 
@@ -104,433 +676,1747 @@ INTERMEDIATE_TABLES = [
     "TRANSFERS_FORCES_TO"
 ]
 
-# === PostgreSQL table insert ===
-def insert_row_postgres(table_name, row):
-    """Insert a row into a regular PostgreSQL table."""
-    columns = list(row.keys())
-    values = list(row.values())
-    
-    # Convert values to appropriate types
-    formatted_values = []
-    for v in values:
-        if pd.isna(v) or v == '' or v is None:
-            formatted_values.append(None)
-        else:
-            formatted_values.append(str(v))
-    
+ANGLE_RANGE_PROPERTIES = [
+    "aim", "rangeAdjustable", "lowerBoundMinAngle", "lowerBoundMaxAngle",
+    "upperBoundMinAngle", "upperBoundMaxAngle", "sizeAdjustable", "direction"
+]
+# Source (label, FK column), target (label, FK column) and edge properties per relationship
+RELATIONSHIPS = {
+    "ASSISTS_IN": {"source": ("Exo", "exoId"), "target": ("Dof", "dofId"),
+                   "properties": ANGLE_RANGE_PROPERTIES},
+    "DOESNT_GO_WITH": {"source": ("Exo", "exoId"), "target": ("StructureKinematicName", "sknId"),
+                       "properties": []},
+    "GIVES_POSTURAL_SUPPORT_IN": {"source": ("Exo", "exoId"), "target": ("Dof", "dofId"),
+                                  "properties": ["aim", "adjustable", "mechanism", "direction"]},
+    "GIVES_RESISTANCE_IN": {"source": ("Exo", "exoId"), "target": ("Dof", "dofId"),
+                            "properties": ANGLE_RANGE_PROPERTIES},
+    "HAS_AIM": {"source": ("Exo", "exoId"), "target": ("Aim", "aimId"),
+                "properties": ["aimCategory"]},
+    "HAS_AIM_SKN": {"source": ("Exo", "exoId"), "target": ("StructureKinematicName", "sknId"),
+                    "properties": ["structureKinematicNameCategory"]},
+    "HAS_AIMTYPE": {"source": ("Aim", "aimId"), "target": ("AimType", "aimTypeId"),
+                    "properties": []},
+    "HAS_AS_MAIN_DOF": {"source": ("Exo", "exoId"), "target": ("Dof", "dofId"),
+                        "properties": []},
+    "HAS_DOF": {"source": ("JointT", "jointTId"), "target": ("Dof", "dofId"),
+                "properties": []},
+    "HAS_PROPERTY": {"source": ("Exo", "exoId"), "target": ("ExoProperty", "exoPropertyId"),
+                     "properties": ["exoPropertyValue"]},
+    "HAS_SKNTYPE": {"source": ("StructureKinematicName", "sknId"), "target": ("StructureKinematicNameType", "sknTypeId"),
+                    "properties": []},
+    "IS_CONNECTED_WITH": {"source": ("JointT", "jointTId"), "target": ("Part", "partId"),
+                          "properties": []},
+    "LIMITS_IN": {"source": ("Exo", "exoId"), "target": ("Dof", "dofId"),
+                  "properties": ["aim", "maxAngle", "minAngle", "adjustable", "direction"]},
+    "TRANSFERS_FORCES_FROM": {"source": ("Exo", "exoId"), "target": ("Part", "partId"),
+                              "properties": []},
+    "TRANSFERS_FORCES_TO": {"source": ("Exo", "exoId"), "target": ("Part", "partId"),
+                            "properties": []},
+}
+
+# Value type of every edge property, used to write real booleans and numbers to the graphs
+ANGLE_RANGE_PROPERTY_TYPES = {
+    "aim": "BOOLEAN", "rangeAdjustable": "BOOLEAN", "lowerBoundMinAngle": "NUMERIC",
+    "lowerBoundMaxAngle": "NUMERIC", "upperBoundMinAngle": "NUMERIC", "upperBoundMaxAngle": "NUMERIC",
+    "sizeAdjustable": "BOOLEAN", "direction": "INTEGER"
+}
+RELATIONSHIP_PROPERTY_TYPES = {
+    "ASSISTS_IN": ANGLE_RANGE_PROPERTY_TYPES,
+    "GIVES_POSTURAL_SUPPORT_IN": {"aim": "BOOLEAN", "adjustable": "BOOLEAN", "mechanism": "TEXT",
+                                  "direction": "INTEGER"},
+    "GIVES_RESISTANCE_IN": ANGLE_RANGE_PROPERTY_TYPES,
+    "HAS_AIM": {"aimCategory": "TEXT"},
+    "HAS_AIM_SKN": {"structureKinematicNameCategory": "TEXT"},
+    "HAS_PROPERTY": {"exoPropertyValue": "TEXT"},
+    "LIMITS_IN": {"aim": "BOOLEAN", "maxAngle": "NUMERIC", "minAngle": "NUMERIC", "adjustable": "BOOLEAN",
+                  "direction": "INTEGER"},
+}
+
+# Lower and upper bound columns of the angle interval per relationship, materialised as angle_range
+ANGLE_RANGES = {
+    "ASSISTS_IN": ("lowerBoundMinAngle", "upperBoundMaxAngle"),
+    "GIVES_RESISTANCE_IN": ("lowerBoundMinAngle", "upperBoundMaxAngle"),
+    "LIMITS_IN": ("minAngle", "maxAngle"),
+}
+
+def edge_value_types(table_name):
+    """Return the value types of a relationship's FK columns and properties."""
+    relationship = RELATIONSHIPS[table_name]
+    types = {relationship["source"][1]: "INTEGER", relationship["target"][1]: "INTEGER"}
+    types.update(RELATIONSHIP_PROPERTY_TYPES.get(table_name, {}))
+    return types
+
+# === Compiled relationship statements ===
+EdgeStatements = namedtuple('EdgeStatements', ['keys', 'value_types', 'age_row', 'age_param', 'neo4j_batch'])
+
+def compile_edge_statements(table_name):
+    """Build the AGE and Neo4j statements of a relationship type from RELATIONSHIPS.
+
+    `age_row` is a complete AGE query with %(key)s slots for the values
+    formatted by format_age_value; `age_param` is the Cypher for a prepared
+    statement and, like `neo4j_batch`, takes the values as parameters. Both
+    AGE statements return the number of edges created, which is 0 when the
+    source or target vertex does not exist.
+    """
+    relationship = RELATIONSHIPS[table_name]
+    source_label, source_fk = relationship["source"]
+    target_label, target_fk = relationship["target"]
+    properties = relationship["properties"]
+    keys = [source_fk, target_fk] + properties
+
+    age_props = ", ".join([f"{p}: %({p})s" for p in properties])
+    row_props = ", ".join([f"{p}: ${p}" for p in properties])
+    age_row = (f"SELECT * FROM cypher('{GRAPH_NAME}', $$ "
+               f"MATCH (s:{source_label}), (t:{target_label}) "
+               f"WHERE s._id = %({source_fk})s AND t._id = %({target_fk})s "
+               f"CREATE (s)-[:{table_name}{f' {{{age_props}}}' if properties else ''}]->(t) "
+               f"RETURN count(*) $$) AS (r agtype);")
+    age_param = (f"MATCH (s:{source_label}), (t:{target_label}) "
+                 f"WHERE s._id = ${source_fk} AND t._id = ${target_fk} "
+                 f"CREATE (s)-[:{table_name}{f' {{{row_props}}}' if properties else ''}]->(t) "
+                 f"RETURN count(*)")
+
+    batch_props = ", ".join([f"{p}: row.{p}" for p in properties])
+    neo4j_batch = f"""
+    UNWIND $rows AS row
+    MATCH (s:{source_label} {{_id: row.{source_fk}}}), (t:{target_label} {{_id: row.{target_fk}}})
+    CREATE (s)-[:{table_name} {{{batch_props}}}]->(t)
+    """
+    return EdgeStatements(keys, edge_value_types(table_name), age_row, age_param, neo4j_batch)
+
+EDGE_STATEMENTS = {name: compile_edge_statements(name) for name in RELATIONSHIPS}
+
+# === PostgreSQL bulk load ===
+def normalise_frame(df):
+    """Drop unnamed columns and turn NaN and empty strings into None."""
+    columns = [col for col in df.columns if not str(col).startswith('Unnamed')]
+    data = df[columns].astype(object)
+    return data.where(data.notna() & (data != ''), None)
+
+def copy_dataframe_postgres(table_name, df, cursor=None):
+    """Bulk load a DataFrame into a PostgreSQL table with COPY ... FROM STDIN.
+
+    NaN, None and empty strings become NULL, every other value is sent as
+    its string form.
+    """
+    cursor = cursor or cur
+    data = normalise_frame(df)
+    columns = list(data.columns)
+    if data.empty or not columns:
+        return
+
+    # Unquoted empty fields are read back as NULL in CSV format
+    buffer = io.StringIO()
+    data.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+
     columns_str = ', '.join([f'"{col}"' for col in columns])
-    placeholders = ', '.join(['%s'] * len(columns))
-    
-    insert_sql = f"INSERT INTO {table_name} ({columns_str}) VALUES ({placeholders});"
-    cur.execute(insert_sql, formatted_values)
+    copy_sql = f"COPY {table_name} ({columns_str}) FROM STDIN WITH (FORMAT CSV);"
+    cursor.copy_expert(copy_sql, buffer)
+
+# === Error isolation ===
+reject_lock = threading.Lock()
+
+def write_isolated(cursor, count, write, batch_size=None):
+    """Write `count` rows in savepoint batches so a bad row does not abort the transaction.
+
+    write(start, stop) writes the rows start..stop-1. A failing batch is
+    rolled back to its savepoint and split in halves until the failing rows
+    are isolated one by one; all other rows are written. Without a batch
+    size all rows form one batch. Returns [(position, error)] of the
+    rejected rows.
+    """
+    batch_size = batch_size or max(count, 1)
+    rejected = []
+    for start in range(0, count, batch_size):
+        rejected += write_split(cursor, start, min(start + batch_size, count), write)
+    return rejected
+
+def write_split(cursor, start, stop, write):
+    """Write rows start..stop-1 in a savepoint, splitting the range in halves when it fails."""
+    cursor.execute("SAVEPOINT import_batch;")
+    try:
+        write(start, stop)
+        rejected = []
+    except Exception as e:
+        cursor.execute("ROLLBACK TO SAVEPOINT import_batch;")
+        if stop - start == 1:
+            rejected = [(start, str(e).strip())]
+        else:
+            middle = (start + stop) // 2
+            rejected = write_split(cursor, start, middle, write) + write_split(cursor, middle, stop, write)
+    cursor.execute("RELEASE SAVEPOINT import_batch;")
+    return rejected
+
+def report_rejects(file, backend, rows, rejected, ends):
+    """Write the rejected rows of a frame or row list to the reject file.
+
+    `ends` holds the row offset in the file after each row, as in the
+    checkpoints. Returns a mask of the rows that were written.
+    """
+    keep = [True] * len(rows)
+    rejects = []
+    for position, error in rejected:
+        keep[position] = False
+        row = rows.iloc[position].to_dict() if isinstance(rows, pd.DataFrame) else rows[position]
+        rejects.append((int(ends[position]) + 1, error, row))
+    if rejects:
+        write_rejects(file, backend, rejects)
+    return keep
+
+def reset_rejects(path=None):
+    """Remove the reject file of the previous import, so it only holds the rows of one run."""
+    path = path or REJECT_FILE
+    with reject_lock:
+        if os.path.exists(path):
+            os.remove(path)
+
+def write_rejects(file, backend, rejects, path=None):
+    """Append rejected rows, as (line, error, row) tuples, to the reject file."""
+    path = path or REJECT_FILE
+    with reject_lock:
+        new_file = not os.path.exists(path)
+        with open(path, 'a', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f, delimiter=';')
+            if new_file:
+                writer.writerow(['file', 'line', 'backend', 'error', 'row'])
+            for line, error, row in rejects:
+                writer.writerow([file, line, backend, error, json.dumps(row, default=str)])
+    for line, error, _ in rejects:
+        where = f"line {line} of {file}" if line else f"a row of {file}"
+        log.warning(f"✗ Rejected {where} ({backend}): {error}")
+
 
 # === AGE insert ===
-def insert_node_age(table_name, row):
-    # Create individual properties as separate columns
-    props = ', '.join([f"{k}: {format_age_value(v)}" for k, v in row.items()])
-    cypher = f"CREATE (n:{table_name} {{{props}}}) RETURN n"
-    full_query = f"SELECT * FROM cypher('exo_graph', $$ {cypher} $$) AS (n agtype);"
-    cur.execute(full_query)
+# Names of the statements prepared on each connection
+_prepared_age_statements = weakref.WeakKeyDictionary()
+
+def prepare_age_statement(cursor, name, cypher):
+    """PREPARE a cypher() call that takes its parameters as one agtype map, once per connection.
+
+    The statement is bound to GRAPH_NAME, so names must include the graph:
+    a pooled connection may later be used by an import into another graph.
+    """
+    prepared = _prepared_age_statements.setdefault(cursor.connection, set())
+    if name not in prepared:
+        cursor.execute(f"PREPARE {name}(agtype) AS "
+                       f"SELECT * FROM cypher('{GRAPH_NAME}', $$ {cypher} $$, $1) AS (r agtype);")
+        prepared.add(name)
+
+def execute_age_statement(cursor, name, params):
+    """EXECUTE a prepared cypher() call with its parameters serialised as agtype."""
+    cursor.execute(f"EXECUTE {name}(%s);", (json.dumps(params, default=agtype_default),))
+
+def agtype_default(value):
+    """Serialise numpy scalars for agtype parameters; NaN must already be None."""
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+def insert_nodes_age(table_name, rows, batch_size=AGE_BATCH_SIZE, cursor=None):
+    """Create AGE vertices in batches, one multi-pattern CREATE per batch.
+
+    Expects clean rows as returned by graph_records.
+    With AGE_PREPARED each batch is sent as the $rows parameter of one
+    prepared UNWIND ... CREATE statement per label and column set.
+    """
+    cursor = cursor or cur
+    if AGE_PREPARED and rows:
+        keys = list(rows[0].keys())
+        props = ', '.join([f"{k}: row.{k}" for k in keys])
+        name = f"age_nodes_{GRAPH_NAME}_{table_name.lower()}_{hashlib.sha1(','.join(keys).encode()).hexdigest()[:8]}"
+        prepare_age_statement(cursor, name, f"UNWIND $rows AS row CREATE (:{table_name} {{{props}}})")
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        try:
+            if AGE_PREPARED:
+                execute_age_statement(cursor, name, {'rows': batch})
+            else:
+                patterns = ', '.join([f"(:{table_name} {{{format_age_props(row)}}})" for row in batch])
+                cypher = f"CREATE {patterns}"
+                full_query = f"SELECT * FROM cypher('{GRAPH_NAME}', $$ {cypher} $$) AS (n agtype);"
+                cursor.execute(full_query)
+        except Exception as e:
+            # The caller isolates and reports the rows that fail
+            log.debug(f"✗ ERROR creating {table_name} nodes {start + 1}-{start + len(batch)} of {len(rows)}: {e}")
+            log.debug(f"   First row in batch: {batch[0]}")
+            raise
+
+def format_age_props(row):
+    """Format a row dict as the inside of an AGE Cypher property map."""
+    return ', '.join([f"{k}: {format_age_value(v)}" for k, v in row.items()])
 
 def format_age_value(value):
     """Format value for AGE Cypher query - handle None, numbers, and strings properly."""
     if pd.isna(value) or value == '' or value is None:
         return 'null'
+    elif isinstance(value, bool):
+        return 'true' if value else 'false'
     elif isinstance(value, (int, float)):
         return str(value)
     else:
         # Escape single quotes in strings and wrap in quotes
         return f"'{str(value).replace(chr(39), chr(92)+chr(39))}'"
 
-def insert_edge_age(table_name, row):
-    """Insert an edge based on foreign keys in AGE."""
-    DEBUG = False  # Set to True to see generated queries
+def insert_edge_age(table_name, row, cursor=None):
+    """Insert an edge based on foreign keys in AGE; expects a clean row from graph_records.
+
+    Returns the number of edges created: 0 when a foreign key matches no vertex.
+    """
+    cursor = cursor or cur
+    statements = EDGE_STATEMENTS.get(table_name)
+    if statements is None:
+        return 0
     
+    if AGE_PREPARED:
+        full_query = statements.age_param
+    else:
+        full_query = statements.age_row % {k: format_age_value(row.get(k)) for k in statements.keys}
     try:
-        if table_name == "GIVES_POSTURAL_SUPPORT_IN":
-            cypher = f"""
-            MATCH (e:Exo), (d:Dof)
-            WHERE e._id = {format_age_value(row['exoId'])} AND d._id = {format_age_value(row['dofId'])}
-            CREATE (e)-[:GIVES_POSTURAL_SUPPORT_IN {{aim: {format_age_value(row.get('aim'))}, adjustable: {format_age_value(row.get('adjustable'))}, mechanism: {format_age_value(row.get('mechanism'))}, direction: {format_age_value(row.get('direction'))}}}]->(d)
-            """
-        elif table_name == "TRANSFERS_FORCES_FROM":
-            cypher = f"""
-            MATCH (e:Exo), (p:Part)
-            WHERE e._id = {format_age_value(row['exoId'])} AND p._id = {format_age_value(row['partId'])}
-            CREATE (e)-[:TRANSFERS_FORCES_FROM]->(p)
-            """
-        elif table_name == "TRANSFERS_FORCES_TO":
-            cypher = f"""
-            MATCH (e:Exo), (p:Part)
-            WHERE e._id = {format_age_value(row['exoId'])} AND p._id = {format_age_value(row['partId'])}
-            CREATE (e)-[:TRANSFERS_FORCES_TO]->(p)
-            """
-        elif table_name == "HAS_AIM":
-            cypher = f"""
-            MATCH (e:Exo), (a:Aim)
-            WHERE e._id = {format_age_value(row['exoId'])} AND a._id = {format_age_value(row['aimId'])}
-            CREATE (e)-[:HAS_AIM {{aimCategory: {format_age_value(row.get('aimCategory'))}}}]->(a)
-            """
-        elif table_name == "HAS_AIM_SKN":
-            cypher = f"""
-            MATCH (e:Exo), (s:StructureKinematicName)
-            WHERE e._id = {format_age_value(row['exoId'])} AND s._id = {format_age_value(row['sknId'])}
-            CREATE (e)-[:HAS_AIM_SKN {{structureKinematicNameCategory: {format_age_value(row.get('structureKinematicNameCategory'))}}}]->(s)
-            """
-        elif table_name == "HAS_PROPERTY":
-            cypher = f"""
-            MATCH (e:Exo), (p:ExoProperty)
-            WHERE e._id = {format_age_value(row['exoId'])} AND p._id = {format_age_value(row['exoPropertyId'])}
-            CREATE (e)-[:HAS_PROPERTY {{exoPropertyValue: {format_age_value(row.get('exoPropertyValue'))}}}]->(p)
-            """
-        elif table_name == "ASSISTS_IN":
-            cypher = f"""
-            MATCH (e:Exo), (d:Dof)
-            WHERE e._id = {format_age_value(row['exoId'])} AND d._id = {format_age_value(row['dofId'])}
-            CREATE (e)-[:ASSISTS_IN {{aim: {format_age_value(row.get('aim'))}, rangeAdjustable: {format_age_value(row.get('rangeAdjustable'))}, lowerBoundMinAngle: {format_age_value(row.get('lowerBoundMinAngle'))}, lowerBoundMaxAngle: {format_age_value(row.get('lowerBoundMaxAngle'))}, upperBoundMinAngle: {format_age_value(row.get('upperBoundMinAngle'))}, upperBoundMaxAngle: {format_age_value(row.get('upperBoundMaxAngle'))}, sizeAdjustable: {format_age_value(row.get('sizeAdjustable'))}, direction: {format_age_value(row.get('direction'))}}}]->(d)
-            """
-        elif table_name == "DOESNT_GO_WITH":
-            cypher = f"""
-            MATCH (e:Exo), (s:StructureKinematicName)
-            WHERE e._id = {format_age_value(row['exoId'])} AND s._id = {format_age_value(row['sknId'])}
-            CREATE (e)-[:DOESNT_GO_WITH]->(s)
-            """
-        elif table_name == "GIVES_RESISTANCE_IN":
-            cypher = f"""
-            MATCH (e:Exo), (d:Dof)
-            WHERE e._id = {format_age_value(row['exoId'])} AND d._id = {format_age_value(row['dofId'])}
-            CREATE (e)-[:GIVES_RESISTANCE_IN {{aim: {format_age_value(row.get('aim'))}, rangeAdjustable: {format_age_value(row.get('rangeAdjustable'))}, lowerBoundMinAngle: {format_age_value(row.get('lowerBoundMinAngle'))}, lowerBoundMaxAngle: {format_age_value(row.get('lowerBoundMaxAngle'))}, upperBoundMinAngle: {format_age_value(row.get('upperBoundMinAngle'))}, upperBoundMaxAngle: {format_age_value(row.get('upperBoundMaxAngle'))}, sizeAdjustable: {format_age_value(row.get('sizeAdjustable'))}, direction: {format_age_value(row.get('direction'))}}}]->(d)
-            """
-        elif table_name == "HAS_AIMTYPE":
-            cypher = f"""
-            MATCH (a:Aim), (at:AimType)
-            WHERE a._id = {format_age_value(row['aimId'])} AND at._id = {format_age_value(row['aimTypeId'])}
-            CREATE (a)-[:HAS_AIMTYPE]->(at)
-            """
-        elif table_name == "HAS_AS_MAIN_DOF":
-            cypher = f"""
-            MATCH (e:Exo), (d:Dof)
-            WHERE e._id = {format_age_value(row['exoId'])} AND d._id = {format_age_value(row['dofId'])}
-            CREATE (e)-[:HAS_AS_MAIN_DOF]->(d)
-            """
-        elif table_name == "HAS_DOF":
-            cypher = f"""
-            MATCH (j:JointT), (d:Dof)
-            WHERE j._id = {format_age_value(row['jointTId'])} AND d._id = {format_age_value(row['dofId'])}
-            CREATE (j)-[:HAS_DOF]->(d)
-            """
-        elif table_name == "HAS_SKNTYPE":
-            cypher = f"""
-            MATCH (s:StructureKinematicName), (st:StructureKinematicNameType)
-            WHERE s._id = {format_age_value(row['sknId'])} AND st._id = {format_age_value(row['sknTypeId'])}
-            CREATE (s)-[:HAS_SKNTYPE]->(st)
-            """
-        elif table_name == "IS_CONNECTED_WITH":
-            cypher = f"""
-            MATCH (j:JointT), (p:Part)
-            WHERE j._id = {format_age_value(row['jointTId'])} AND p._id = {format_age_value(row['partId'])}
-            CREATE (j)-[:IS_CONNECTED_WITH]->(p)
-            """
-        elif table_name == "LIMITS_IN":
-            cypher = f"""
-            MATCH (e:Exo), (d:Dof)
-            WHERE e._id = {format_age_value(row['exoId'])} AND d._id = {format_age_value(row['dofId'])}
-            CREATE (e)-[:LIMITS_IN {{aim: {format_age_value(row.get('aim'))}, maxAngle: {format_age_value(row.get('maxAngle'))}, minAngle: {format_age_value(row.get('minAngle'))}, adjustable: {format_age_value(row.get('adjustable'))}, direction: {format_age_value(row.get('direction'))}}}]->(d)
-            """
+        log.debug(f"DEBUG Query: {full_query}")
+        if AGE_PREPARED:
+            name = f"age_edge_{GRAPH_NAME}_{table_name.lower()}"
+            prepare_age_statement(cursor, name, statements.age_param)
+            execute_age_statement(cursor, name, {k: row.get(k) for k in statements.keys})
         else:
-            return
-        
-        if DEBUG:
-            print(f"DEBUG Query: SELECT * FROM cypher('exo_graph', $$ {cypher} $$) AS (r agtype);")
+            cursor.execute(full_query)
         
-        full_query = f"SELECT * FROM cypher('exo_graph', $$ {cypher} $$) AS (r agtype);"
-        cur.execute(full_query)
-        
-        # Note: CREATE queries may not return data, which is normal behavior
-        # The edge is created successfully as long as no exception is raised
+        # MATCH ... CREATE silently creates nothing for a dangling foreign key
+        created = cursor.fetchone()
+        return int(str(created[0])) if created else 0
             
     except Exception as e:
-        print(f"✗ ERROR creating edge for {table_name}: {e}")
-        print(f"   Row data: {row}")
-        print(f"   Query: {cypher if 'cypher' in locals() else 'Query not generated'}")
+        log.debug(f"✗ ERROR creating edge for {table_name}: {e}")
+        log.debug(f"   Row data: {row}")
+        log.debug(f"   Query: {full_query}")
         raise
 
-# === Neo4j insert ===
-def insert_node_neo4j(table_name, row):
-    props = {k: (None if pd.isna(v) else v) for k, v in row.items()}
-    prop_str = ", ".join([f"{k}: ${k}" for k in props])
+def ensure_age_label(label, cursor=None, create='create_elabel'):
+    """Create an AGE label in the import graph unless it already exists.
 
-    cypher = f"CREATE (n:{table_name} {{ {prop_str} }})"
-    
-    with neo4j_driver.session() as session:
-        session.run(cypher, **props)
-
-def insert_edge_neo4j(table_name, row):
-    r = {k: (None if pd.isna(v) else v) for k, v in dict(row).items()}
-
-    if table_name == "GIVES_POSTURAL_SUPPORT_IN":
-        cypher = """
-        MATCH (e:Exo {_id: $exoId}), (d:Dof {_id: $dofId})
-        CREATE (e)-[:GIVES_POSTURAL_SUPPORT_IN {
-            aim: $aim,
-            adjustable: $adjustable,
-            mechanism: $mechanism,
-            direction: $direction
-        }]->(d)
-        """
-    elif table_name == "TRANSFERS_FORCES_FROM":
-        cypher = """
-        MATCH (e:Exo {_id: $exoId}), (p:Part {_id: $partId})
-        CREATE (e)-[:TRANSFERS_FORCES_FROM]->(p)
-        """
-    elif table_name == "TRANSFERS_FORCES_TO":
-        cypher = """
-        MATCH (e:Exo {_id: $exoId}), (p:Part {_id: $partId})
-        CREATE (e)-[:TRANSFERS_FORCES_TO]->(p)
-        """
-    elif table_name == "HAS_AIM":
-        cypher = """
-        MATCH (e:Exo {_id: $exoId}), (a:Aim {_id: $aimId})
-        CREATE (e)-[:HAS_AIM {aimCategory: $aimCategory}]->(a)
-        """
-    elif table_name == "HAS_AIM_SKN":
-        cypher = """
-        MATCH (e:Exo {_id: $exoId}), (s:StructureKinematicName {_id: $sknId})
-        CREATE (e)-[:HAS_AIM_SKN {structureKinematicNameCategory: $structureKinematicNameCategory}]->(s)
-        """
-    elif table_name == "HAS_PROPERTY":
-        cypher = """
-        MATCH (e:Exo {_id: $exoId}), (p:ExoProperty {_id: $exoPropertyId})
-        CREATE (e)-[:HAS_PROPERTY {exoPropertyValue: $exoPropertyValue}]->(p)
-        """
-    elif table_name == "ASSISTS_IN":
-        cypher = """
-        MATCH (e:Exo {_id: $exoId}), (d:Dof {_id: $dofId})
-        CREATE (e)-[:ASSISTS_IN {
-            aim: $aim,
-            rangeAdjustable: $rangeAdjustable,
-            lowerBoundMinAngle: $lowerBoundMinAngle,
-            lowerBoundMaxAngle: $lowerBoundMaxAngle,
-            upperBoundMinAngle: $upperBoundMinAngle,
-            upperBoundMaxAngle: $upperBoundMaxAngle,
-            sizeAdjustable: $sizeAdjustable,
-            direction: $direction
-        }]->(d)
-        """
-    elif table_name == "DOESNT_GO_WITH":
-        cypher = """
-        MATCH (e:Exo {_id: $exoId}), (s:StructureKinematicName {_id: $sknId})
-        CREATE (e)-[:DOESNT_GO_WITH]->(s)
-        """
-    elif table_name == "GIVES_RESISTANCE_IN":
-        cypher = """
-        MATCH (e:Exo {_id: $exoId}), (d:Dof {_id: $dofId})
-        CREATE (e)-[:GIVES_RESISTANCE_IN {
-            aim: $aim,
-            rangeAdjustable: $rangeAdjustable,
-            lowerBoundMinAngle: $lowerBoundMinAngle,
-            lowerBoundMaxAngle: $lowerBoundMaxAngle,
-            upperBoundMinAngle: $upperBoundMinAngle,
-            upperBoundMaxAngle: $upperBoundMaxAngle,
-            sizeAdjustable: $sizeAdjustable,
-            direction: $direction
-        }]->(d)
-        """
-    elif table_name == "HAS_AIMTYPE":
-        cypher = """
-        MATCH (a:Aim {_id: $aimId}), (at:AimType {_id: $aimTypeId})
-        CREATE (a)-[:HAS_AIMTYPE]->(at)
-        """
-    elif table_name == "HAS_AS_MAIN_DOF":
-        cypher = """
-        MATCH (e:Exo {_id: $exoId}), (d:Dof {_id: $dofId})
-        CREATE (e)-[:HAS_AS_MAIN_DOF]->(d)
-        """
-    elif table_name == "HAS_DOF":
-        cypher = """
-        MATCH (j:JointT {_id: $jointTId}), (d:Dof {_id: $dofId})
-        CREATE (j)-[:HAS_DOF]->(d)
-        """
-    elif table_name == "HAS_SKNTYPE":
-        cypher = """
-        MATCH (s:StructureKinematicName {_id: $sknId}), (st:StructureKinematicNameType {_id: $sknTypeId})
-        CREATE (s)-[:HAS_SKNTYPE]->(st)
-        """
-    elif table_name == "IS_CONNECTED_WITH":
-        cypher = """
-        MATCH (j:JointT {_id: $jointTId}), (p:Part {_id: $partId})
-        CREATE (j)-[:IS_CONNECTED_WITH]->(p)
-        """
-    elif table_name == "LIMITS_IN":
-        cypher = """
-        MATCH (e:Exo {_id: $exoId}), (d:Dof {_id: $dofId})
-        CREATE (e)-[:LIMITS_IN {
-            aim: $aim,
-            maxAngle: $maxAngle,
-            minAngle: $minAngle,
-            adjustable: $adjustable,
-            direction: $direction
-        }]->(d)
-        """
+    AGE only creates the table of a label on its first CREATE, so a label
+    whose file had no rows needs this before its table is indexed or joined.
+    """
+    cursor = cursor or cur
+    cursor.execute("""
+        SELECT count(*) FROM ag_catalog.ag_label l
+        JOIN ag_catalog.ag_graph g ON l.graph = g.graphid
+        WHERE g.name = %s AND l.name = %s;
+    """, (GRAPH_NAME, label))
+    row = cursor.fetchone()
+    if not (row and row[0]):
+        cursor.execute(f"SELECT {create}(%s, %s);", (GRAPH_NAME, label))
+
+def ensure_age_edge_label(label, cursor=None):
+    """Create an AGE edge label in the import graph unless it already exists."""
+    ensure_age_label(label, cursor, 'create_elabel')
+
+def ensure_age_vertex_label(label, cursor=None):
+    """Create an AGE vertex label in the import graph unless it already exists."""
+    ensure_age_label(label, cursor, 'create_vlabel')
+
+def age_property_sql(column, value_type):
+    """SQL expression for a relationship table column as an AGE property of the given type."""
+    if value_type == 'BOOLEAN':
+        return f'r."{column}"::boolean'
+    if value_type in INTEGER_TYPES:
+        return f'r."{column}"::bigint'
+    if value_type == 'NUMERIC':
+        # Whole numbers become AGE integers and the rest floats, like to_graph_value
+        return (f'CASE WHEN r."{column}" = trunc(r."{column}") THEN r."{column}"::bigint::agtype '
+                f'ELSE r."{column}"::float8::agtype END')
+    return f'r."{column}"'
+
+def create_edges_age_from_table(table_name, columns, cursor=None):
+    """Create all AGE edges of a relationship type from its PostgreSQL table.
+
+    Runs a single INSERT ... SELECT that joins the relationship table to the
+    source and target vertex label tables on _id, so no row leaves the
+    database. Returns the number of edges created.
+    """
+    cursor = cursor or cur
+    relationship = RELATIONSHIPS[table_name]
+    source_label, source_fk = relationship["source"]
+    target_label, target_fk = relationship["target"]
+
+    # Properties missing from the CSV are stored as null, like row.get() in insert_edge_age
+    properties = relationship["properties"]
+    if properties:
+        property_types = RELATIONSHIP_PROPERTY_TYPES.get(table_name, {})
+        pairs = ', '.join([f"'{p}'::text, {age_property_sql(p, property_types.get(p, 'TEXT'))}"
+                           if p in columns else f"'{p}'::text, NULL::text"
+                           for p in properties])
+        properties_sql = f"ag_catalog.agtype_build_map({pairs})"
     else:
-        return
+        properties_sql = "'{}'::agtype"
+
+    ensure_age_edge_label(table_name, cursor)
+    ensure_age_vertex_label(source_label, cursor)
+    ensure_age_vertex_label(target_label, cursor)
+    cursor.execute(f"""
+        INSERT INTO {GRAPH_NAME}."{table_name}" (start_id, end_id, properties)
+        SELECT s.id, t.id, {properties_sql}
+        FROM {table_name} r
+        JOIN {GRAPH_NAME}."{source_label}" s
+          ON ag_catalog.agtype_access_operator(VARIADIC ARRAY[s.properties, '"_id"'::agtype])
+             = r."{source_fk}"::numeric::bigint::agtype
+        JOIN {GRAPH_NAME}."{target_label}" t
+          ON ag_catalog.agtype_access_operator(VARIADIC ARRAY[t.properties, '"_id"'::agtype])
+             = r."{target_fk}"::numeric::bigint::agtype;
+    """)
+    return cursor.rowcount
+
+# === Angle range queries ===
+def find_exos_covering(dof_id, angle_from, angle_to, relationship="ASSISTS_IN", cursor=None):
+    """Return the sorted _ids of the exos whose angle range for a DOF covers [angle_from, angle_to].
+
+    Uses the GiST index on angle_range of the ASSISTS_IN, GIVES_RESISTANCE_IN
+    or LIMITS_IN table; rows without both bounds never match.
+    """
+    if relationship not in ANGLE_RANGES:
+        raise ValueError(f"{relationship} has no angle range; use one of {', '.join(ANGLE_RANGES)}")
+    cursor = cursor or cur
+    source_fk = RELATIONSHIPS[relationship]["source"][1]
+    target_fk = RELATIONSHIPS[relationship]["target"][1]
+    cursor.execute(f"""
+        SELECT DISTINCT "{source_fk}" FROM {relationship}
+        WHERE "{target_fk}" = %s AND angle_range @> numrange(%s, %s, '[]')
+        ORDER BY "{source_fk}";
+    """, (dof_id, min(angle_from, angle_to), max(angle_from, angle_to)))
+    return [row[0] for row in cursor.fetchall()]
+
+# === AGE indexes ===
+def create_age_id_indexes(labels):
+    """Create expression indexes on the _id property of each AGE vertex label table.
+
+    Labels without vertices, e.g. from a header-only file, are created first.
+    """
+    for label in labels:
+        ensure_age_vertex_label(label)
+        cur.execute(f"""
+            CREATE INDEX IF NOT EXISTS "{label}_id_idx" ON {GRAPH_NAME}."{label}"
+            USING btree (ag_catalog.agtype_access_operator(VARIADIC ARRAY[properties, '"_id"'::agtype]));
+        """)
+        cur.execute(f'ANALYZE {GRAPH_NAME}."{label}";')
+        print(f"Created AGE index on {label}._id")
+
+def age_id_lookup_uses_index(label):
+    """Check with EXPLAIN that matching a vertex of this label by _id uses an index."""
+    # Disable sequential scans so the check does not depend on the table size
+    cur.execute("SET enable_seqscan = off;")
+    try:
+        cur.execute(f"""
+            EXPLAIN SELECT * FROM cypher('{GRAPH_NAME}', $$
+                MATCH (n:{label}) WHERE n._id = 0 RETURN n
+            $$) AS (n agtype);
+        """)
+        plan = '\n'.join([row[0] for row in cur.fetchall()])
+    finally:
+        cur.execute("RESET enable_seqscan;")
+    return 'Index' in plan
+
+# === Neo4j insert ===
+def create_neo4j_id_constraints(session, labels, timeout=300):
+    """Ensure every Neo4j label has a uniqueness constraint on _id and wait until it is online.
+
+    Falls back to a plain index when the constraint cannot be created, for
+    example because the label already contains duplicate _id values.
+    """
+    for label in labels:
+        try:
+            session.run(f"CREATE CONSTRAINT {label}_id_unique IF NOT EXISTS "
+                        f"FOR (n:{label}) REQUIRE n._id IS UNIQUE").consume()
+        except Exception as e:
+            print(f"⚠ WARNING: Could not create unique constraint on {label}._id: {e}")
+            print(f"   Creating a non-unique index on {label}._id instead")
+            session.run(f"CREATE INDEX {label}_id_index IF NOT EXISTS FOR (n:{label}) ON (n._id)").consume()
+    session.run(f"CALL db.awaitIndexes({timeout})").consume()
+
+def write_neo4j_batch(tx, cypher, batch, checkpoint, start, created, counter):
+    """Run one UNWIND batch and, with a checkpoint, record the progress in the same transaction."""
+    summary = tx.run(cypher, rows=batch).consume()
+    if checkpoint:
+        loaded = checkpoint.rows_loaded + created + getattr(summary.counters, counter)
+        save_neo4j_checkpoint(tx, checkpoint.file_name, checkpoint.content_hash,
+                              Progress(int(checkpoint.ends[start + len(batch) - 1]), loaded, False))
+    return summary
+
+def insert_nodes_neo4j(session, table_name, rows, batch_size=NEO4J_BATCH_SIZE, checkpoint=None):
+    """Create Neo4j nodes in batches, one UNWIND transaction per batch.
+
+    Expects clean rows as returned by graph_records. Returns the number of
+    nodes created. A failing batch is reported and skipped so the remaining
+    batches are still written. With a Neo4jCheckpoint the progress is
+    recorded in the transaction of each batch.
+    """
+    cypher = f"UNWIND $rows AS row CREATE (n:{table_name}) SET n = row"
+    created = 0
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        count_round_trip()
+        try:
+            summary = session.execute_write(
+                lambda tx: write_neo4j_batch(tx, cypher, batch, checkpoint, start, created, 'nodes_created'))
+            created += summary.counters.nodes_created
+        except Exception as e:
+            print(f"✗ ERROR creating Neo4j {table_name} nodes {start + 1}-{start + len(batch)} of {len(rows)}: {e}")
+    return created
+
+def insert_edges_neo4j(session, table_name, rows, batch_size=NEO4J_BATCH_SIZE, checkpoint=None):
+    """Create Neo4j relationships in batches, one UNWIND transaction per batch.
+
+    Expects clean rows as returned by graph_records with the keys of the
+    compiled statements. Created relationships are counted per batch; a
+    batch that creates fewer relationships than it has rows is reported
+    with its row range. Returns the number of relationships created. With a
+    Neo4jCheckpoint the progress is recorded in the transaction of each batch.
+    """
+    statements = EDGE_STATEMENTS[table_name]
+    cypher = statements.neo4j_batch
+    created = 0
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        count_round_trip()
+        try:
+            summary = session.execute_write(
+                lambda tx: write_neo4j_batch(tx, cypher, batch, checkpoint, start, created, 'relationships_created'))
+        except Exception as e:
+            print(f"✗ ERROR creating Neo4j {table_name} edges {start + 1}-{start + len(batch)} of {len(rows)}: {e}")
+            continue
+        batch_created = summary.counters.relationships_created
+        created += batch_created
+        if batch_created < len(batch):
+            print(f"⚠ WARNING: Neo4j created {batch_created} of {len(batch)} {table_name} edges "
+                  f"in rows {start + 1}-{start + len(batch)}")
+    return created
+
+
+# === Incremental import bookkeeping ===
+def file_hash(path):
+    """Return the SHA-256 hex digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def read_snapshot(path):
+    """Return the raw bytes of a CSV file for the manifest."""
+    with open(path, 'rb') as f:
+        return f.read()
+
+def load_manifest():
+    """Return the manifest of the last import as {file_name: entry}, creating its table if needed."""
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS import_manifest (
+            file_name TEXT PRIMARY KEY,
+            content_hash TEXT NOT NULL,
+            schema_version TEXT NOT NULL,
+            neo4j_loaded BOOLEAN NOT NULL DEFAULT FALSE,
+            imported_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        );
+    """)
+    # Snapshot of the imported file, kept for row-level delta imports
+    cur.execute("ALTER TABLE import_manifest ADD COLUMN IF NOT EXISTS content BYTEA;")
+    cur.execute("SELECT file_name, content_hash, schema_version, neo4j_loaded FROM import_manifest;")
+    return {
+        file_name: {'hash': content_hash, 'schema_version': schema_version, 'neo4j_loaded': neo4j_loaded}
+        for file_name, content_hash, schema_version, neo4j_loaded in cur.fetchall()
+    }
+
+def save_manifest(hashes, neo4j_loaded, removed_files=(), contents=None):
+    """Record the content hashes (and optionally the content) of the imported files in the manifest."""
+    contents = contents or {}
+    for file_name, content_hash in hashes.items():
+        content = contents.get(file_name)
+        cur.execute("""
+            INSERT INTO import_manifest (file_name, content_hash, schema_version, neo4j_loaded, imported_at, content)
+            VALUES (%s, %s, %s, %s, now(), %s)
+            ON CONFLICT (file_name) DO UPDATE SET
+                content_hash = EXCLUDED.content_hash,
+                schema_version = EXCLUDED.schema_version,
+                neo4j_loaded = EXCLUDED.neo4j_loaded,
+                imported_at = EXCLUDED.imported_at,
+                content = EXCLUDED.content;
+        """, (file_name, content_hash, SCHEMA_VERSION, neo4j_loaded,
+              psycopg2.Binary(content) if content is not None else None))
+    for file_name in removed_files:
+        cur.execute("DELETE FROM import_manifest WHERE file_name = %s;", (file_name,))
+
+def plan_incremental_import(hashes, manifest, neo4j_loaded):
+    """Work out which files an incremental import has to reload.
+
+    Returns (node_tables, edge_tables, removed_tables), or None when a full
+    import is needed because there is no usable manifest for this schema
+    version or Neo4j was not loaded last time. Relationship types whose
+    source or target label changed are reloaded as well, since deleting the
+    old vertices also deletes their edges.
+    """
+    if not manifest:
+        return None
+    if any(entry['schema_version'] != SCHEMA_VERSION for entry in manifest.values()):
+        return None
+    if neo4j_loaded and not all(entry['neo4j_loaded'] for entry in manifest.values()):
+        return None
+
+    changed = {os.path.splitext(f)[0] for f, h in hashes.items() if manifest.get(f, {}).get('hash') != h}
+    removed = {os.path.splitext(f)[0] for f in manifest if f not in hashes}
+    present = {os.path.splitext(f)[0] for f in hashes}
+
+    changed_labels = {t for t in changed | removed if t in MAIN_TABLES}
+    node_tables = sorted(t for t in changed if t in MAIN_TABLES)
+    edge_tables = sorted(
+        {t for t in changed if t in INTERMEDIATE_TABLES} | dependent_edge_tables(changed_labels, present)
+    )
+    return node_tables, edge_tables, sorted(removed)
+
+def dependent_edge_tables(labels, tables):
+    """Return the relationship tables among `tables` whose source or target label is in `labels`."""
+    return {
+        t for t in tables if t in INTERMEDIATE_TABLES and (
+            RELATIONSHIPS[t]["source"][0] in labels or RELATIONSHIPS[t]["target"][0] in labels
+        )
+    }
 
+def clear_graph_data(node_labels, edge_types):
+    """Delete the given edge types and vertex labels from AGE before they are reloaded; the caller commits."""
+    for edge_type in edge_types:
+        cur.execute(f"SELECT * FROM cypher('{GRAPH_NAME}', $$ MATCH ()-[r:{edge_type}]->() DELETE r $$) AS (r agtype);")
+    for label in node_labels:
+        cur.execute(f"SELECT * FROM cypher('{GRAPH_NAME}', $$ MATCH (n:{label}) DETACH DELETE n $$) AS (n agtype);")
+
+
+# === Checkpoints ===
+# Progress of one file in one backend: rows of the file written (including
+# skipped rows), rows loaded, and whether the file is done
+Progress = namedtuple('Progress', ['row_offset', 'rows_loaded', 'completed'])
+FRESH = Progress(0, 0, False)
+# Progress of a file in AGE (recorded in PostgreSQL, in the transaction of the
+# tables and the graph) and in Neo4j (recorded in an ImportCheckpoint node, in
+# the transaction of each batch)
+FileProgress = namedtuple('FileProgress', ['content_hash', 'age', 'neo4j'])
+# Where a Neo4j writer records its progress: row offset in the file after each row
+Neo4jCheckpoint = namedtuple('Neo4jCheckpoint', ['file_name', 'content_hash', 'ends', 'rows_loaded'])
+
+def create_checkpoint_table():
+    """Create the table of the AGE checkpoints if it does not exist."""
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS import_checkpoint (
+            file_name TEXT NOT NULL,
+            backend TEXT NOT NULL,
+            content_hash TEXT NOT NULL,
+            row_offset BIGINT NOT NULL DEFAULT 0,
+            rows_loaded BIGINT NOT NULL DEFAULT 0,
+            completed BOOLEAN NOT NULL DEFAULT FALSE,
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            PRIMARY KEY (file_name, backend)
+        );
+    """)
+
+def load_checkpoints():
+    """Return the AGE checkpoints as {file_name: (content_hash, Progress)}."""
+    create_checkpoint_table()
+    cur.execute("""SELECT file_name, content_hash, row_offset, rows_loaded, completed
+                   FROM import_checkpoint WHERE backend = 'age';""")
+    return {file_name: (content_hash, Progress(row_offset, rows_loaded, completed))
+            for file_name, content_hash, row_offset, rows_loaded, completed in cur.fetchall()}
+
+def save_checkpoint(file_name, content_hash, progress, cursor=None):
+    """Record the AGE progress of a file; commit it together with the rows it covers."""
+    cursor = cursor or cur
+    cursor.execute("""
+        INSERT INTO import_checkpoint (file_name, backend, content_hash, row_offset, rows_loaded, completed, updated_at)
+        VALUES (%s, 'age', %s, %s, %s, %s, now())
+        ON CONFLICT (file_name, backend) DO UPDATE SET
+            content_hash = EXCLUDED.content_hash,
+            row_offset = EXCLUDED.row_offset,
+            rows_loaded = EXCLUDED.rows_loaded,
+            completed = EXCLUDED.completed,
+            updated_at = EXCLUDED.updated_at;
+    """, (file_name, content_hash, progress.row_offset, progress.rows_loaded, progress.completed))
+
+def save_neo4j_checkpoint(tx, file_name, content_hash, progress):
+    """Record the Neo4j progress of a file inside a Neo4j transaction."""
+    tx.run("MERGE (c:ImportCheckpoint {file_name: $file_name}) "
+           "SET c.content_hash = $content_hash, c.row_offset = $row_offset, "
+           "c.rows_loaded = $rows_loaded, c.completed = $completed",
+           file_name=file_name, content_hash=content_hash, **progress._asdict()).consume()
+
+def load_neo4j_checkpoints(session):
+    """Return the Neo4j checkpoints as {file_name: (content_hash, Progress)}."""
+    result = session.run("MATCH (c:ImportCheckpoint) RETURN c.file_name AS file_name, c.content_hash AS content_hash, "
+                         "c.row_offset AS row_offset, c.rows_loaded AS rows_loaded, c.completed AS completed")
+    return {r['file_name']: (r['content_hash'], Progress(r['row_offset'], r['rows_loaded'], r['completed']))
+            for r in result}
+
+def reset_checkpoints(hashes, planned_files):
+    """Start the AGE checkpoints of a new run: planned files from the beginning, the others complete.
+
+    The caller commits them in the transaction that clears the graph, so an
+    interrupted run never leaves a cleared graph behind checkpoints that
+    still mark its files as complete.
+    """
+    create_checkpoint_table()
+    cur.execute("DELETE FROM import_checkpoint;")
+    for file_name, content_hash in hashes.items():
+        progress = FRESH if file_name in planned_files else Progress(0, 0, True)
+        save_checkpoint(file_name, content_hash, progress)
+
+def reset_neo4j(hashes, planned_files, node_labels=None, edge_types=None):
+    """Clear Neo4j and start its checkpoints of a new run in one transaction.
+
+    Without labels and types the whole database is cleared; otherwise only
+    the given edge types and node labels are deleted.
+    """
+    def clear_and_checkpoint(tx):
+        if node_labels is None and edge_types is None:
+            tx.run("MATCH (n) DETACH DELETE n").consume()
+        else:
+            for edge_type in edge_types or []:
+                tx.run(f"MATCH ()-[r:{edge_type}]->() DELETE r").consume()
+            for label in node_labels or []:
+                tx.run(f"MATCH (n:{label}) DETACH DELETE n").consume()
+            tx.run("MATCH (c:ImportCheckpoint) DELETE c").consume()
+        for file_name, content_hash in hashes.items():
+            progress = FRESH if file_name in planned_files else Progress(0, 0, True)
+            save_neo4j_checkpoint(tx, file_name, content_hash, progress)
     with neo4j_driver.session() as session:
-        result = session.run(cypher, **r)
-        summary = result.consume()
-        if summary.counters.relationships_created == 0:
-            print(f"⚠ WARNING: Neo4j edge creation failed for {table_name}")
-            print(f"   Row data: {r}")
+        session.execute_write(clear_and_checkpoint)
+
+def load_resume_progress(hashes):
+    """Return the progress of every file for --resume as {file_name: FileProgress}.
+
+    Returns None when there is nothing to resume: no checkpoints, no graph,
+    or CSV files that were added, removed or changed since the interrupted run.
+    """
+    checkpoints = load_checkpoints()
+    if not checkpoints or not age_graph_exists(GRAPH_NAME):
+        return None
+    neo4j_checkpoints = {}
+    if neo4j_available:
+        with neo4j_driver.session() as session:
+            neo4j_checkpoints = load_neo4j_checkpoints(session)
+    changed = sorted(f for f in set(checkpoints) | set(hashes)
+                     if checkpoints.get(f, (None,))[0] != hashes.get(f)
+                     or (neo4j_available and neo4j_checkpoints.get(f, (hashes.get(f),))[0] != hashes.get(f)))
+    if changed:
+        print(f"⚠ WARNING: CSV files changed since the interrupted import: {', '.join(changed)}")
+        return None
+    return {f: FileProgress(content_hash, age, neo4j_checkpoints.get(f, (content_hash, FRESH))[1])
+            for f, (content_hash, age) in checkpoints.items()}
+
+def file_complete(progress):
+    """Whether a file is done in AGE and, when it is available, in Neo4j."""
+    return progress.age.completed and (progress.neo4j.completed or not neo4j_available)
+
+def first_pending_row(progress, frame_start, frame_length):
+    """Index within a frame of the first row a backend still has to write."""
+    if progress.completed:
+        return frame_length
+    return min(max(progress.row_offset - frame_start, 0), frame_length)
+
+
+# === Row-level delta apply ===
+def parse_csv_text(text):
+    """Parse CSV text with the same dialect detection and options as the main import."""
+    return parse_csv(io.StringIO(text), detect_delimiter(text.split('\n', 1)[0]))
+
+def load_manifest_contents():
+    """Return the file snapshots stored by the last delta import as {file_name: text}."""
+    cur.execute("SELECT file_name, content FROM import_manifest WHERE content IS NOT NULL;")
+    return {file_name: bytes(content).decode('utf-8') for file_name, content in cur.fetchall()}
+
+def compute_node_delta(old_df, new_df, key='_id'):
+    """Compare two versions of a node file row by row on its key column.
 
+    Returns (inserted, updated, deleted): the new and changed rows as dicts
+    and the keys of removed rows. Returns None when the versions cannot be
+    compared row by row because the columns differ or keys are missing or
+    duplicated; the file must then be reloaded.
+    """
+    old, new = normalise_frame(old_df), normalise_frame(new_df)
+    if list(old.columns) != list(new.columns) or key not in new.columns:
+        return None
+    for data in (old, new):
+        if data[key].isna().any() or data[key].duplicated().any():
+            return None
 
-# === Main loop - Process nodes first, then edges ===
-csv_files = [f for f in os.listdir(CSV_DIR) if f.endswith(".csv")]
+    old_rows = {row[key]: row for row in old.to_dict('records')}
+    new_rows = {row[key]: row for row in new.to_dict('records')}
+    inserted = [row for k, row in new_rows.items() if k not in old_rows]
+    updated = [row for k, row in new_rows.items() if k in old_rows and row != old_rows[k]]
+    deleted = [k for k in old_rows if k not in new_rows]
+    return inserted, updated, deleted
 
-# Separate node files from edge files
-node_files = [f for f in csv_files if os.path.splitext(f)[0] in MAIN_TABLES]
-edge_files = [f for f in csv_files if os.path.splitext(f)[0] in INTERMEDIATE_TABLES]
+def compute_edge_delta(old_df, new_df, key_columns):
+    """Compare two versions of a relationship file grouped by its FK tuple.
 
-# Process all node files first
-print("\n" + "="*60)
-print("PHASE 1: Creating all nodes")
-print("="*60)
-for file in sorted(node_files):
+    A relationship file can hold several rows for the same FK tuple, so the
+    rows of a tuple are compared as a group. Returns (changed_keys, rows):
+    the FK tuples whose edges must be replaced and the new rows for them.
+    Returns None when the columns differ. Rows with missing FKs are ignored,
+    as in the main import.
+    """
+    old, new = normalise_frame(old_df), normalise_frame(new_df)
+    if list(old.columns) != list(new.columns) or not all(col in new.columns for col in key_columns):
+        return None
+
+    def group_rows(data):
+        groups = {}
+        for row in data.dropna(subset=key_columns).to_dict('records'):
+            key = tuple(row[col] for col in key_columns)
+            groups.setdefault(key, Counter())[tuple(row.values())] += 1
+        return groups
+
+    old_groups, new_groups = group_rows(old), group_rows(new)
+    changed_keys = [k for k in new_groups if old_groups.get(k) != new_groups[k]]
+    changed_keys += [k for k in old_groups if k not in new_groups]
+    changed = set(changed_keys)
+    rows = [row for row in new.dropna(subset=key_columns).to_dict('records')
+            if tuple(row[col] for col in key_columns) in changed]
+    return changed_keys, rows
+
+def fit_delta_rows(table_name, rows, column_types):
+    """Return the rows of a delta that fit their column types and their typed values as frames.
+
+    Rows with a value that does not fit go to the reject file instead.
+    """
+    new_rows = pd.DataFrame(rows, dtype=object)
+    typed, misfits = apply_column_types(table_name, new_rows, column_types)
+    keep = np.ones(len(new_rows), dtype=bool)
+    keep[[position for position, _ in misfits]] = False
+    if misfits:
+        write_rejects(f"{table_name}.csv", 'postgres',
+                      [(None, error, new_rows.iloc[position].to_dict()) for position, error in misfits])
+    return new_rows[keep], typed[keep]
+
+def typed_delta_rows(table_name, rows, column_types):
+    """COPY the new rows of a delta and return those that fit their column types."""
+    new_rows, typed = fit_delta_rows(table_name, rows, column_types)
+    copy_dataframe_postgres(table_name, typed)
+    return new_rows
+
+def apply_node_delta(table_name, inserted, updated, deleted, key='_id'):
+    """Write a node delta to PostgreSQL, AGE and Neo4j."""
+    column_types = postgres_column_types(table_name)
+    new_rows = typed_delta_rows(table_name, inserted, column_types)
+    inserted = graph_records(new_rows, column_types)
+    # A changed value that does not fit is rejected, never written as NULL
+    updated = graph_records(fit_delta_rows(table_name, updated, column_types)[0], column_types)
+    insert_nodes_age(table_name, inserted)
+
+    for row in updated:
+        columns = [col for col in row if col != key]
+        if not columns:
+            continue
+        set_sql = ', '.join([f'"{col}" = %s' for col in columns])
+        values = [to_postgres_value(row[col], column_types.get(col, 'TEXT')) for col in columns]
+        key_value = to_postgres_value(row[key], column_types.get(key, 'TEXT'))
+        cur.execute(f'UPDATE {table_name} SET {set_sql} WHERE "{key}" = %s;', values + [key_value])
+        assignments = ', '.join([f"n.{col} = {format_age_value(row[col])}" for col in columns])
+        cur.execute(f"""SELECT * FROM cypher('{GRAPH_NAME}', $$
+            MATCH (n:{table_name}) WHERE n.{key} = {format_age_value(row[key])} SET {assignments}
+        $$) AS (n agtype);""")
+
+    for value in deleted:
+        cur.execute(f'DELETE FROM {table_name} WHERE "{key}" = %s;',
+                    (to_postgres_value(value, column_types.get(key, 'TEXT')),))
+        cur.execute(f"""SELECT * FROM cypher('{GRAPH_NAME}', $$
+            MATCH (n:{table_name}) WHERE n.{key} = {format_age_value(value)} DETACH DELETE n
+        $$) AS (n agtype);""")
+
+    if neo4j_available:
+        with neo4j_driver.session() as session:
+            upserts = inserted + updated
+            if upserts:
+                session.execute_write(lambda tx: tx.run(
+                    f"UNWIND $rows AS row MERGE (n:{table_name} {{{key}: row.{key}}}) SET n = row",
+                    rows=upserts).consume())
+            if deleted:
+                session.execute_write(lambda tx: tx.run(
+                    f"UNWIND $ids AS id MATCH (n:{table_name} {{{key}: id}}) DETACH DELETE n",
+                    ids=list(deleted)).consume())
+
+def apply_edge_delta(table_name, changed_keys, rows):
+    """Replace the edges of the changed FK tuples in PostgreSQL, AGE and Neo4j."""
+    relationship = RELATIONSHIPS[table_name]
+    source_label, source_fk = relationship["source"]
+    target_label, target_fk = relationship["target"]
+
+    column_types = postgres_column_types(table_name)
+    changed_keys = [(to_graph_value(source_id, 'INTEGER'), to_graph_value(target_id, 'INTEGER'))
+                    for source_id, target_id in changed_keys]
+    for source_id, target_id in changed_keys:
+        cur.execute(f'DELETE FROM {table_name} WHERE "{source_fk}" = %s AND "{target_fk}" = %s;',
+                    (to_postgres_value(source_id, column_types.get(source_fk, 'TEXT')),
+                     to_postgres_value(target_id, column_types.get(target_fk, 'TEXT'))))
+        cur.execute(f"""SELECT * FROM cypher('{GRAPH_NAME}', $$
+            MATCH (s:{source_label})-[r:{table_name}]->(t:{target_label})
+            WHERE s._id = {format_age_value(source_id)} AND t._id = {format_age_value(target_id)}
+            DELETE r
+        $$) AS (r agtype);""")
+    new_rows = typed_delta_rows(table_name, rows, column_types)
+    rows = graph_records(new_rows, EDGE_STATEMENTS[table_name].value_types, EDGE_STATEMENTS[table_name].keys)
+    for row in rows:
+        insert_edge_age(table_name, row)
+
+    if neo4j_available:
+        with neo4j_driver.session() as session:
+            if changed_keys:
+                keys = [{'s': source_id, 't': target_id} for source_id, target_id in changed_keys]
+                session.execute_write(lambda tx: tx.run(f"""
+                    UNWIND $keys AS key
+                    MATCH (s:{source_label} {{_id: key.s}})-[r:{table_name}]->(t:{target_label} {{_id: key.t}})
+                    DELETE r
+                """, keys=keys).consume())
+            insert_edges_neo4j(session, table_name, rows)
+
+def apply_deltas(node_tables, edge_tables, changed_tables, previous_contents):
+    """Apply changed files as row-level deltas where possible.
+
+    Returns the (node_tables, edge_tables) that still need a full reload:
+    files without a previous snapshot or that cannot be compared row by row,
+    and relationship files that depend on a reloaded label.
+    """
+    reload_nodes = []
+    for table_name in node_tables:
+        file = f"{table_name}.csv"
+        delta = None
+        if file in previous_contents:
+            delta = compute_node_delta(parse_csv_text(previous_contents[file]),
+                                       read_csv_file(os.path.join(CSV_DIR, file)).frame)
+        if delta is None:
+            reload_nodes.append(table_name)
+            continue
+        inserted, updated, deleted = delta
+        apply_node_delta(table_name, inserted, updated, deleted)
+        print(f"Delta {table_name}: {len(inserted)} inserted, {len(updated)} updated, {len(deleted)} deleted")
+
+    # Edges only have to be reloaded for labels that were reloaded, not for labels updated in place
+    forced_edges = dependent_edge_tables(set(reload_nodes), edge_tables)
+    reload_edges = []
+    for table_name in edge_tables:
+        file = f"{table_name}.csv"
+        if table_name in forced_edges:
+            reload_edges.append(table_name)
+            continue
+        if table_name not in changed_tables:
+            # Only listed because its source or target label changed, which was applied in place
+            continue
+        relationship = RELATIONSHIPS[table_name]
+        key_columns = [relationship["source"][1], relationship["target"][1]]
+        delta = None
+        if file in previous_contents:
+            delta = compute_edge_delta(parse_csv_text(previous_contents[file]),
+                                       read_csv_file(os.path.join(CSV_DIR, file)).frame, key_columns)
+        if delta is None:
+            reload_edges.append(table_name)
+            continue
+        changed_keys, rows = delta
+        apply_edge_delta(table_name, changed_keys, rows)
+        print(f"Delta {table_name}: {len(changed_keys)} FK pairs replaced with {len(rows)} rows")
+    return reload_nodes, reload_edges
+
+
+# === Referential integrity validation ===
+# 'error' stops the import; 'warning' rows are skipped by the loaders as before
+Violation = namedtuple('Violation', ['severity', 'table', 'column', 'kind', 'count', 'examples'])
+VALIDATION_EXAMPLES = 10
+
+def validate_csv_files(csv_dir=None, chunk_size=None):
+    """Check ids and foreign keys of all CSV files before any database work.
+
+    Node files are checked for missing and duplicate _ids; relationship
+    files for null FKs, FKs without a node (anti-join against the parsed id
+    sets) and duplicate rows. All checks are column operations on the
+    parsed frames. Returns the list of Violations.
+    """
+    csv_dir = csv_dir or CSV_DIR
+    violations = []
+
+    def report(severity, table, column, kind, values):
+        values = list(values)
+        if values:
+            violations.append(Violation(severity, table, column, kind, len(values), values[:VALIDATION_EXAMPLES]))
+
+    node_ids = {}
+    for table_name in MAIN_TABLES:
+        csv_path = os.path.join(csv_dir, f"{table_name}.csv")
+        if not os.path.exists(csv_path):
+            continue
+        if '_id' not in read_csv_header(csv_path)[1]:
+            report('error', table_name, '_id', 'missing _id column', [csv_path])
+            continue
+        # Keep only a copy of the _id column, so each chunk is freed once it has been read
+        id_columns = [df['_id'].copy() for df in iter_csv_frames(csv_path, chunk_size)]
+        if not id_columns:
+            continue
+        ids = pd.concat(id_columns)
+        numeric = pd.to_numeric(ids, errors='coerce')
+        report('error', table_name, '_id', 'rows without a numeric _id (line numbers)',
+               numeric.index[numeric.isna()] + 2)
+        report('error', table_name, '_id', 'duplicate _id values', numeric[numeric.duplicated()].dropna().unique())
+        node_ids[table_name] = pd.Index(numeric.dropna().unique())
+
+    for table_name, relationship in RELATIONSHIPS.items():
+        csv_path = os.path.join(csv_dir, f"{table_name}.csv")
+        if not os.path.exists(csv_path):
+            continue
+        fk_columns = {}
+        row_hashes = []
+        for df in iter_csv_frames(csv_path, chunk_size):
+            columns = [col for col in df.columns if not str(col).startswith('Unnamed')]
+            for label, fk in (relationship["source"], relationship["target"]):
+                if fk in df.columns:
+                    fk_columns.setdefault((label, fk), []).append(df[fk].copy())
+            row_hashes.append(pd.util.hash_pandas_object(df[columns], index=False))
+        for label, fk in (relationship["source"], relationship["target"]):
+            if (label, fk) not in fk_columns:
+                report('error', table_name, fk, 'missing FK column', [csv_path])
+                continue
+            values = pd.to_numeric(pd.concat(fk_columns[(label, fk)]), errors='coerce')
+            report('warning', table_name, fk, 'rows with an empty or non-numeric FK (line numbers)',
+                   values.index[values.isna()] + 2)
+            known = node_ids.get(label, pd.Index([]))
+            dangling = values[values.notna() & ~values.isin(known)]
+            report('warning', table_name, fk, f'FK values with no {label} node', dangling.unique())
+        if row_hashes:
+            hashes = pd.concat(row_hashes)
+            report('warning', table_name, '*', 'duplicate edge rows (line numbers)', hashes.index[hashes.duplicated()] + 2)
+    return violations
+
+def print_validation_report(violations):
+    """Print all violations at once, errors first."""
+    if not violations:
+        print("✓ CSV validation passed: all _ids are unique and all FKs point at existing nodes")
+        return
+    errors = sum(1 for v in violations if v.severity == 'error')
+    print(f"CSV validation found {errors} errors and {len(violations) - errors} warnings:")
+    for v in sorted(violations, key=lambda v: (v.severity != 'error', v.table, v.column)):
+        symbol = '✗' if v.severity == 'error' else '⚠'
+        examples = ', '.join(str(int(x)) if isinstance(x, float) and x.is_integer() else str(x) for x in v.examples)
+        more = ', ...' if v.count > len(v.examples) else ''
+        print(f"{symbol} {v.table}.{v.column}: {v.count} {v.kind}: {examples}{more}")
+
+# === Edge file loading ===
+def csv_columns_and_types(table_name, csv_path):
+    """Return the columns of a CSV file and the SQL types inferred for them."""
+    if args.chunk_size:
+        _, columns = read_csv_header(csv_path)
+        sample = read_csv_sample(csv_path)
+    else:
+        sample = read_csv_file(csv_path).frame
+        columns = read_csv_file(csv_path).columns
+    columns = [col for col in columns if not str(col).startswith('Unnamed')]
+    return columns, resolve_column_types(table_name, sample, columns)
+
+def load_node_file(file, neo4j_session=None, progress=None):
+    """Load one node CSV into its PostgreSQL table, AGE and Neo4j.
+
+    The file is written chunk by chunk when --chunk-size is set, and every
+    chunk is committed together with its checkpoint. With the FileProgress
+    of an interrupted run, rows a backend already committed are skipped.
+    Returns the number of rows loaded into AGE.
+    """
     table_name = os.path.splitext(file)[0]
     csv_path = os.path.join(CSV_DIR, file)
+    progress = progress or FileProgress(file_hash(csv_path), FRESH, FRESH)
     
     print(f"\n{'='*60}")
     print(f"Processing file: {file}")
     print(f"Table name: {table_name}")
     print(f"{'='*60}")
     
-    # Create PostgreSQL table first
-    create_table_from_csv(table_name, csv_path)
-    
-    # Auto-detect delimiter by reading first line
-    with open(csv_path, 'r', encoding='utf-8') as f:
-        first_line = f.readline()
-        delimiter = ',' if ',' in first_line and ';' not in first_line else ';'
-    
-    # Read CSV with error handling for inconsistent columns
-    df = pd.read_csv(csv_path, sep=delimiter, quotechar='"', escapechar="'", 
-                    skipinitialspace=True, engine='python', on_bad_lines='warn')
+    # Create the PostgreSQL table from the CSV columns, unless a resumed run already loaded part of it
+    with measure(table_name, 'csv') as entry:
+        entry['bytes_read'] += os.path.getsize(csv_path)
+        columns, column_types = csv_columns_and_types(table_name, csv_path)
+    if progress.age == FRESH:
+        with measure(table_name, 'postgres'):
+            create_table_from_csv(table_name, columns, column_types=column_types)
+    else:
+        print(f"Resuming {file} at row {progress.age.row_offset} (AGE) and {progress.neo4j.row_offset} (Neo4j)")
 
-    print(f"Columns in {table_name}: {list(df.columns)}")
-    
-    # Check for ID column and print first few rows for debugging
-    id_column = None
-    for col in df.columns:
-        if col.lower() in ['id', '_id', f'{table_name.lower()}id']:
-            id_column = col
-            break
+    log.debug(f"Columns in {table_name}: {columns}")
     
+    # Check for ID column
+    id_column = find_id_column(table_name, columns)
     if id_column:
-        print(f"Found ID column: '{id_column}'")
-        print(f"Sample IDs: {df[id_column].head(3).tolist()}")
+        log.debug(f"Found ID column: '{id_column}'")
     else:
         print(f"WARNING: No ID column found in {table_name}!")
-        print(f"First row: {df.iloc[0].to_dict() if len(df) > 0 else 'No data'}")
-    
-    print(f"Inserting {len(df)} nodes for table: {table_name}")
     
-    for idx, row in df.iterrows():
-        row_dict = row.to_dict()
-        # Filter out unnamed columns (from trailing delimiters)
-        row_dict = {k: v for k, v in row_dict.items() if not str(k).startswith('Unnamed')}
-        
-        # Insert into PostgreSQL table
-        insert_row_postgres(table_name, row_dict)
+    total_rows = progress.age.rows_loaded
+    neo4j_loaded = progress.neo4j.rows_loaded or 0
+    position = 0
+    for df in measured_frames(table_name, iter_csv_frames(csv_path, args.chunk_size)):
+        frame_start, position = position, position + len(df)
+        if frame_start == 0:
+            # Log the first few rows for debugging
+            if id_column:
+                log.debug(f"Sample IDs: {df[id_column].head(3).tolist()}")
+            else:
+                log.debug(f"First row: {df.iloc[0].to_dict() if len(df) > 0 else 'No data'}")
         
-        # Insert into AGE graph
-        insert_node_age(table_name, row_dict)
+        age_first = first_pending_row(progress.age, frame_start, len(df))
+        node_rows = None
+        if age_first < len(df):
+            age_part = df.iloc[age_first:]
+            node_ends = list(range(frame_start + age_first + 1, position + 1))
+            log.debug(f"Inserting {len(age_part)} nodes for table: {table_name}")
+            
+            # Bulk load the PostgreSQL table in one COPY, isolating rows it rejects
+            typed_part, misfits = apply_column_types(table_name, age_part, column_types)
+            with measure(table_name, 'postgres') as entry:
+                rejected = copy_typed_rows(cur, table_name, typed_part, misfits)
+                keep = report_rejects(file, 'postgres', age_part, rejected, node_ends)
+                entry['rows'] += len(age_part) - len(rejected)
+                entry['failed_rows'] += len(rejected)
+            age_part = age_part[keep]
+            node_ends = [end for end, kept in zip(node_ends, keep) if kept]
+            
+            # Clean the whole frame at once; unnamed columns come from trailing delimiters
+            node_rows = graph_records(age_part, column_types)
+            
+            # Insert into AGE graph in batches, each in a savepoint
+            with measure(table_name, 'age') as entry:
+                rejected = write_isolated(cur, len(node_rows), lambda start, stop: insert_nodes_age(
+                    table_name, node_rows[start:stop]), AGE_BATCH_SIZE)
+                keep = report_rejects(file, 'age', node_rows, rejected, node_ends)
+                node_rows = [row for row, kept in zip(node_rows, keep) if kept]
+                node_ends = [end for end, kept in zip(node_ends, keep) if kept]
+                entry['rows'] += len(node_rows)
+                entry['failed_rows'] += len(rejected)
+            total_rows += len(node_rows)
+            save_checkpoint(file, progress.content_hash, Progress(position, total_rows, False))
+            conn.commit()
         
-        # Insert into Neo4j if available
-        if neo4j_available:
-            insert_node_neo4j(table_name, row_dict)
-    print(f"[OK] Successfully inserted {len(df)} nodes into PostgreSQL and AGE")
-
-# Commit nodes before creating edges
-conn.commit()
-print("\n✓ All nodes committed to database")
-
-# Process all edge files after nodes are created
-print("\n" + "="*60)
-print("PHASE 2: Creating all edges")
-print("="*60)
-for file in sorted(edge_files):
+        # Insert into Neo4j in batches if available
+        if neo4j_session and not progress.neo4j.completed:
+            first = first_pending_row(progress.neo4j, frame_start, len(df))
+            if node_rows is None or first != age_first:
+                node_rows = graph_records(df.iloc[first:], column_types)
+                node_ends = range(frame_start + first + 1, position + 1)
+            checkpoint = Neo4jCheckpoint(file, progress.content_hash, node_ends, neo4j_loaded)
+            with measure(table_name, 'neo4j') as entry:
+                created_nodes = insert_nodes_neo4j(neo4j_session, table_name, node_rows, checkpoint=checkpoint)
+                entry['rows'] += created_nodes
+                entry['failed_rows'] += len(node_rows) - created_nodes
+            neo4j_loaded += created_nodes
+            print(f"[OK] Created {created_nodes} Neo4j nodes for {table_name}")
+    
+    if not progress.age.completed:
+        save_checkpoint(file, progress.content_hash, Progress(position, total_rows, True))
+        conn.commit()
+    if neo4j_session and not progress.neo4j.completed:
+        neo4j_session.execute_write(lambda tx: save_neo4j_checkpoint(
+            tx, file, progress.content_hash, Progress(position, neo4j_loaded, True)))
+    
+    print(f"[OK] Successfully inserted {total_rows} nodes into PostgreSQL and AGE")
+    return total_rows
+
+def load_edge_file(file, cursor=None, neo4j_session=None, progress=None):
+    """Load one relationship CSV into its PostgreSQL table, AGE and Neo4j.
+
+    The file is written chunk by chunk when --chunk-size is set, and every
+    chunk is committed on the cursor's connection together with its
+    checkpoint. With the FileProgress of an interrupted run, rows a backend
+    already committed are skipped. Returns (successful_rows, skipped_rows),
+    where successful_rows counts the edges created in AGE.
+    """
+    cursor = cursor or cur
     table_name = os.path.splitext(file)[0]
     csv_path = os.path.join(CSV_DIR, file)
+    progress = progress or FileProgress(file_hash(csv_path), FRESH, FRESH)
     
     print(f"\n{'='*60}")
     print(f"Processing file: {file}")
     print(f"Table name: {table_name}")
     print(f"{'='*60}")
     
-    # Create PostgreSQL table first
-    create_table_from_csv(table_name, csv_path)
-    
-    # Auto-detect delimiter by reading first line
-    with open(csv_path, 'r', encoding='utf-8') as f:
-        first_line = f.readline()
-        delimiter = ',' if ',' in first_line and ';' not in first_line else ';'
-    
-    # Read CSV with error handling for inconsistent columns
-    df = pd.read_csv(csv_path, sep=delimiter, quotechar='"', escapechar="'", 
-                    skipinitialspace=True, engine='python', on_bad_lines='warn')
+    # Create the PostgreSQL table from the CSV columns, unless a resumed run already loaded part of it
+    with measure(table_name, 'csv') as entry:
+        entry['bytes_read'] += os.path.getsize(csv_path)
+        columns, column_types = csv_columns_and_types(table_name, csv_path)
+    if progress.age == FRESH:
+        with measure(table_name, 'postgres'):
+            create_table_from_csv(table_name, columns, cursor, column_types)
+    else:
+        print(f"Resuming {file} at row {progress.age.row_offset} (AGE) and {progress.neo4j.row_offset} (Neo4j)")
 
-    print(f"Columns in {table_name}: {list(df.columns)}")
-    print(f"Inserting {len(df)} edges for table: {table_name}")
+    log.debug(f"Columns in {table_name}: {columns}")
+    statements = EDGE_STATEMENTS.get(table_name)
+    value_types = statements.value_types if statements else column_types
+    keys = statements.keys if statements else None
     skipped_rows = 0
-    successful_rows = 0
+    successful_rows = progress.age.rows_loaded
+    neo4j_loaded = progress.neo4j.rows_loaded or 0
+    position = 0
     
-    for idx, row in df.iterrows():
-        row_dict = row.to_dict()
-        # Filter out unnamed columns (from trailing delimiters)
-        row_dict = {k: v for k, v in row_dict.items() if not str(k).startswith('Unnamed')}
+    for df in measured_frames(table_name, iter_csv_frames(csv_path, args.chunk_size)):
+        frame_start, position = position, position + len(df)
         
-        # Check if any critical ID columns are missing/NaN
-        has_missing_ids = False
-        for key, value in row_dict.items():
-            if 'Id' in key and pd.isna(value):
-                has_missing_ids = True
-                break
+        # One mask over the FK columns; rows with a missing foreign key are left out everywhere
+        df = df[[col for col in df.columns if not str(col).startswith('Unnamed')]]
+        id_columns = [col for col in df.columns if 'Id' in str(col)]
+        complete = df[id_columns].notna().all(axis=1)
+        # Row offset in the file after each complete row, as recorded in the checkpoints
+        complete_ends = frame_start + complete.to_numpy().nonzero()[0] + 1
         
-        if has_missing_ids:
-            skipped_rows += 1
-            continue
-        
-        try:
-            # Insert into PostgreSQL table
-            insert_row_postgres(table_name, row_dict)
+        age_first = first_pending_row(progress.age, frame_start, len(df))
+        edge_rows = None
+        if age_first < len(df):
+            complete_rows = df.iloc[age_first:][complete.iloc[age_first:]]
+            edge_ends = complete_ends[complete_ends > frame_start + age_first]
+            missing_rows = len(df) - age_first - len(complete_rows)
+            skipped_rows += missing_rows
+            log.debug(f"Inserting {len(complete_rows)} edges for table: {table_name}")
             
-            # Insert into AGE graph
-            insert_edge_age(table_name, row_dict)
+            # Bulk load the PostgreSQL table, isolating rows it rejects
+            typed_rows, misfits = apply_column_types(table_name, complete_rows, column_types)
+            with measure(table_name, 'postgres') as entry:
+                rejected = copy_typed_rows(cursor, table_name, typed_rows, misfits)
+                keep = report_rejects(file, 'postgres', complete_rows, rejected, edge_ends)
+                entry['rows'] += len(complete_rows) - len(rejected)
+                entry['skipped_rows'] += missing_rows
+                entry['failed_rows'] += len(rejected)
+            complete_rows, edge_ends = complete_rows[keep], edge_ends[keep]
+            skipped_rows += len(rejected)
             
-            # Insert into Neo4j if available
-            if neo4j_available:
-                insert_edge_neo4j(table_name, row_dict)
-            successful_rows += 1
-        except Exception as e:
-            print(f"✗ Error at row {idx + 2} (line {idx + 2} in CSV): {e}")
-            print(f"  Available columns: {list(row_dict.keys())}")
-            print(f"  Row data: {row_dict}")
-            skipped_rows += 1
+            edge_rows = graph_records(complete_rows, value_types, keys)
+            with measure(table_name, 'age') as age_metrics:
+                age_metrics['skipped_rows'] += missing_rows
+                if AGE_EDGE_MODE != 'server':
+                    # One statement per edge, AGE_BATCH_SIZE edges per savepoint;
+                    # a batch written again after a split overwrites its counts
+                    created = np.zeros(len(edge_rows), dtype=np.int64)
+                    def write_edges(start, stop):
+                        for i in range(start, stop):
+                            created[i] = insert_edge_age(table_name, edge_rows[i], cursor)
+                    rejected = write_isolated(cursor, len(edge_rows), write_edges, AGE_BATCH_SIZE)
+                    keep = report_rejects(file, 'age', edge_rows, rejected, edge_ends)
+                    edge_rows = [row for row, kept in zip(edge_rows, keep) if kept]
+                    edge_ends = edge_ends[keep]
+                    created_edges = int(created[keep].sum())
+                    dangling = len(edge_rows) - created_edges
+                    if dangling:
+                        print(f"[WARN] {dangling} {table_name} edges not created in AGE: source or target vertex missing")
+                    skipped_rows += len(rejected) + dangling
+                    age_metrics['rows'] += created_edges
+                    age_metrics['skipped_rows'] += dangling
+                    age_metrics['failed_rows'] += len(rejected)
+                    successful_rows += created_edges
+            save_checkpoint(file, progress.content_hash, Progress(position, successful_rows, False), cursor)
+            cursor.connection.commit()
+        
+        # Insert into Neo4j in batches if available
+        if neo4j_session and not progress.neo4j.completed:
+            first = first_pending_row(progress.neo4j, frame_start, len(df))
+            if edge_rows is None or first != age_first:
+                edge_rows = graph_records(df.iloc[first:][complete.iloc[first:]], value_types, keys)
+                edge_ends = complete_ends[complete_ends > frame_start + first]
+            checkpoint = Neo4jCheckpoint(file, progress.content_hash, edge_ends, neo4j_loaded)
+            with measure(table_name, 'neo4j') as entry:
+                created_edges = insert_edges_neo4j(neo4j_session, table_name, edge_rows, checkpoint=checkpoint)
+                entry['rows'] += created_edges
+                entry['failed_rows'] += len(edge_rows) - created_edges
+            neo4j_loaded += created_edges
+            print(f"[OK] Created {created_edges} Neo4j edges for {table_name}")
+    
+    if not progress.age.completed:
+        with measure(table_name, 'postgres'):
+            create_foreign_key_indexes(table_name, columns, cursor)
+        
+        # Create the AGE edges for the whole table in one statement inside the database
+        if AGE_EDGE_MODE == 'server':
+            with measure(table_name, 'age') as entry:
+                created_edges = create_edges_age_from_table(table_name, columns, cursor)
+                entry['rows'] += created_edges
+            print(f"Created {created_edges} AGE edges from table {table_name}")
+            # The join leaves out rows whose source or target vertex is missing
+            successful_rows = created_edges
+        save_checkpoint(file, progress.content_hash, Progress(position, successful_rows, True), cursor)
+        cursor.connection.commit()
+    if neo4j_session and not progress.neo4j.completed:
+        neo4j_session.execute_write(lambda tx: save_neo4j_checkpoint(
+            tx, file, progress.content_hash, Progress(position, neo4j_loaded, True)))
     
     if skipped_rows > 0:
         print(f"[WARN] Skipped {skipped_rows} rows due to errors or missing values")
     print(f"[OK] Successfully inserted {successful_rows} edges into PostgreSQL and AGE")
     
-    # Commit after each edge file
-    conn.commit()
+    return successful_rows, skipped_rows
+
+# === Blue/green swap ===
+def prepare_staging(cursor=None):
+    """Create an empty staging graph and schema, dropping what an earlier run left behind."""
+    cursor = cursor or cur
+    for graph in (STAGING_GRAPH, OLD_GRAPH):
+        if age_graph_exists(graph, cursor):
+            print(f"Dropping leftover AGE graph '{graph}'...")
+            cursor.execute("SELECT drop_graph(%s, true);", (graph,))
+    for schema in (STAGING_SCHEMA, OLD_SCHEMA):
+        cursor.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE;")
+    cursor.execute(f"CREATE SCHEMA {STAGING_SCHEMA};")
+    cursor.execute("SELECT create_graph(%s);", (STAGING_GRAPH,))
+    prepare_age_session(cursor, STAGING_SCHEMA)
+
+def count_graph_entities(label, edge=False, cursor=None):
+    """Count the vertices or edges of a label in the import graph; 0 when the label does not exist."""
+    cursor = cursor or cur
+    pattern = f"()-[x:{label}]->()" if edge else f"(x:{label})"
+    cursor.execute(f"SELECT * FROM cypher('{GRAPH_NAME}', $$ MATCH {pattern} RETURN count(x) $$) AS (c agtype);")
+    row = cursor.fetchone()
+    return int(str(row[0])) if row else 0
+
+def check_staging_counts(loaded, cursor=None):
+    """Compare the rows loaded per label with the vertices and edges in the staging graph.
+
+    Returns (label, loaded, found) for every label that does not match.
+    """
+    mismatches = []
+    for label, rows in sorted(loaded.items()):
+        found = count_graph_entities(label, edge=label in INTERMEDIATE_TABLES, cursor=cursor)
+        if found != rows:
+            mismatches.append((label, rows, found))
+    return mismatches
+
+def swap_staging_into_place(table_schema, replace_live_graph, cursor=None):
+    """Swap the staging graph and tables with the live ones; the caller commits.
+
+    The live tables move to OLD_SCHEMA and the live graph is renamed to
+    OLD_GRAPH, so readers see either the complete old or the complete new
+    generation. Only catalog entries change, so the locks are held briefly.
+    """
+    cursor = cursor or cur
+    cursor.execute("SELECT tablename FROM pg_tables WHERE schemaname = %s;", (STAGING_SCHEMA,))
+    tables = [row[0] for row in cursor.fetchall()]
+    cursor.execute("SELECT tablename FROM pg_tables WHERE schemaname = %s AND tablename = ANY(%s);",
+                   (table_schema, tables))
+    live_tables = [row[0] for row in cursor.fetchall()]
+
+    cursor.execute(f"CREATE SCHEMA {OLD_SCHEMA};")
+    for table_name in live_tables:
+        cursor.execute(f'ALTER TABLE "{table_schema}"."{table_name}" SET SCHEMA {OLD_SCHEMA};')
+    for table_name in tables:
+        cursor.execute(f'ALTER TABLE {STAGING_SCHEMA}."{table_name}" SET SCHEMA "{table_schema}";')
+    if replace_live_graph:
+        cursor.execute("SELECT alter_graph(%s, 'RENAME', %s);", (LIVE_GRAPH, OLD_GRAPH))
+    cursor.execute("SELECT alter_graph(%s, 'RENAME', %s);", (STAGING_GRAPH, LIVE_GRAPH))
+    return len(tables)
+
+def drop_old_generation():
+    """Drop the previous graph and tables on a connection of their own."""
+    try:
+        old_conn = psycopg2.connect(**postgres_connect_kwargs)
+        try:
+            with old_conn.cursor() as old_cur:
+                prepare_age_session(old_cur, schema=None)
+                if age_graph_exists(OLD_GRAPH, old_cur):
+                    old_cur.execute("SELECT drop_graph(%s, true);", (OLD_GRAPH,))
+                old_cur.execute(f"DROP SCHEMA IF EXISTS {OLD_SCHEMA} CASCADE;")
+            old_conn.commit()
+        finally:
+            old_conn.close()
+        print(f"✓ Dropped the previous generation ('{OLD_GRAPH}', schema {OLD_SCHEMA})")
+    except Exception as e:
+        print(f"⚠ WARNING: Could not drop the previous generation, the next --blue-green run retries: {e}")
+
+
+# === Importer ===
+def configure(options, csv_dir=None):
+    """Apply the options of a run to the module: graph and schema names, compiled statements and log level."""
+    global args, GRAPH_NAME, TABLE_SCHEMA, EDGE_STATEMENTS, CSV_DIR
+    args = options
+    GRAPH_NAME = STAGING_GRAPH if args.blue_green else LIVE_GRAPH
+    TABLE_SCHEMA = STAGING_SCHEMA if args.blue_green else None
+    EDGE_STATEMENTS = {name: compile_edge_statements(name) for name in RELATIONSHIPS}
+    if csv_dir:
+        CSV_DIR = csv_dir
+    log.setLevel(args.log_level)
+
+
+class CsvImporter:
+    """Import the CSV files of CSV_DIR into PostgreSQL, AGE and Neo4j.
+
+    Nothing is opened until a phase needs the databases. Pass a psycopg2
+    connection pool and a Neo4j driver to run on connections owned by the
+    caller; they are returned to the pool but never closed. run() runs every
+    phase; the phase methods can also be called in order one by one. The
+    module functions share one connection, so only one importer runs at a time.
+    """
+
+    def __init__(self, options=None, pool=None, neo4j=None, csv_dir=None):
+        self.options = options if isinstance(options, argparse.Namespace) else parse_args(options or [])
+        self.pool = pool
+        self.neo4j = neo4j
+        self.csv_dir = csv_dir
+        self.connected = False
+        self.neo4j_used = False
+        self.cleanup = None
+        self.resume_progress = {}
+        # Rows loaded per label, checked against the staging graph before a blue/green swap
+        self.loaded_rows = {}
+        # Listed by the first phase and hashed by prepare()
+        self.csv_files = self.node_files = self.edge_files = self.csv_hashes = None
+
+    def apply_options(self):
+        """Apply the options of this importer to the module and list its files on first use.
+
+        Called by run() and every phase, so creating an importer changes no
+        module state and reads no files.
+        """
+        configure(self.options, self.csv_dir)
+        if self.csv_files is None:
+            self.list_files()
+
+    def list_files(self):
+        """List the node and relationship files of the CSV directory."""
+        csv_dir = self.csv_dir or CSV_DIR
+        self.csv_files = [f for f in os.listdir(csv_dir) if f.endswith(".csv")
+                          and os.path.splitext(f)[0] in MAIN_TABLES + INTERMEDIATE_TABLES]
+        self.node_files = [f for f in self.csv_files if os.path.splitext(f)[0] in MAIN_TABLES]
+        self.edge_files = [f for f in self.csv_files if os.path.splitext(f)[0] in INTERMEDIATE_TABLES]
+
+    def hash_files(self):
+        """Hash the listed files, which checkpoints and incremental imports compare with earlier runs."""
+        self.csv_hashes = {f: file_hash(os.path.join(CSV_DIR, f)) for f in self.csv_files}
+
+    def connect(self):
+        """Open the PostgreSQL and Neo4j connections unless they are open already."""
+        global conn, cur, graph_exists, live_schema, neo4j_driver, neo4j_available
+        if self.connected:
+            return
+        neo4j_driver = self.neo4j or open_neo4j_driver()
+        neo4j_available = neo4j_driver is not None
+        self.neo4j_used = neo4j_available
+        conn = self.pool.getconn() if self.pool else psycopg2.connect(**postgres_connect_kwargs)
+        cur = conn.cursor(cursor_factory=CountingCursor)
+
+        # === Enable AGE and check if graph exists ===
+        prepare_age_session(cur)
+        graph_exists = age_graph_exists(LIVE_GRAPH)
+        # Schema of the live tables, which a blue/green swap moves the staging tables into
+        cur.execute("SELECT current_schema();")
+        row = cur.fetchone()
+        live_schema = row[0] if row else None
+        if TABLE_SCHEMA:
+            prepare_age_session(cur, TABLE_SCHEMA)
+        self.connected = True
+
+    def close(self):
+        """Close the connections this importer opened and give back pooled ones."""
+        global conn, cur, neo4j_driver, neo4j_available
+        if not self.connected:
+            return
+        cur.close()
+        if self.pool:
+            self.pool.putconn(conn)
+        else:
+            conn.close()
+        if neo4j_driver and not self.neo4j:
+            neo4j_driver.close()
+        conn = cur = neo4j_driver = None
+        neo4j_available = False
+        self.connected = False
+
+    def run(self):
+        """Run every phase and return the exit status of the import."""
+        self.apply_options()
+        metrics.update(started_at=datetime.now(timezone.utc).isoformat(timespec='seconds'), phases={}, tables={})
+        try:
+            self.parse()
+            violations = self.validate()
+            if args.validate_only:
+                return 1 if violations else 0
+            if any(v.severity == 'error' for v in violations):
+                print("✗ Import stopped: fix the CSV validation errors above")
+                write_metrics_report(status='failed')
+                return 1
+
+            self.prepare()
+            self.load_nodes()
+            self.create_indexes()
+            self.load_edges()
+            self.record_manifest()
+            if args.blue_green and not self.swap():
+                return 1
+        except BaseException:
+            # A failed run is the one whose report is needed most
+            print("\nImport phases:")
+            write_metrics_report(status='failed')
+            raise
+        finally:
+            self.close()
+
+        print("\nImport phases:")
+        write_metrics_report()
+        if self.cleanup:
+            self.cleanup.join()
+
+        if self.neo4j_used:
+            print("\n[OK] Imported into AGE + Neo4j successfully!")
+        else:
+            print("\n[OK] Imported into AGE successfully! (Neo4j was not available)")
+        return 0
+
+    def parse(self):
+        """Parse every CSV file up front with --parse-workers processes; streamed files are parsed on use."""
+        self.apply_options()
+        if args.parse_workers < 2 or args.chunk_size:
+            return
+        csv_paths = [os.path.join(CSV_DIR, f) for f in sorted(self.csv_files)]
+        with measure_phase('parse'):
+            parse_csv_files(csv_paths, args.parse_workers)
+        print(f"✓ Parsed {len(csv_paths)} CSV files with {args.parse_workers} processes")
+
+    def validate(self):
+        """Check the CSV files before anything in the databases is changed; returns the violations."""
+        self.apply_options()
+        with measure_phase('validate'):
+            violations = validate_csv_files(chunk_size=args.chunk_size)
+        print_validation_report(violations)
+        return violations
+
+    def prepare(self):
+        """Work out what to load and clear it: resume, full, blue/green or incremental import."""
+        self.apply_options()
+        self.hash_files()
+        self.connect()
+        with measure_phase('prepare'):
+            # Continue an interrupted run from its checkpoints
+            resume_progress = load_resume_progress(self.csv_hashes) if args.resume else None
+            if args.resume and resume_progress is None:
+                print("No checkpoints to resume from, running a full import")
+            if resume_progress is None:
+                # A new run starts its own reject file before deltas can reject rows;
+                # a resumed run keeps appending to the rejects of the run it continues
+                reset_rejects()
+
+            # Decide between a full and an incremental import
+            plan = None
+            if resume_progress is None and (args.incremental or args.delta):
+                manifest = load_manifest()
+                plan = plan_incremental_import(self.csv_hashes, manifest, neo4j_available) if graph_exists else None
+                if plan is None:
+                    print("No usable import manifest found, running a full import")
+
+            if resume_progress is not None:
+                self.node_files = [f for f in self.node_files if not file_complete(resume_progress[f])]
+                self.edge_files = [f for f in self.edge_files if not file_complete(resume_progress[f])]
+                print(f"Resuming the interrupted import: {len(self.node_files)} node files and "
+                      f"{len(self.edge_files)} edge files are not complete")
+            elif plan is None:
+                planned_files = set(self.node_files + self.edge_files)
+                # === Clear Neo4j ===
+                if neo4j_available:
+                    print("Clearing Neo4j database...")
+                    reset_neo4j(self.csv_hashes, planned_files)
+                    print("Neo4j database cleared successfully!")
+
+                # The graph and its checkpoints are replaced in one transaction
+                if args.blue_green:
+                    # === Load next to the live graph, which readers keep using until the swap ===
+                    prepare_staging()
+                else:
+                    # === Clear AGE graph if it exists ===
+                    if graph_exists:
+                        print(f"Clearing AGE graph '{LIVE_GRAPH}'...")
+                        cur.execute("SELECT drop_graph(%s, true);", (LIVE_GRAPH,))
+
+                    # === Create fresh graph ===
+                    cur.execute("SELECT create_graph(%s);", (LIVE_GRAPH,))
+                reset_checkpoints(self.csv_hashes, planned_files)
+                conn.commit()
+                if args.blue_green:
+                    print(f"AGE staging graph '{STAGING_GRAPH}' and schema {STAGING_SCHEMA} created successfully!")
+                else:
+                    print(f"AGE graph '{LIVE_GRAPH}' created successfully!")
+            else:
+                node_tables, edge_tables, removed_tables = plan
+
+                # Apply changed files as row-level changes, keeping full reloads for files that cannot be diffed
+                if args.delta:
+                    changed_tables = {os.path.splitext(f)[0] for f, h in self.csv_hashes.items()
+                                      if manifest.get(f, {}).get('hash') != h}
+                    node_tables, edge_tables = apply_deltas(node_tables, edge_tables, changed_tables,
+                                                            load_manifest_contents())
+
+                print(f"Incremental import: {len(node_tables)} node files and {len(edge_tables)} edge files to reload")
+                if not (node_tables or edge_tables or removed_tables):
+                    print("All CSV files are unchanged since the last import")
+                if removed_tables:
+                    print(f"Removing data of deleted files: {', '.join(removed_tables)}")
+
+                self.node_files = [f for f in self.node_files if os.path.splitext(f)[0] in node_tables]
+                self.edge_files = [f for f in self.edge_files if os.path.splitext(f)[0] in edge_tables]
+                planned_files = set(self.node_files + self.edge_files)
+
+                # Remove the old data of everything that is reloaded or no longer exists,
+                # in the transaction that starts the checkpoints of the reloaded files
+                cleared_labels = [t for t in node_tables + removed_tables if t in MAIN_TABLES]
+                cleared_types = [t for t in edge_tables + removed_tables if t in INTERMEDIATE_TABLES]
+                clear_graph_data(cleared_labels, cleared_types)
+                for table_name in removed_tables:
+                    cur.execute(f"DROP TABLE IF EXISTS {table_name} CASCADE;")
+                reset_checkpoints(self.csv_hashes, planned_files)
+                conn.commit()
+                if neo4j_available:
+                    reset_neo4j(self.csv_hashes, planned_files, cleared_labels, cleared_types)
+
+            if resume_progress is None:
+                resume_progress = {}
+            self.resume_progress = resume_progress
+            self.loaded_rows = {os.path.splitext(f)[0]: p.age.rows_loaded for f, p in resume_progress.items()
+                                if os.path.splitext(f)[0] in MAIN_TABLES + INTERMEDIATE_TABLES}
+
+    def load_nodes(self):
+        """PHASE 1: load every node file."""
+        self.apply_options()
+        self.connect()
+        print("\n" + "="*60)
+        print("PHASE 1: Creating all nodes")
+        print("="*60)
+        neo4j_session = neo4j_driver.session() if neo4j_available else None
+        try:
+            with measure_phase('nodes'):
+                for file in sorted(self.node_files):
+                    self.loaded_rows[os.path.splitext(file)[0]] = load_node_file(
+                        file, neo4j_session, self.resume_progress.get(file))
+
+                # Commit nodes before creating edges
+                conn.commit()
+        finally:
+            if neo4j_session:
+                neo4j_session.close()
+        print("\n✓ All nodes committed to database")
+
+    def create_indexes(self):
+        """Index the _id of every label in AGE and Neo4j before the edges look nodes up."""
+        self.apply_options()
+        self.connect()
+        with measure_phase('indexes'):
+            if neo4j_available:
+                with neo4j_driver.session() as neo4j_session:
+                    # Back edge MATCHes with _id constraints so they are index lookups
+                    create_neo4j_id_constraints(neo4j_session, MAIN_TABLES)
+                print("✓ Neo4j _id constraints are online")
+
+            # Index vertex _id properties so edge MATCHes are index lookups instead of label scans
+            # A resumed run also indexes the labels loaded before the interruption
+            node_labels = sorted({os.path.splitext(f)[0] for f in self.node_files + list(self.resume_progress)}
+                                 & set(MAIN_TABLES))
+            create_age_id_indexes(node_labels)
+            unindexed_labels = [label for label in node_labels if not age_id_lookup_uses_index(label)]
+            if unindexed_labels:
+                print(f"⚠ WARNING: AGE _id lookups do not use an index for: {', '.join(unindexed_labels)}")
+            else:
+                print("✓ AGE _id lookups use indexes for all node labels")
+            conn.commit()
+
+    def load_edges(self):
+        """PHASE 2: load every relationship file, over a connection pool with --workers."""
+        self.apply_options()
+        self.connect()
+        print("\n" + "="*60)
+        print("PHASE 2: Creating all edges")
+        print("="*60)
+        edge_files = sorted(self.edge_files)
+        workers = min(args.workers, len(edge_files))
+        if self.pool is not None and workers > 1:
+            # This run already holds one connection of the caller's pool; asking for
+            # more than it has left raises PoolError instead of waiting
+            available = getattr(self.pool, 'maxconn', workers + 1) - 1
+            if available < workers:
+                print(f"⚠ WARNING: The connection pool has {available} connections left for edge workers, "
+                      f"using {max(available, 1)} instead of {workers}")
+                workers = available
+        with measure_phase('edges'):
+            if workers > 1:
+                # Create the edge labels up front so workers do not race to create them
+                for file in edge_files:
+                    ensure_age_edge_label(os.path.splitext(file)[0])
+                conn.commit()
+
+                pool = self.pool or psycopg2.pool.ThreadedConnectionPool(1, workers, **postgres_connect_kwargs)
+                print(f"Loading {len(edge_files)} edge files with {workers} workers")
+                try:
+                    with ThreadPoolExecutor(max_workers=workers) as executor:
+                        results = executor.map(lambda file: self.load_edge_file_in_worker(pool, file), edge_files)
+                        for file, (successful, _) in zip(edge_files, results):
+                            self.loaded_rows[os.path.splitext(file)[0]] = successful
+                finally:
+                    if pool is not self.pool:
+                        pool.closeall()
+            else:
+                neo4j_session = neo4j_driver.session() if neo4j_available else None
+                try:
+                    for file in edge_files:
+                        successful, _ = load_edge_file(file, cur, neo4j_session, self.resume_progress.get(file))
+                        self.loaded_rows[os.path.splitext(file)[0]] = successful
+                        # Commit after each edge file
+                        conn.commit()
+                finally:
+                    if neo4j_session:
+                        neo4j_session.close()
+
+    def load_edge_file_in_worker(self, pool, file):
+        """Load one edge file on a pooled connection and commit it."""
+        worker_conn = pool.getconn()
+        try:
+            with worker_conn.cursor(cursor_factory=CountingCursor) as worker_cur:
+                prepare_age_session(worker_cur, TABLE_SCHEMA)
+                if neo4j_available:
+                    with neo4j_driver.session() as worker_session:
+                        result = load_edge_file(file, worker_cur, worker_session, self.resume_progress.get(file))
+                else:
+                    result = load_edge_file(file, worker_cur, progress=self.resume_progress.get(file))
+            worker_conn.commit()
+            return result
+        except Exception:
+            worker_conn.rollback()
+            raise
+        finally:
+            pool.putconn(worker_conn)
+
+    def record_manifest(self):
+        """Record what was imported so the next incremental run can skip unchanged files."""
+        self.apply_options()
+        self.connect()
+        with measure_phase('manifest'):
+            manifest = load_manifest()
+            snapshots = None
+            if args.delta:
+                snapshots = {f: read_snapshot(os.path.join(CSV_DIR, f)) for f in self.csv_hashes}
+            save_manifest(self.csv_hashes, neo4j_available, [f for f in manifest if f not in self.csv_hashes], snapshots)
+            conn.commit()
+
+    def swap(self):
+        """Check the staging graph and swap it into place; returns False when the counts do not match."""
+        self.apply_options()
+        self.connect()
+        with measure_phase('swap'):
+            mismatches = check_staging_counts(self.loaded_rows)
+            for label, rows, found in mismatches:
+                print(f"✗ {label}: {rows} rows loaded but {found} found in '{STAGING_GRAPH}'")
+            if mismatches:
+                print(f"✗ Import stopped: '{LIVE_GRAPH}' was not replaced; "
+                      f"the staging graph is kept for inspection until the next run")
+                write_metrics_report(status='failed')
+                return False
+            swapped_tables = swap_staging_into_place(live_schema, graph_exists)
+            conn.commit()
+        print(f"✓ Swapped '{STAGING_GRAPH}' and {swapped_tables} tables into place as '{LIVE_GRAPH}'")
+        # Readers are already on the new generation; the old one is dropped in the background
+        self.cleanup = threading.Thread(target=drop_old_generation, name='drop-old-generation')
+        self.cleanup.start()
+        return True
+
 
-conn.commit()
+def main(argv=None):
+    """Command line entry point; returns the exit status."""
+    return CsvImporter(parse_args(argv)).run()
 
-cur.close()
-conn.close()
-if neo4j_driver:
-    neo4j_driver.close()
 
-if neo4j_available:
-    print("\n[OK] Imported into AGE + Neo4j successfully!")
-else:
-    print("\n[OK] Imported into AGE successfully! (Neo4j was not available)")
\ No newline at end of file
+if __name__ == '__main__':
+    sys.exit(main())
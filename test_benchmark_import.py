@@ -0,0 +1,74 @@
+import unittest
+import json
+import os
+import tempfile
+import shutil
+import pandas as pd
+import benchmark_import
+
+
+class TestSyntheticData(unittest.TestCase):
+    """Test the synthetic data set generator"""
+
+    def setUp(self):
+        self.template_dir = tempfile.mkdtemp()
+        self.out_dir = tempfile.mkdtemp()
+        files = {
+            'Exo.csv': "_id;exoName\n40;CarrySuit\n41;Paexo Shoulder\n",
+            'Dof.csv': "_id;dofName\n30;Flexie\n",
+            'ASSISTS_IN.csv': "exoId;dofId;aim;upperBoundMaxAngle\n40;30;Ja;180\n41;30;Nee;\n",
+        }
+        for name, content in files.items():
+            with open(os.path.join(self.template_dir, name), 'w', encoding='utf-8') as f:
+                f.write(content)
+
+    def tearDown(self):
+        shutil.rmtree(self.template_dir)
+        shutil.rmtree(self.out_dir)
+
+    def read(self, name):
+        return pd.read_csv(os.path.join(self.out_dir, name), sep=';')
+
+    def test_rows_scaled(self):
+        """Test that every file gets scale times its rows"""
+        node_counts, edge_counts = benchmark_import.generate_dataset(self.template_dir, self.out_dir, 5)
+
+        self.assertEqual(node_counts, {'Dof.csv': 5, 'Exo.csv': 10})
+        self.assertEqual(edge_counts, {'ASSISTS_IN.csv': 10})
+        self.assertEqual(self.read('ASSISTS_IN.csv')['aim'].tolist()[:2], ['Ja', 'Nee'])
+
+    def test_referentially_consistent(self):
+        """Test that ids are unique and every FK points at a generated node"""
+        benchmark_import.generate_dataset(self.template_dir, self.out_dir, 50)
+        exo, dof, edges = self.read('Exo.csv'), self.read('Dof.csv'), self.read('ASSISTS_IN.csv')
+
+        self.assertTrue(pd.concat([exo['_id'], dof['_id']]).is_unique)
+        self.assertTrue(edges['exoId'].isin(exo['_id']).all())
+        self.assertTrue(edges['dofId'].isin(dof['_id']).all())
+
+    def test_same_seed_same_data(self):
+        """Test that generation is deterministic for a seed"""
+        benchmark_import.generate_dataset(self.template_dir, self.out_dir, 3, seed=7)
+        first = self.read('ASSISTS_IN.csv')
+        benchmark_import.generate_dataset(self.template_dir, self.out_dir, 3, seed=7)
+
+        pd.testing.assert_frame_equal(first, self.read('ASSISTS_IN.csv'))
+
+
+class TestBenchmarkResults(unittest.TestCase):
+    """Test the machine-readable results file"""
+
+    def test_results_appended(self):
+        """Test that records of later runs are appended to the JSON list"""
+        path = os.path.join(tempfile.mkdtemp(), 'results.json')
+
+        benchmark_import.append_results(path, [{'scale': 1, 'total_s': 1.0}])
+        benchmark_import.append_results(path, [{'scale': 10, 'total_s': 4.2}])
+
+        with open(path, 'r', encoding='utf-8') as f:
+            self.assertEqual([r['scale'] for r in json.load(f)], [1, 10])
+        shutil.rmtree(os.path.dirname(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
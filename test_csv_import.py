@@ -1,11 +1,16 @@
 import unittest
+import gc
+import json
 import os
 import tempfile
 import shutil
+import threading
+import time
 from unittest.mock import patch, MagicMock, mock_open, call
 import psycopg2
 import pandas as pd
 from io import StringIO
+import weakref
 import import_csvs
 
 
@@ -340,6 +345,1393 @@ class TestCopyOperation(unittest.TestCase):
         mock_cursor.copy_expert.assert_called_once()
 
 
+class TestCopyDataframePostgres(unittest.TestCase):
+    """Test the COPY-based bulk loader for relational tables"""
+    
+    @patch('import_csvs.cur')
+    def test_copy_sends_csv_buffer(self, mock_cursor):
+        """Test that rows are streamed as CSV with NULLs for NaN and empty strings"""
+        captured = {}
+        mock_cursor.copy_expert.side_effect = lambda sql, buf: captured.update(sql=sql, data=buf.getvalue())
+        df = pd.DataFrame({
+            'exoId': [40, 41],
+            'aim': ['Ja', ''],
+            'maxAngle': [95.0, float('nan')],
+            'Unnamed: 3': [None, None]
+        })
+        
+        import_csvs.copy_dataframe_postgres('LIMITS_IN', df)
+        
+        self.assertEqual(
+            captured['sql'],
+            'COPY LIMITS_IN ("exoId", "aim", "maxAngle") FROM STDIN WITH (FORMAT CSV);'
+        )
+        self.assertEqual(captured['data'], '40,Ja,95.0\n41,,\n')
+    
+    @patch('import_csvs.cur')
+    def test_copy_skips_empty_frame(self, mock_cursor):
+        """Test that no COPY is issued for an empty DataFrame"""
+        import_csvs.copy_dataframe_postgres('Exo', pd.DataFrame(columns=['_id']))
+        
+        mock_cursor.copy_expert.assert_not_called()
+
+
+class TestBatchedAgeNodes(unittest.TestCase):
+    """Test batched vertex creation in AGE"""
+    
+    @patch('import_csvs.cur')
+    def test_one_query_per_batch(self, mock_cursor):
+        """Test that rows are grouped into multi-pattern CREATE statements"""
+        rows = [{'_id': i, 'exoName': f'Exo {i}'} for i in range(5)]
+        
+        import_csvs.insert_nodes_age('Exo', rows, batch_size=2)
+        
+        self.assertEqual(mock_cursor.execute.call_count, 3)
+        first_query = mock_cursor.execute.call_args_list[0][0][0]
+        self.assertIn("CREATE (:Exo {_id: 0, exoName: 'Exo 0'}), (:Exo {_id: 1, exoName: 'Exo 1'})", first_query)
+    
+    @patch('import_csvs.cur')
+    def test_batch_error_is_raised(self, mock_cursor):
+        """Test that a failing batch is reported and re-raised"""
+        mock_cursor.execute.side_effect = Exception("syntax error")
+        
+        with self.assertRaises(Exception):
+            import_csvs.insert_nodes_age('Exo', [{'_id': 1}], batch_size=10)
+
+
+class TestAgeIdIndexes(unittest.TestCase):
+    """Test _id expression indexes on AGE vertex labels"""
+    
+    @patch('import_csvs.cur')
+    def test_index_created_per_label(self, mock_cursor):
+        """Test that every label gets an _id expression index and is analyzed"""
+        import_csvs.create_age_id_indexes(['Dof', 'Exo'])
+        
+        queries = [c[0][0] for c in mock_cursor.execute.call_args_list]
+        self.assertTrue(any('"Exo_id_idx" ON exo_graph."Exo"' in q for q in queries))
+        self.assertTrue(any('"Dof_id_idx" ON exo_graph."Dof"' in q for q in queries))
+        self.assertIn('ANALYZE exo_graph."Exo";', queries)
+    
+    @patch('import_csvs.cur')
+    def test_missing_vertex_label_is_created(self, mock_cursor):
+        """Test that a label without vertices gets its table before it is indexed"""
+        mock_cursor.fetchone.return_value = (0,)
+        
+        import_csvs.create_age_id_indexes(['Exo'])
+        
+        queries = [c[0] for c in mock_cursor.execute.call_args_list]
+        create_at = queries.index(("SELECT create_vlabel(%s, %s);", ('exo_graph', 'Exo')))
+        index_at = next(i for i, q in enumerate(queries) if '"Exo_id_idx"' in q[0])
+        self.assertLess(create_at, index_at)
+    
+    @patch('import_csvs.cur')
+    def test_explain_detects_index_scan(self, mock_cursor):
+        """Test that an index scan in the EXPLAIN plan is detected"""
+        mock_cursor.fetchall.return_value = [('Bitmap Index Scan on "Exo_id_idx"',)]
+        self.assertTrue(import_csvs.age_id_lookup_uses_index('Exo'))
+        
+        mock_cursor.fetchall.return_value = [('Seq Scan on "Exo" n',)]
+        self.assertFalse(import_csvs.age_id_lookup_uses_index('Exo'))
+
+
+class TestServerSideAgeEdges(unittest.TestCase):
+    """Test set-based AGE edge creation from relationship tables"""
+    
+    def test_registry_covers_all_relationships(self):
+        """Test that every intermediate table has a relationship definition"""
+        self.assertEqual(set(import_csvs.RELATIONSHIPS), set(import_csvs.INTERMEDIATE_TABLES))
+    
+    @patch('import_csvs.cur')
+    def test_single_insert_select(self, mock_cursor):
+        """Test that edges are created with one join over the label tables"""
+        mock_cursor.fetchone.return_value = (1,)
+        mock_cursor.rowcount = 79
+        
+        created = import_csvs.create_edges_age_from_table('HAS_AIM', ['exoId', 'aimId', 'aimCategory'])
+        
+        self.assertEqual(created, 79)
+        query = mock_cursor.execute.call_args_list[-1][0][0]
+        self.assertIn('INSERT INTO exo_graph."HAS_AIM"', query)
+        self.assertIn('JOIN exo_graph."Exo" s', query)
+        self.assertIn('JOIN exo_graph."Aim" t', query)
+        self.assertIn("'aimCategory'::text, r.\"aimCategory\"", query)
+    
+    @patch('import_csvs.cur')
+    def test_missing_edge_label_is_created(self, mock_cursor):
+        """Test that the edge and vertex labels are created when they do not exist yet"""
+        mock_cursor.fetchone.return_value = (0,)
+        
+        import_csvs.create_edges_age_from_table('HAS_DOF', ['jointTId', 'dofId'])
+        
+        mock_cursor.execute.assert_any_call("SELECT create_elabel(%s, %s);", ('exo_graph', 'HAS_DOF'))
+        mock_cursor.execute.assert_any_call("SELECT create_vlabel(%s, %s);", ('exo_graph', 'JointT'))
+        mock_cursor.execute.assert_any_call("SELECT create_vlabel(%s, %s);", ('exo_graph', 'Dof'))
+
+
+class FakeNeo4jSession:
+    """Test double for a Neo4j session that records UNWIND batches"""
+    
+    def __init__(self, existing_ids=None):
+        self.existing_ids = existing_ids
+        self.batches = []
+        self.checkpoints = []
+    
+    def execute_write(self, work):
+        return work(self)
+    
+    def run(self, cypher, rows=None, **params):
+        if rows is None:
+            self.checkpoints.append(params)
+            return MagicMock()
+        self.batches.append((cypher, rows))
+        if self.existing_ids is None:
+            created = len(rows)
+        else:
+            created = sum(1 for row in rows if row.get('exoId') in self.existing_ids)
+        summary = MagicMock()
+        summary.counters.nodes_created = created
+        summary.counters.relationships_created = created
+        result = MagicMock()
+        result.consume.return_value = summary
+        return result
+
+
+class TestBatchedNeo4jWrites(unittest.TestCase):
+    """Test batched UNWIND writes to Neo4j"""
+    
+    def test_nodes_sent_in_batches(self):
+        """Test that nodes are sent as one UNWIND per batch with NaN as None"""
+        session = FakeNeo4jSession()
+        frame = pd.DataFrame({'_id': range(5), 'exoName': float('nan')})
+        rows = import_csvs.graph_records(frame, {'_id': 'INTEGER', 'exoName': 'TEXT'})
+        
+        created = import_csvs.insert_nodes_neo4j(session, 'Exo', rows, batch_size=2)
+        
+        self.assertEqual(created, 5)
+        self.assertEqual([len(batch) for _, batch in session.batches], [2, 2, 1])
+        self.assertIn('UNWIND $rows AS row CREATE (n:Exo)', session.batches[0][0])
+        self.assertIsNone(session.batches[0][1][0]['exoName'])
+    
+    def test_edges_counted_per_batch(self):
+        """Test that created relationships are counted per batch"""
+        session = FakeNeo4jSession(existing_ids={40, 41})
+        rows = [
+            {'exoId': 40, 'aimId': 190, 'aimCategory': 'HAS_AIM_hoofddoel'},
+            {'exoId': 41, 'aimId': 190, 'aimCategory': 'HAS_AIM_nevendoel'},
+            {'exoId': 99, 'aimId': 190, 'aimCategory': 'HAS_AIM_nevendoel'},
+        ]
+        
+        created = import_csvs.insert_edges_neo4j(session, 'HAS_AIM', rows, batch_size=2)
+        
+        self.assertEqual(created, 2)
+        self.assertEqual(len(session.batches), 2)
+        cypher, batch = session.batches[0]
+        self.assertIn('MATCH (s:Exo {_id: row.exoId}), (t:Aim {_id: row.aimId})', cypher)
+        self.assertIn('CREATE (s)-[:HAS_AIM {aimCategory: row.aimCategory}]->(t)', cypher)
+        self.assertEqual(batch[0], {'exoId': 40, 'aimId': 190, 'aimCategory': 'HAS_AIM_hoofddoel'})
+
+
+class TestNeo4jIdConstraints(unittest.TestCase):
+    """Test _id constraints in Neo4j before the edge phase"""
+    
+    def test_constraint_per_label_then_wait(self):
+        """Test that each label gets a constraint and the indexes are awaited"""
+        session = MagicMock()
+        
+        import_csvs.create_neo4j_id_constraints(session, ['Dof', 'Exo'])
+        
+        queries = [c[0][0] for c in session.run.call_args_list]
+        self.assertEqual(queries[0], "CREATE CONSTRAINT Dof_id_unique IF NOT EXISTS FOR (n:Dof) REQUIRE n._id IS UNIQUE")
+        self.assertEqual(queries[1], "CREATE CONSTRAINT Exo_id_unique IF NOT EXISTS FOR (n:Exo) REQUIRE n._id IS UNIQUE")
+        self.assertEqual(queries[-1], "CALL db.awaitIndexes(300)")
+    
+    def test_falls_back_to_index(self):
+        """Test that a plain index is created when the constraint fails"""
+        session = MagicMock()
+        session.run.side_effect = [Exception("duplicate _id"), MagicMock(), MagicMock()]
+        
+        import_csvs.create_neo4j_id_constraints(session, ['Exo'])
+        
+        session.run.assert_any_call("CREATE INDEX Exo_id_index IF NOT EXISTS FOR (n:Exo) ON (n._id)")
+
+
+class TestIncrementalImport(unittest.TestCase):
+    """Test the file selection of incremental imports"""
+    
+    def manifest(self, hashes, schema_version=None, neo4j_loaded=True):
+        schema_version = schema_version or import_csvs.SCHEMA_VERSION
+        return {f: {'hash': h, 'schema_version': schema_version, 'neo4j_loaded': neo4j_loaded}
+                for f, h in hashes.items()}
+    
+    def test_file_hash_changes_with_content(self):
+        """Test that the content hash follows the file content"""
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as f:
+            f.write('_id;exoName\n40;CarrySuit\n')
+        try:
+            first = import_csvs.file_hash(f.name)
+            with open(f.name, 'a') as f2:
+                f2.write('41;Paexo Shoulder\n')
+            self.assertNotEqual(first, import_csvs.file_hash(f.name))
+        finally:
+            os.remove(f.name)
+    
+    def test_unchanged_files_are_skipped(self):
+        """Test that nothing is reloaded when no hash changed"""
+        hashes = {'Exo.csv': 'a', 'HAS_AIM.csv': 'b'}
+        plan = import_csvs.plan_incremental_import(hashes, self.manifest(hashes), True)
+        self.assertEqual(plan, ([], [], []))
+    
+    def test_changed_node_file_reloads_dependent_edges(self):
+        """Test that edges attached to a changed label are reloaded too"""
+        old = {'Aim.csv': 'a', 'AimType.csv': 'b', 'HAS_AIMTYPE.csv': 'c', 'HAS_DOF.csv': 'd'}
+        new = dict(old, **{'AimType.csv': 'changed'})
+        
+        node_tables, edge_tables, removed = import_csvs.plan_incremental_import(new, self.manifest(old), True)
+        
+        self.assertEqual(node_tables, ['AimType'])
+        self.assertEqual(edge_tables, ['HAS_AIMTYPE'])
+        self.assertEqual(removed, [])
+    
+    def test_changed_edge_file_only(self):
+        """Test that a changed edge file is reloaded on its own"""
+        old = {'Exo.csv': 'a', 'HAS_AIM.csv': 'b'}
+        new = dict(old, **{'HAS_AIM.csv': 'changed'})
+        
+        plan = import_csvs.plan_incremental_import(new, self.manifest(old), True)
+        
+        self.assertEqual(plan, ([], ['HAS_AIM'], []))
+    
+    def test_full_import_needed(self):
+        """Test that a full import is requested without a usable manifest"""
+        hashes = {'Exo.csv': 'a'}
+        self.assertIsNone(import_csvs.plan_incremental_import(hashes, {}, True))
+        self.assertIsNone(import_csvs.plan_incremental_import(hashes, self.manifest(hashes, schema_version='0'), True))
+        self.assertIsNone(import_csvs.plan_incremental_import(hashes, self.manifest(hashes, neo4j_loaded=False), True))
+
+
+class TestDeltaImport(unittest.TestCase):
+    """Test row-level deltas between two versions of a CSV file"""
+    
+    def test_node_delta(self):
+        """Test that inserted, updated and deleted nodes are detected by _id"""
+        old = import_csvs.parse_csv_text("_id;exoName;exoMaterial\n40;CarrySuit;harde materialen\n41;Paexo;\n42;Old;x\n")
+        new = import_csvs.parse_csv_text("_id;exoName;exoMaterial\n40;CarrySuit;harde materialen\n41;Paexo Shoulder;\n43;New;x\n")
+        
+        inserted, updated, deleted = import_csvs.compute_node_delta(old, new)
+        
+        self.assertEqual(inserted, [{'_id': 43, 'exoName': 'New', 'exoMaterial': 'x'}])
+        self.assertEqual(updated, [{'_id': 41, 'exoName': 'Paexo Shoulder', 'exoMaterial': None}])
+        self.assertEqual(deleted, [42])
+    
+    def test_node_delta_needs_reload(self):
+        """Test that changed columns or duplicate ids fall back to a reload"""
+        old = import_csvs.parse_csv_text("_id;exoName\n40;CarrySuit\n")
+        self.assertIsNone(import_csvs.compute_node_delta(old, import_csvs.parse_csv_text("_id;name\n40;CarrySuit\n")))
+        self.assertIsNone(import_csvs.compute_node_delta(old, import_csvs.parse_csv_text("_id;exoName\n40;A\n40;B\n")))
+    
+    def test_edge_delta_grouped_by_fk_tuple(self):
+        """Test that FK tuples with changed rows are replaced as a group"""
+        old = import_csvs.parse_csv_text("exoId;dofId;direction\n40;22;-1\n40;22;1\n41;30;1\n42;30;1\n")
+        new = import_csvs.parse_csv_text("exoId;dofId;direction\n40;22;1\n40;22;-1\n41;30;-1\n43;30;1\n")
+        
+        changed_keys, rows = import_csvs.compute_edge_delta(old, new, ['exoId', 'dofId'])
+        
+        self.assertEqual(sorted(changed_keys), [(41, 30), (42, 30), (43, 30)])
+        self.assertEqual(rows, [{'exoId': 41, 'dofId': 30, 'direction': -1}, {'exoId': 43, 'dofId': 30, 'direction': 1}])
+
+
+@patch('import_csvs.neo4j_available', True)
+@patch('import_csvs.postgres_column_types', return_value={'_id': 'BIGINT', 'exoName': 'TEXT', 'active': 'BOOLEAN'})
+@patch('import_csvs.cur')
+class TestDeltaWrites(unittest.TestCase):
+    """Test writing row-level deltas to PostgreSQL, AGE and Neo4j"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.tx = MagicMock()
+        driver = MagicMock()
+        driver.session.return_value.__enter__.return_value.execute_write.side_effect = lambda work: work(self.tx)
+        for name, value in [('neo4j_driver', driver), ('CSV_DIR', self.test_dir),
+                            ('REJECT_FILE', os.path.join(self.test_dir, 'rejects.csv'))]:
+            patcher = patch(f'import_csvs.{name}', value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def queries(self, cursor):
+        return [c[0][0] for c in cursor.execute.call_args_list]
+
+    @patch('import_csvs.insert_nodes_age')
+    @patch('import_csvs.copy_dataframe_postgres')
+    def test_node_insert(self, copy, insert_age, cursor, column_types):
+        """Test that inserted nodes are copied, created in AGE and merged in Neo4j"""
+        import_csvs.apply_node_delta('Exo', [{'_id': 43, 'exoName': 'New', 'active': 'Ja'}], [], [])
+
+        self.assertEqual(copy.call_args[0][1].to_dict('records'), [{'_id': 43, 'exoName': 'New', 'active': True}])
+        insert_age.assert_called_once_with('Exo', [{'_id': 43, 'exoName': 'New', 'active': True}])
+        self.assertIn('MERGE (n:Exo {_id: row._id}) SET n = row', self.tx.run.call_args[0][0])
+        self.assertEqual(self.tx.run.call_args[1]['rows'], [{'_id': 43, 'exoName': 'New', 'active': True}])
+
+    @patch('import_csvs.insert_nodes_age')
+    @patch('import_csvs.copy_dataframe_postgres')
+    def test_node_update(self, copy, insert_age, cursor, column_types):
+        """Test that updated nodes are set everywhere and a value that does not fit is rejected"""
+        updated = [{'_id': 41, 'exoName': "Paexo's", 'active': 'Nee'}, {'_id': 44, 'exoName': 'X', 'active': 'maybe'}]
+
+        import_csvs.apply_node_delta('Exo', [], updated, [])
+
+        cursor.execute.assert_any_call('UPDATE Exo SET "exoName" = %s, "active" = %s WHERE "_id" = %s;',
+                                       ["Paexo's", False, 41])
+        age_sets = [q for q in self.queries(cursor) if 'SET n.' in q]
+        self.assertEqual(len(age_sets), 1)
+        self.assertIn("WHERE n._id = 41 SET n.exoName = 'Paexo\\'s', n.active = false", age_sets[0])
+        self.assertFalse([q for q in self.queries(cursor) if '44' in q])
+        self.assertEqual(self.tx.run.call_args[1]['rows'], [{'_id': 41, 'exoName': "Paexo's", 'active': False}])
+        rejects = pd.read_csv(import_csvs.REJECT_FILE, sep=';')
+        self.assertEqual(rejects['error'].tolist(), ["active 'maybe' is not BOOLEAN"])
+
+    @patch('import_csvs.copy_dataframe_postgres')
+    def test_node_delete(self, copy, cursor, column_types):
+        """Test that deleted nodes are removed from the table and detached in both graphs"""
+        import_csvs.apply_node_delta('Exo', [], [], [42])
+
+        cursor.execute.assert_any_call('DELETE FROM Exo WHERE "_id" = %s;', (42,))
+        self.assertTrue([q for q in self.queries(cursor) if 'WHERE n._id = 42 DETACH DELETE n' in q])
+        self.assertIn('MATCH (n:Exo {_id: id}) DETACH DELETE n', self.tx.run.call_args[0][0])
+        self.assertEqual(self.tx.run.call_args[1]['ids'], [42])
+
+    @patch('import_csvs.insert_edges_neo4j')
+    @patch('import_csvs.insert_edge_age')
+    @patch('import_csvs.copy_dataframe_postgres')
+    def test_edge_delta_replaces_pairs(self, copy, insert_age, insert_neo4j, cursor, column_types):
+        """Test that the edges of a changed FK pair are deleted and written again in every backend"""
+        column_types.return_value = {'exoId': 'BIGINT', 'aimId': 'BIGINT', 'aimCategory': 'TEXT'}
+        row = {'exoId': 40, 'aimId': 190, 'aimCategory': 'HAS_AIM_hoofddoel'}
+
+        import_csvs.apply_edge_delta('HAS_AIM', [(40.0, 190), (41, 191)], [row])
+
+        cursor.execute.assert_any_call('DELETE FROM HAS_AIM WHERE "exoId" = %s AND "aimId" = %s;', (41, 191))
+        self.assertEqual(len([q for q in self.queries(cursor) if 'DELETE r' in q]), 2)
+        self.assertEqual(copy.call_args[0][1].to_dict('records'), [row])
+        insert_age.assert_called_once_with('HAS_AIM', row)
+        self.assertEqual(self.tx.run.call_args[1]['keys'], [{'s': 40, 't': 190}, {'s': 41, 't': 191}])
+        self.assertEqual(insert_neo4j.call_args[0][1:], ('HAS_AIM', [row]))
+
+    @patch('import_csvs.apply_edge_delta')
+    @patch('import_csvs.apply_node_delta')
+    def test_deltas_routed(self, node_delta, edge_delta, cursor, column_types):
+        """Test that files with a snapshot are applied as deltas and the others reloaded"""
+        files = {'Exo.csv': "_id;exoName\n40;CarrySuit\n", 'Aim.csv': "_id;aimName\n190;Lift\n",
+                 'HAS_AIM.csv': "exoId;aimId;aimCategory\n40;190;HAS_AIM_hoofddoel\n",
+                 'HAS_DOF.csv': "jointTId;dofId\n1;2\n"}
+        for file, text in files.items():
+            with open(os.path.join(self.test_dir, file), 'w', encoding='utf-8') as f:
+                f.write(text)
+        previous = {'Exo.csv': "_id;exoName\n40;Old\n", 'HAS_AIM.csv': "exoId;aimId;aimCategory\n",
+                    'HAS_DOF.csv': "jointTId;dofId\n"}
+
+        result = import_csvs.apply_deltas(['Aim', 'Exo'], ['HAS_AIM', 'HAS_DOF'],
+                                          {'Aim', 'Exo', 'HAS_AIM', 'HAS_DOF'}, previous)
+
+        self.assertEqual(result, (['Aim'], ['HAS_AIM']))
+        node_delta.assert_called_once_with('Exo', [], [{'_id': 40, 'exoName': 'CarrySuit'}], [])
+        edge_delta.assert_called_once_with('HAS_DOF', [(1, 2)], [{'jointTId': 1, 'dofId': 2}])
+
+
+class TestEdgeFileLoading(unittest.TestCase):
+    """Test loading a single edge file on a given connection"""
+    
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        with open(os.path.join(self.test_dir, 'HAS_AIM.csv'), 'w', encoding='utf-8') as f:
+            f.write("exoId;aimId;aimCategory\n40;190;HAS_AIM_hoofddoel\n;191;HAS_AIM_nevendoel\n")
+    
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+    
+    @patch('import_csvs.cur')
+    def test_uses_given_cursor(self, global_cursor):
+        """Test that a worker's cursor is used instead of the global one"""
+        worker_cursor = MagicMock()
+        worker_cursor.fetchone.return_value = (1,)
+        
+        with patch('import_csvs.CSV_DIR', self.test_dir), patch('import_csvs.AGE_EDGE_MODE', 'row'):
+            result = import_csvs.load_edge_file('HAS_AIM.csv', worker_cursor)
+        
+        self.assertEqual(result, (1, 1))
+        worker_cursor.copy_expert.assert_called_once()
+        global_cursor.execute.assert_not_called()
+        global_cursor.copy_expert.assert_not_called()
+    
+    @patch('import_csvs.cur')
+    def test_server_mode_sends_no_rows(self, global_cursor):
+        """Test that server mode counts the rows without a statement per edge"""
+        worker_cursor = MagicMock()
+        worker_cursor.fetchone.return_value = (1,)
+        worker_cursor.rowcount = 1
+        
+        with patch('import_csvs.CSV_DIR', self.test_dir), patch('import_csvs.AGE_EDGE_MODE', 'server'):
+            result = import_csvs.load_edge_file('HAS_AIM.csv', worker_cursor)
+        
+        self.assertEqual(result, (1, 1))
+        queries = [c[0][0] for c in worker_cursor.execute.call_args_list]
+        self.assertFalse([q for q in queries if 'CREATE (s)-[' in q and '190' in q])
+    
+    @patch('import_csvs.cur')
+    def test_dangling_edges_not_counted(self, global_cursor):
+        """Test that an edge whose vertex is missing does not count as loaded in either mode"""
+        worker_cursor = MagicMock()
+        worker_cursor.fetchone.return_value = (0,)
+        worker_cursor.rowcount = 0
+        
+        with patch('import_csvs.CSV_DIR', self.test_dir):
+            with patch('import_csvs.AGE_EDGE_MODE', 'row'):
+                self.assertEqual(import_csvs.load_edge_file('HAS_AIM.csv', worker_cursor), (0, 2))
+            with patch('import_csvs.AGE_EDGE_MODE', 'server'):
+                self.assertEqual(import_csvs.load_edge_file('HAS_AIM.csv', worker_cursor)[0], 0)
+
+
+class TestCsvIngestion(unittest.TestCase):
+    """Test single-pass CSV parsing"""
+    
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.test_dir, 'Exo.csv')
+        with open(self.csv_path, 'w', encoding='utf-8') as f:
+            f.write("_id;exoName;\n40;CarrySuit;\n41;Paexo Shoulder;\n")
+    
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+    
+    def test_parsed_once_and_cached(self):
+        """Test that a file is parsed once and the frame is reused"""
+        with patch('import_csvs.parse_csv', wraps=import_csvs.parse_csv) as parse:
+            first = import_csvs.read_csv_file(self.csv_path)
+            second = import_csvs.read_csv_file(self.csv_path)
+        
+        parse.assert_called_once()
+        self.assertIs(first.frame, second.frame)
+        self.assertEqual(first.columns, ['_id', 'exoName'])
+        self.assertEqual(first.delimiter, ';')
+    
+    def test_streaming_in_chunks(self):
+        """Test that chunked reading yields bounded frames and bypasses the cache"""
+        import_csvs._parsed_csv_cache.pop(self.csv_path, None)
+        
+        chunks = list(import_csvs.iter_csv_frames(self.csv_path, chunk_size=1))
+        
+        self.assertEqual([len(chunk) for chunk in chunks], [1, 1])
+        self.assertEqual(chunks[1].index[0], 1)
+        self.assertEqual(chunks[1]['exoName'].iloc[0], 'Paexo Shoulder')
+        self.assertNotIn(self.csv_path, import_csvs._parsed_csv_cache)
+        self.assertEqual(import_csvs.read_csv_header(self.csv_path), (';', ['_id', 'exoName']))
+    
+    def test_comma_delimiter_detected(self):
+        """Test that comma separated files are detected"""
+        self.assertEqual(import_csvs.detect_delimiter('_id,exoName\n'), ',')
+        self.assertEqual(import_csvs.detect_delimiter('_id;exoName, en\n'), ';')
+    
+    def test_find_id_column(self):
+        """Test ID column detection on the parsed column list"""
+        self.assertEqual(import_csvs.find_id_column('Exo', ['exoName', '_id']), '_id')
+        self.assertIsNone(import_csvs.find_id_column('Exo', ['exoName']))
+
+
+class TestColumnTypes(unittest.TestCase):
+    """Test typed schema inference"""
+    
+    def test_infer_column_type(self):
+        """Test that integers, decimals, Ja/Nee flags and text are told apart"""
+        self.assertEqual(import_csvs.infer_column_type(pd.Series(['40', '41', None])), 'INTEGER')
+        self.assertEqual(import_csvs.infer_column_type(pd.Series([90.0, float('nan')])), 'INTEGER')
+        self.assertEqual(import_csvs.infer_column_type(pd.Series(['2.5', '3'])), 'NUMERIC')
+        self.assertEqual(import_csvs.infer_column_type(pd.Series(['Ja', 'nee', ''])), 'BOOLEAN')
+        self.assertEqual(import_csvs.infer_column_type(pd.Series(['90', 'door blokkage'])), 'TEXT')
+        self.assertEqual(import_csvs.infer_column_type(pd.Series([None, None])), 'TEXT')
+    
+    def test_override_wins_over_inference(self):
+        """Test that the override file replaces the inferred type"""
+        sample = pd.DataFrame({'exoId': ['40'], 'exoPropertyValue': ['3']})
+        with patch.dict('import_csvs.COLUMN_TYPE_OVERRIDES', {'HAS_PROPERTY': {'exoPropertyValue': 'TEXT'}}):
+            types = import_csvs.resolve_column_types('HAS_PROPERTY', sample, ['exoId', 'exoPropertyValue'])
+        
+        self.assertEqual(types, {'exoId': 'INTEGER', 'exoPropertyValue': 'TEXT'})
+    
+    def test_apply_column_types(self):
+        """Test that values are converted and rows with unparseable ones are reported, not nulled"""
+        df = pd.DataFrame({'aim': ['Ja', 'Nee', 'Ja'], 'minAngle': ['10', 'x', None], 'name': ['a', 'b', 'c']})
+        
+        data, misfits = import_csvs.apply_column_types('LIMITS_IN', df, {'aim': 'BOOLEAN', 'minAngle': 'INTEGER',
+                                                                          'name': 'TEXT'})
+        
+        self.assertEqual(data['aim'].tolist(), [True, False, True])
+        self.assertEqual(data['name'].tolist(), ['a', 'b', 'c'])
+        self.assertEqual(misfits, [(1, "minAngle 'x' is not INTEGER")])
+    
+    def test_types_inferred_from_whole_frame(self):
+        """Test that a value after the inference sample still decides the column type"""
+        frame = pd.DataFrame({'maxAngle': ['90'] * 5 + ['door blokkage']})
+        with patch('import_csvs.TYPE_INFERENCE_SAMPLE', 5):
+            types = import_csvs.resolve_column_types('Exo', frame, ['maxAngle'])
+        
+        self.assertEqual(types, {'maxAngle': 'TEXT'})
+    
+    @patch('import_csvs.write_rejects')
+    @patch('import_csvs.write_isolated', return_value=[(0, 'duplicate key')])
+    def test_misfit_rows_rejected_with_copy_rejects(self, write_isolated, write_rejects):
+        """Test that rows which do not fit are left out of the COPY and reported with its rejects"""
+        typed = pd.DataFrame({'minAngle': [10, None, 30]})
+        
+        rejected = import_csvs.copy_typed_rows(MagicMock(), 'LIMITS_IN', typed, [(1, "minAngle 'x' is not INTEGER")])
+        
+        self.assertEqual(write_isolated.call_args[0][1], 2)
+        self.assertEqual(rejected, [(0, 'duplicate key'), (1, "minAngle 'x' is not INTEGER")])
+    
+    @patch('import_csvs.cur')
+    def test_typed_table_with_primary_key(self, mock_cur):
+        """Test that node tables get typed columns and a primary key on _id"""
+        import_csvs.create_table_from_csv('Exo', ['_id', 'exoName'], column_types={'_id': 'INTEGER'})
+        
+        create_sql = mock_cur.execute.call_args_list[-1][0][0]
+        self.assertIn('"_id" INTEGER', create_sql)
+        self.assertIn('"exoName" TEXT', create_sql)
+        self.assertIn('PRIMARY KEY ("_id")', create_sql)
+    
+    @patch('import_csvs.cur')
+    def test_existing_column_types_in_current_schema(self, mock_cur):
+        """Test that the types of an existing table are read from the schema the tables are created in"""
+        mock_cur.fetchall.return_value = [('aim', 'boolean'), ('minAngle', 'integer')]
+        
+        types = import_csvs.postgres_column_types('LIMITS_IN')
+        
+        sql, params = mock_cur.execute.call_args[0]
+        self.assertIn('table_schema = current_schema()', sql)
+        self.assertNotIn("'public'", sql)
+        self.assertEqual(params, ('limits_in',))
+        self.assertEqual(types, {'aim': 'BOOLEAN', 'minAngle': 'INTEGER'})
+    
+    @patch('import_csvs.cur')
+    def test_foreign_key_indexes(self, mock_cur):
+        """Test that both FK columns of a relationship table are indexed"""
+        import_csvs.create_foreign_key_indexes('HAS_DOF', ['jointTId', 'dofId'])
+        
+        statements = [c[0][0] for c in mock_cur.execute.call_args_list]
+        self.assertTrue(any('"HAS_DOF_jointTId_idx"' in sql for sql in statements))
+        self.assertTrue(any('"HAS_DOF_dofId_idx"' in sql for sql in statements))
+
+
+class TestTypedGraphProperties(unittest.TestCase):
+    """Test typed edge properties in AGE and Neo4j"""
+    
+    def test_every_property_has_a_type(self):
+        """Test that the type map covers the properties of every relationship"""
+        for table_name, relationship in import_csvs.RELATIONSHIPS.items():
+            types = import_csvs.RELATIONSHIP_PROPERTY_TYPES.get(table_name, {})
+            self.assertEqual(set(types), set(relationship["properties"]), table_name)
+    
+    def test_to_graph_value(self):
+        """Test that Ja/Nee become booleans and angles become numbers"""
+        self.assertIs(import_csvs.to_graph_value('Ja', 'BOOLEAN'), True)
+        self.assertIs(import_csvs.to_graph_value('nee', 'BOOLEAN'), False)
+        self.assertEqual(import_csvs.to_graph_value('150', 'NUMERIC'), 150)
+        self.assertIsInstance(import_csvs.to_graph_value(150.0, 'NUMERIC'), int)
+        self.assertEqual(import_csvs.to_graph_value('12.5', 'NUMERIC'), 12.5)
+        self.assertEqual(import_csvs.to_graph_value(-1.0, 'INTEGER'), -1)
+        self.assertIsNone(import_csvs.to_graph_value(float('nan'), 'NUMERIC'))
+        self.assertIsNone(import_csvs.to_graph_value('door blokkage', 'NUMERIC'))
+    
+    @patch('import_csvs.cur')
+    def test_age_edge_properties_typed(self, mock_cursor):
+        """Test that AGE edges get boolean and numeric literals"""
+        mock_cursor.fetchone.return_value = (1,)
+        row = {'exoId': 40.0, 'dofId': 7, 'aim': 'Ja', 'rangeAdjustable': 'Nee', 'lowerBoundMinAngle': '0',
+               'lowerBoundMaxAngle': 10.0, 'upperBoundMinAngle': 140, 'upperBoundMaxAngle': '150',
+               'sizeAdjustable': 'Ja', 'direction': 1}
+        statements = import_csvs.EDGE_STATEMENTS['ASSISTS_IN']
+        row = import_csvs.graph_records(pd.DataFrame([row]), statements.value_types, statements.keys)[0]
+        
+        import_csvs.insert_edge_age('ASSISTS_IN', row)
+        
+        query = mock_cursor.execute.call_args[0][0]
+        self.assertIn('s._id = 40 AND t._id = 7', query)
+        self.assertIn('aim: true, rangeAdjustable: false', query)
+        self.assertIn('upperBoundMaxAngle: 150,', query)
+    
+    def test_neo4j_edge_properties_typed(self):
+        """Test that Neo4j edge batches carry booleans and numbers"""
+        session = FakeNeo4jSession()
+        rows = [{'exoId': 40, 'dofId': 7.0, 'aim': 'Nee', 'maxAngle': '95', 'minAngle': -15.0,
+                 'adjustable': 'Ja', 'direction': -1.0}]
+        statements = import_csvs.EDGE_STATEMENTS['LIMITS_IN']
+        rows = import_csvs.graph_records(pd.DataFrame(rows), statements.value_types, statements.keys)
+        
+        import_csvs.insert_edges_neo4j(session, 'LIMITS_IN', rows)
+        
+        self.assertEqual(session.batches[0][1][0], {'exoId': 40, 'dofId': 7, 'aim': False, 'maxAngle': 95,
+                                                    'minAngle': -15, 'adjustable': True, 'direction': -1})
+    
+    @patch('import_csvs.cur')
+    def test_server_side_properties_cast(self, mock_cursor):
+        """Test that server-side edges cast typed columns"""
+        mock_cursor.fetchone.return_value = (1,)
+        
+        import_csvs.create_edges_age_from_table('LIMITS_IN', ['exoId', 'dofId', 'aim', 'maxAngle'])
+        
+        query = mock_cursor.execute.call_args_list[-1][0][0]
+        self.assertIn("'aim'::text, r.\"aim\"::boolean", query)
+        self.assertIn('r."maxAngle"::bigint::agtype', query)
+        self.assertIn("'minAngle'::text, NULL::text", query)
+
+
+class TestAngleRanges(unittest.TestCase):
+    """Test the angle range columns and query API"""
+    
+    @patch('import_csvs.cur')
+    def test_generated_range_column(self, mock_cur):
+        """Test that angle tables get a generated numrange column"""
+        import_csvs.create_table_from_csv('LIMITS_IN', ['exoId', 'dofId', 'minAngle', 'maxAngle'],
+                                          column_types={'minAngle': 'NUMERIC', 'maxAngle': 'NUMERIC'})
+        
+        create_sql = mock_cur.execute.call_args_list[-1][0][0]
+        self.assertIn('angle_range numrange GENERATED ALWAYS AS', create_sql)
+        self.assertIn('LEAST("minAngle"::numeric, "maxAngle"::numeric)', create_sql)
+    
+    @patch('import_csvs.cur')
+    def test_no_range_without_bounds(self, mock_cur):
+        """Test that tables without both bound columns get no range column"""
+        import_csvs.create_table_from_csv('LIMITS_IN', ['exoId', 'dofId', 'minAngle'])
+        import_csvs.create_table_from_csv('HAS_DOF', ['jointTId', 'dofId'])
+        
+        for c in mock_cur.execute.call_args_list:
+            self.assertNotIn('angle_range', c[0][0])
+    
+    @patch('import_csvs.cur')
+    def test_gist_index(self, mock_cur):
+        """Test that the range column is indexed with GiST"""
+        import_csvs.create_foreign_key_indexes('ASSISTS_IN', ['exoId', 'dofId', 'lowerBoundMinAngle', 'upperBoundMaxAngle'])
+        
+        statements = [c[0][0] for c in mock_cur.execute.call_args_list]
+        self.assertIn('CREATE INDEX IF NOT EXISTS "ASSISTS_IN_angle_range_idx" ON ASSISTS_IN USING gist (angle_range);',
+                      statements)
+    
+    @patch('import_csvs.cur')
+    def test_find_exos_covering(self, mock_cur):
+        """Test the containment query and its parameters"""
+        mock_cur.fetchall.return_value = [(40,), (41,)]
+        
+        exos = import_csvs.find_exos_covering(30, 120, 30)
+        
+        self.assertEqual(exos, [40, 41])
+        query, params = mock_cur.execute.call_args[0]
+        self.assertIn('FROM ASSISTS_IN', query)
+        self.assertIn("angle_range @> numrange(%s, %s, '[]')", query)
+        self.assertEqual(params, (30, 30, 120))
+    
+    def test_find_exos_covering_rejects_other_tables(self):
+        """Test that relationships without angles are rejected"""
+        with self.assertRaises(ValueError):
+            import_csvs.find_exos_covering(30, 0, 90, relationship='HAS_DOF')
+
+
+class TestEdgeStatements(unittest.TestCase):
+    """Test the compiled relationship statements"""
+    
+    def test_compiled_for_every_relationship(self):
+        """Test that every intermediate table has compiled statements"""
+        self.assertEqual(set(import_csvs.EDGE_STATEMENTS), set(import_csvs.INTERMEDIATE_TABLES))
+    
+    def test_statements_follow_registry(self):
+        """Test that the statements use the labels, FKs and properties of the registry"""
+        statements = import_csvs.EDGE_STATEMENTS['HAS_AIM']
+        
+        self.assertEqual(statements.keys, ['exoId', 'aimId', 'aimCategory'])
+        self.assertIn('MATCH (s:Exo), (t:Aim) WHERE s._id = %(exoId)s AND t._id = %(aimId)s', statements.age_row)
+        self.assertIn('CREATE (s)-[:HAS_AIM {aimCategory: %(aimCategory)s}]->(t)', statements.age_row)
+        self.assertIn('MATCH (s:Exo {_id: row.exoId}), (t:Aim {_id: row.aimId})', statements.neo4j_batch)
+        self.assertIn('CREATE (s)-[:HAS_AIM {aimCategory: row.aimCategory}]->(t)', statements.neo4j_batch)
+    
+    @patch('import_csvs.cur')
+    def test_edge_without_properties(self, mock_cursor):
+        """Test that edges without properties get no property map"""
+        mock_cursor.fetchone.return_value = (0,)
+        created = import_csvs.insert_edge_age('HAS_DOF', {'jointTId': 1, 'dofId': 2})
+        
+        query = mock_cursor.execute.call_args[0][0]
+        self.assertIn('WHERE s._id = 1 AND t._id = 2 CREATE (s)-[:HAS_DOF]->(t) RETURN count(*)', query)
+        self.assertEqual(created, 0)
+    
+    @patch('import_csvs.cur')
+    def test_unknown_table_is_ignored(self, mock_cursor):
+        """Test that tables without a relationship entry create nothing"""
+        import_csvs.insert_edge_age('UNKNOWN', {'a': 1})
+        
+        mock_cursor.execute.assert_not_called()
+
+
+class TestPreparedAgeStatements(unittest.TestCase):
+    """Test the prepared statement path for AGE writes"""
+    
+    def setUp(self):
+        self.cursor = MagicMock()
+        self.cursor.fetchone.return_value = (1,)
+    
+    @patch('import_csvs.AGE_PREPARED', True)
+    def test_nodes_prepared_once(self):
+        """Test that node batches reuse one prepared UNWIND statement"""
+        rows = [{'_id': i, 'exoName': f"Exo's {i}"} for i in range(3)]
+        
+        import_csvs.insert_nodes_age('Exo', rows, batch_size=2, cursor=self.cursor)
+        import_csvs.insert_nodes_age('Exo', rows, batch_size=2, cursor=self.cursor)
+        
+        queries = [c[0][0] for c in self.cursor.execute.call_args_list]
+        prepares = [q for q in queries if q.startswith('PREPARE')]
+        self.assertEqual(len(prepares), 1)
+        self.assertIn('UNWIND $rows AS row CREATE (:Exo {_id: row._id, exoName: row.exoName})', prepares[0])
+        self.assertIn('$$, $1) AS (r agtype)', prepares[0])
+        self.assertEqual(len(queries), 5)
+        params = self.cursor.execute.call_args_list[1][0][1]
+        self.assertEqual(json.loads(params[0]), {'rows': [{'_id': 0, 'exoName': "Exo's 0"},
+                                                          {'_id': 1, 'exoName': "Exo's 1"}]})
+    
+    @patch('import_csvs.AGE_PREPARED', True)
+    def test_statements_prepared_per_graph(self):
+        """Test that a connection reused for another graph prepares statements for that graph"""
+        row = {'exoId': 40, 'dofId': 7}
+        
+        import_csvs.insert_edge_age('HAS_DOF', row, self.cursor)
+        with patch('import_csvs.GRAPH_NAME', 'exo_graph_next'):
+            import_csvs.insert_edge_age('HAS_DOF', row, self.cursor)
+        
+        prepares = [c[0][0] for c in self.cursor.execute.call_args_list if c[0][0].startswith('PREPARE')]
+        self.assertEqual(len(prepares), 2)
+        self.assertIn("cypher('exo_graph_next'", prepares[1])
+        self.assertEqual(self.cursor.execute.call_args[0][0], 'EXECUTE age_edge_exo_graph_next_has_dof(%s);')
+    
+    @patch('import_csvs.AGE_PREPARED', True)
+    def test_edge_values_passed_as_parameter(self):
+        """Test that row-mode edges execute the prepared statement with typed values"""
+        row = {'exoId': 40.0, 'dofId': 7, 'aim': 'Ja', 'maxAngle': 95, 'minAngle': float('nan'),
+               'adjustable': 'Nee', 'direction': -1}
+        statements = import_csvs.EDGE_STATEMENTS['LIMITS_IN']
+        row = import_csvs.graph_records(pd.DataFrame([row]), statements.value_types, statements.keys)[0]
+        
+        import_csvs.insert_edge_age('LIMITS_IN', row, self.cursor)
+        import_csvs.insert_edge_age('LIMITS_IN', row, self.cursor)
+        
+        prepare, execute = self.cursor.execute.call_args_list[:2]
+        self.assertIn('PREPARE age_edge_exo_graph_limits_in(agtype)', prepare[0][0])
+        self.assertIn('WHERE s._id = $exoId AND t._id = $dofId', prepare[0][0])
+        self.assertEqual(execute[0][0], 'EXECUTE age_edge_exo_graph_limits_in(%s);')
+        self.assertEqual(json.loads(execute[0][1][0]), {'exoId': 40, 'dofId': 7, 'aim': True, 'maxAngle': 95,
+                                                        'minAngle': None, 'adjustable': False, 'direction': -1})
+        self.assertEqual(self.cursor.execute.call_count, 3)
+
+
+class TestImportMetrics(unittest.TestCase):
+    """Test the per-table and per-phase metrics"""
+    
+    def setUp(self):
+        patcher = patch.dict('import_csvs.metrics', {'started_at': 'now', 'phases': {}, 'tables': {}})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def test_round_trips_counted_per_backend(self):
+        """Test that round trips are counted for the table and backend being measured"""
+        session = FakeNeo4jSession()
+        with import_csvs.measure('Exo', 'neo4j') as entry:
+            import_csvs.insert_nodes_neo4j(session, 'Exo', [{'_id': i} for i in range(5)], batch_size=2)
+            entry['rows'] += 5
+        import_csvs.count_round_trip()
+        
+        self.assertEqual(import_csvs.metrics['tables']['Exo']['neo4j']['round_trips'], 3)
+        self.assertEqual(import_csvs.metrics['tables']['Exo']['neo4j']['rows'], 5)
+        self.assertGreater(import_csvs.metrics['tables']['Exo']['neo4j']['seconds'], 0)
+    
+    def test_measured_frames(self):
+        """Test that parsed rows are counted as the csv backend"""
+        frames = [pd.DataFrame({'_id': [1, 2]}), pd.DataFrame({'_id': [3]})]
+        
+        self.assertEqual(len(list(import_csvs.measured_frames('Exo', frames))), 2)
+        self.assertEqual(import_csvs.metrics['tables']['Exo']['csv']['rows'], 3)
+    
+    def test_report(self):
+        """Test that the report has rates per table and totals per backend"""
+        import_csvs.table_metrics('Exo', 'age').update(seconds=2.0, rows=100, round_trips=1)
+        import_csvs.table_metrics('Dof', 'age').update(seconds=1.0, rows=50, failed_rows=2)
+        with import_csvs.measure_phase('nodes'):
+            pass
+        
+        report = import_csvs.metrics_report()
+        
+        self.assertEqual(report['tables']['Exo']['age']['rows_per_second'], 50.0)
+        self.assertEqual(report['totals']['age']['rows'], 150)
+        self.assertEqual(report['totals']['age']['failed_rows'], 2)
+        self.assertIn('nodes', report['phases'])
+        json.dumps(report)
+    
+    def test_report_written(self):
+        """Test that the report is written as JSON"""
+        path = os.path.join(tempfile.mkdtemp(), 'metrics.json')
+        
+        import_csvs.write_metrics_report(path, status='failed')
+        
+        with open(path, 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['status'], 'failed')
+        shutil.rmtree(os.path.dirname(path))
+
+
+class TestCsvValidation(unittest.TestCase):
+    """Test referential-integrity validation of the CSV files"""
+    
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.write('Exo.csv', "_id;exoName\n40;CarrySuit\n41;Paexo\n41;Dup\n")
+        self.write('Aim.csv', "_id;aimNameEn\n190;lifting\n")
+        self.write('HAS_AIM.csv', "exoId;aimId;aimCategory\n40;190;a\n41;999;a\n40;;a\n40;190;a\n")
+    
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+    
+    def write(self, name, content):
+        with open(os.path.join(self.test_dir, name), 'w', encoding='utf-8') as f:
+            f.write(content)
+    
+    def violations(self, chunk_size=None):
+        found = import_csvs.validate_csv_files(self.test_dir, chunk_size)
+        return {(v.table, v.column, v.kind.split(' (')[0]): v for v in found}
+    
+    def test_all_violations_reported(self):
+        """Test that duplicate ids, unknown FKs, empty FKs and duplicate rows are found together"""
+        found = self.violations()
+        
+        self.assertEqual(found[('Exo', '_id', 'duplicate _id values')].examples, [41])
+        self.assertEqual(found[('Exo', '_id', 'duplicate _id values')].severity, 'error')
+        self.assertEqual(found[('HAS_AIM', 'aimId', 'FK values with no Aim node')].examples, [999])
+        self.assertEqual(list(found[('HAS_AIM', 'aimId', 'rows with an empty or non-numeric FK')].examples), [4])
+        self.assertEqual(list(found[('HAS_AIM', '*', 'duplicate edge rows')].examples), [5])
+        self.assertEqual(len(found), 4)
+    
+    def test_streamed_validation_matches(self):
+        """Test that chunked reading finds the same violations"""
+        self.assertEqual(
+            {k: (v.count, list(v.examples)) for k, v in self.violations(chunk_size=1).items()},
+            {k: (v.count, list(v.examples)) for k, v in self.violations().items()})
+    
+    def test_streamed_chunks_released(self):
+        """Test that no chunk is kept alive once validation has read it"""
+        chunks = []
+        alive = []
+        read_frames = import_csvs.iter_csv_frames
+        
+        def tracked_frames(csv_path, chunk_size=None):
+            for df in read_frames(csv_path, chunk_size):
+                gc.collect()
+                alive.append(sum(ref() is not None for ref in chunks))
+                chunks.append(weakref.ref(df))
+                yield df
+        
+        with patch('import_csvs.iter_csv_frames', tracked_frames):
+            found = self.violations(chunk_size=1)
+        
+        self.assertEqual(len(found), 4)
+        self.assertEqual(len(chunks), 8)
+        self.assertEqual(max(alive), 1)
+    
+    def test_clean_files_pass(self):
+        """Test that consistent files have no violations"""
+        self.write('Exo.csv', "_id;exoName\n40;CarrySuit\n41;Paexo\n")
+        self.write('HAS_AIM.csv', "exoId;aimId;aimCategory\n40;190;a\n41;190;a\n")
+        
+        self.assertEqual(import_csvs.validate_csv_files(self.test_dir), [])
+    
+    def test_missing_fk_column_is_an_error(self):
+        """Test that a relationship file without its FK column is an error"""
+        self.write('HAS_AIM.csv', "exoId;aimCategory\n40;a\n")
+        
+        found = self.violations()
+        
+        self.assertEqual(found[('HAS_AIM', 'aimId', 'missing FK column')].severity, 'error')
+
+
+class TestGraphRecords(unittest.TestCase):
+    """Test the frame-level cleaning of rows for AGE and Neo4j"""
+    
+    def test_same_values_as_to_graph_value(self):
+        """Test that whole columns convert like single values"""
+        values = ['Ja', 'nee', '150', 150.0, '12.5', -1.0, float('nan'), '', 'door blokkage', None]
+        frame = pd.DataFrame({'v': pd.Series(values, dtype=object)})
+        for value_type in ('BOOLEAN', 'INTEGER', 'NUMERIC', 'TEXT'):
+            rows = import_csvs.graph_records(frame, {'v': value_type})
+            expected = [import_csvs.to_graph_value(v, value_type) for v in values]
+            self.assertEqual([row['v'] for row in rows], expected, value_type)
+            self.assertEqual([type(row['v']) for row in rows], [type(v) for v in expected], value_type)
+    
+    def test_unnamed_dropped_and_keys_selected(self):
+        """Test that trailing delimiter columns are dropped and missing keys become None"""
+        frame = pd.read_csv(StringIO("_id;exoName;\n40;CarrySuit;\n41;;\n"), sep=';')
+        
+        self.assertEqual(import_csvs.graph_records(frame, {'_id': 'INTEGER'}),
+                         [{'_id': 40, 'exoName': 'CarrySuit'}, {'_id': 41, 'exoName': None}])
+        self.assertEqual(import_csvs.graph_records(frame, {}, ['_id', 'missing']),
+                         [{'_id': 40, 'missing': None}, {'_id': 41, 'missing': None}])
+
+
+class TestBlueGreenImport(unittest.TestCase):
+    """Test loading a staging graph and swapping it into place"""
+    
+    def test_cannot_combine_with_incremental(self):
+        """Test that --blue-green is a full import only"""
+        with patch('sys.stderr', new_callable=StringIO), self.assertRaises(SystemExit):
+            import_csvs.parse_args(['--blue-green', '--delta'])
+        self.assertTrue(import_csvs.parse_args(['--blue-green']).blue_green)
+    
+    def test_staging_table_never_drops_live_table(self):
+        """Test that staging tables are dropped and created in the staging schema"""
+        cursor = MagicMock()
+        
+        with patch('import_csvs.TABLE_SCHEMA', 'exo_next'):
+            import_csvs.create_table_from_csv('Exo', ['_id', 'exoName'], cursor)
+        
+        queries = [c[0][0] for c in cursor.execute.call_args_list]
+        self.assertEqual(queries[0], 'DROP TABLE IF EXISTS exo_next.Exo CASCADE;')
+        self.assertTrue(queries[1].startswith('CREATE TABLE exo_next.Exo ('))
+    
+    def test_staging_counts_compared(self):
+        """Test that labels whose graph count differs from the loaded rows are reported"""
+        cursor = MagicMock()
+        cursor.fetchone.side_effect = [('2',), ('1',)]
+        
+        with patch('import_csvs.GRAPH_NAME', 'exo_graph_next'):
+            mismatches = import_csvs.check_staging_counts({'Exo': 2, 'HAS_AIM': 3}, cursor)
+        
+        self.assertEqual(mismatches, [('HAS_AIM', 3, 1)])
+        queries = [c[0][0] for c in cursor.execute.call_args_list]
+        self.assertIn("cypher('exo_graph_next', $$ MATCH (x:Exo) RETURN count(x) $$)", queries[0])
+        self.assertIn('MATCH ()-[x:HAS_AIM]->() RETURN count(x)', queries[1])
+    
+    def test_swap_moves_live_out_before_staging_in(self):
+        """Test that live tables and graph are renamed before the staging ones take their names"""
+        cursor = MagicMock()
+        cursor.fetchall.side_effect = [[('exo',), ('has_aim',)], [('exo',)]]
+        
+        swapped = import_csvs.swap_staging_into_place('ag_catalog', True, cursor)
+        
+        self.assertEqual(swapped, 2)
+        statements = [(c[0][0], c[0][1] if len(c[0]) > 1 else None) for c in cursor.execute.call_args_list[2:]]
+        self.assertEqual(statements, [
+            ('CREATE SCHEMA exo_old;', None),
+            ('ALTER TABLE "ag_catalog"."exo" SET SCHEMA exo_old;', None),
+            ('ALTER TABLE exo_next."exo" SET SCHEMA "ag_catalog";', None),
+            ('ALTER TABLE exo_next."has_aim" SET SCHEMA "ag_catalog";', None),
+            ("SELECT alter_graph(%s, 'RENAME', %s);", ('exo_graph', 'exo_graph_old')),
+            ("SELECT alter_graph(%s, 'RENAME', %s);", ('exo_graph_next', 'exo_graph')),
+        ])
+
+
+class TestCheckpoints(unittest.TestCase):
+    """Test checkpointed and resumed loading"""
+    
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        with open(os.path.join(self.test_dir, 'HAS_AIM.csv'), 'w', encoding='utf-8') as f:
+            f.write("exoId;aimId;aimCategory\n40;190;a\n41;;b\n42;191;c\n43;192;d\n")
+        with open(os.path.join(self.test_dir, 'Exo.csv'), 'w', encoding='utf-8') as f:
+            f.write("_id;exoName\n40;A\n41;B\n42;C\n")
+    
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+    
+    def test_first_pending_row(self):
+        """Test which row of a frame a backend continues with"""
+        progress = import_csvs.Progress(5, 4, False)
+        
+        self.assertEqual(import_csvs.first_pending_row(progress, 0, 3), 3)
+        self.assertEqual(import_csvs.first_pending_row(progress, 3, 3), 2)
+        self.assertEqual(import_csvs.first_pending_row(progress, 6, 3), 0)
+        self.assertEqual(import_csvs.first_pending_row(import_csvs.Progress(5, 4, True), 6, 3), 3)
+    
+    @patch('import_csvs.cur')
+    @patch('import_csvs.conn')
+    @patch('import_csvs.save_checkpoint')
+    @patch('import_csvs.insert_nodes_age')
+    @patch('import_csvs.copy_dataframe_postgres')
+    @patch('import_csvs.create_table_from_csv')
+    def test_checkpoint_per_chunk(self, create_table, copy, insert_age, save_checkpoint, conn, cur):
+        """Test that every chunk is followed by its checkpoint and the file is completed at the end"""
+        with patch('import_csvs.CSV_DIR', self.test_dir), patch.object(import_csvs.args, 'chunk_size', 2):
+            loaded = import_csvs.load_node_file('Exo.csv')
+        
+        self.assertEqual(loaded, 3)
+        self.assertEqual([c[0][2] for c in save_checkpoint.call_args_list],
+                         [import_csvs.Progress(2, 2, False), import_csvs.Progress(3, 3, False),
+                          import_csvs.Progress(3, 3, True)])
+    
+    @patch('import_csvs.save_checkpoint')
+    @patch('import_csvs.create_foreign_key_indexes')
+    @patch('import_csvs.insert_edge_age')
+    @patch('import_csvs.copy_dataframe_postgres')
+    @patch('import_csvs.create_table_from_csv')
+    def test_resume_skips_committed_rows(self, create_table, copy, insert_edge, indexes, save_checkpoint):
+        """Test that a resumed file keeps its table and only writes the rows after the checkpoint"""
+        progress = import_csvs.FileProgress('hash', import_csvs.Progress(2, 1, False), import_csvs.FRESH)
+        
+        with patch('import_csvs.CSV_DIR', self.test_dir), patch('import_csvs.AGE_EDGE_MODE', 'row'):
+            result = import_csvs.load_edge_file('HAS_AIM.csv', MagicMock(), progress=progress)
+        
+        create_table.assert_not_called()
+        self.assertEqual(copy.call_args[0][1]['exoId'].tolist(), [42, 43])
+        self.assertEqual([c[0][1]['exoId'] for c in insert_edge.call_args_list], [42, 43])
+        self.assertEqual(result, (3, 0))
+        self.assertEqual(save_checkpoint.call_args[0][:3], ('HAS_AIM.csv', 'hash', import_csvs.Progress(4, 3, True)))
+    
+    def test_neo4j_checkpoint_in_batch_transaction(self):
+        """Test that each Neo4j batch records the row offset after its last row"""
+        session = FakeNeo4jSession()
+        rows = [{'exoId': 40, 'aimId': 190}, {'exoId': 42, 'aimId': 191}, {'exoId': 43, 'aimId': 192}]
+        checkpoint = import_csvs.Neo4jCheckpoint('HAS_AIM.csv', 'hash', [1, 3, 4], 0)
+        
+        import_csvs.insert_edges_neo4j(session, 'HAS_AIM', rows, batch_size=2, checkpoint=checkpoint)
+        
+        self.assertEqual([(c['row_offset'], c['rows_loaded']) for c in session.checkpoints], [(3, 2), (4, 3)])
+
+
+class TestErrorIsolation(unittest.TestCase):
+    """Test savepoint batches that isolate failing rows"""
+    
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        with open(os.path.join(self.test_dir, 'HAS_AIM.csv'), 'w', encoding='utf-8') as f:
+            f.write("exoId;aimId;aimCategory\n40;190;a\n41;;b\n42;191;c\n43;192;d\n")
+    
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+    
+    def test_failing_batch_split_until_bad_row(self):
+        """Test that a failing batch is rolled back and split so only the bad row is rejected"""
+        cursor = MagicMock()
+        written = []
+        
+        def write(start, stop):
+            if start <= 5 < stop:
+                raise ValueError('bad row')
+            written.extend(range(start, stop))
+        
+        rejected = import_csvs.write_isolated(cursor, 10, write, batch_size=8)
+        
+        self.assertEqual(rejected, [(5, 'bad row')])
+        self.assertEqual(sorted(written), [0, 1, 2, 3, 4, 6, 7, 8, 9])
+        statements = [c[0][0] for c in cursor.execute.call_args_list]
+        self.assertEqual(statements.count('SAVEPOINT import_batch;'), statements.count('RELEASE SAVEPOINT import_batch;'))
+        self.assertEqual(statements.count('ROLLBACK TO SAVEPOINT import_batch;'), 4)
+    
+    @patch('import_csvs.save_checkpoint')
+    @patch('import_csvs.create_foreign_key_indexes')
+    @patch('import_csvs.copy_dataframe_postgres')
+    @patch('import_csvs.create_table_from_csv')
+    def test_bad_edge_rejected_with_reason(self, create_table, copy, indexes, save_checkpoint):
+        """Test that an edge AGE rejects goes to the reject file and the other edges are loaded"""
+        reject_file = os.path.join(self.test_dir, 'rejects.csv')
+        
+        def insert_edge(table_name, row, cursor=None):
+            if row['exoId'] == 42:
+                raise psycopg2.DataError('invalid agtype')
+            return 1
+        
+        with patch('import_csvs.CSV_DIR', self.test_dir), patch('import_csvs.AGE_EDGE_MODE', 'row'), \
+                patch('import_csvs.REJECT_FILE', reject_file), patch('import_csvs.insert_edge_age', insert_edge):
+            result = import_csvs.load_edge_file('HAS_AIM.csv', MagicMock())
+        
+        self.assertEqual(result, (2, 2))
+        rejects = pd.read_csv(reject_file, sep=';')
+        self.assertEqual(rejects[['file', 'line', 'backend', 'error']].values.tolist(),
+                         [['HAS_AIM.csv', 4, 'age', 'invalid agtype']])
+        self.assertEqual(json.loads(rejects['row'][0])['aimId'], 191)
+
+    
+    def test_reset_starts_new_reject_file(self):
+        """Test that the rejects of an earlier run are gone once a new run resets the file"""
+        reject_file = os.path.join(self.test_dir, 'rejects.csv')
+        
+        import_csvs.write_rejects('Exo.csv', 'postgres', [(3, 'old run', {'_id': 1})], reject_file)
+        import_csvs.reset_rejects(reject_file)
+        import_csvs.write_rejects('Exo.csv', 'age', [(5, 'this run', {'_id': 2})], reject_file)
+        
+        rejects = pd.read_csv(reject_file, sep=';')
+        self.assertEqual(rejects['error'].tolist(), ['this run'])
+        import_csvs.reset_rejects(reject_file)
+        self.assertFalse(os.path.exists(reject_file))
+
+class FakePool:
+    """Thread-safe stand-in for a psycopg2 connection pool that records its connections"""
+
+    def __init__(self, minconn, maxconn, **kwargs):
+        self.maxconn, self.connections, self.in_use, self.most_in_use, self.closed = maxconn, [], 0, 0, False
+        self.lock = threading.Lock()
+
+    def getconn(self):
+        with self.lock:
+            self.in_use += 1
+            self.most_in_use = max(self.most_in_use, self.in_use)
+            self.connections.append(MagicMock())
+            return self.connections[-1]
+
+    def putconn(self, connection):
+        with self.lock:
+            self.in_use -= 1
+
+    def closeall(self):
+        self.closed = True
+
+
+class TestImporterApi(unittest.TestCase):
+    """Test the importer object and its lazily opened connections"""
+    
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        with open(os.path.join(self.test_dir, 'Exo.csv'), 'w', encoding='utf-8') as f:
+            f.write("_id;exoName\n40;CarrySuit\n")
+        # configure() changes module state; restore it after each test
+        for name in ['args', 'CSV_DIR', 'GRAPH_NAME', 'TABLE_SCHEMA', 'EDGE_STATEMENTS']:
+            patcher = patch(f'import_csvs.{name}', getattr(import_csvs, name))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+    
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+    
+    def test_import_opens_nothing(self):
+        """Test that importing the module connects to no database"""
+        self.assertIsNone(import_csvs.conn)
+        self.assertIsNone(import_csvs.cur)
+        self.assertIsNone(import_csvs.neo4j_driver)
+    
+    @patch('import_csvs.open_neo4j_driver')
+    @patch('import_csvs.psycopg2.connect')
+    def test_validate_only_does_not_connect(self, connect, open_driver):
+        """Test that a validation run works on the CSV files alone"""
+        importer = import_csvs.CsvImporter(['--validate-only'], csv_dir=self.test_dir)
+        
+        self.assertEqual(importer.run(), 0)
+        connect.assert_not_called()
+        open_driver.assert_not_called()
+    
+    def test_unknown_option_rejected(self):
+        """Test that a mistyped option stops the command line instead of being ignored"""
+        with patch('sys.stderr'), self.assertRaises(SystemExit):
+            import_csvs.main(['--validate-only', '--workres', '4'])
+    
+    @patch('import_csvs.write_metrics_report')
+    @patch('import_csvs.validate_csv_files', return_value=[])
+    def test_failed_run_writes_report(self, validate, write_report):
+        """Test that a phase that raises still leaves a report marked as failed"""
+        importer = import_csvs.CsvImporter(csv_dir=self.test_dir)
+        
+        with patch.object(importer, 'prepare', side_effect=psycopg2.OperationalError('server closed')):
+            with self.assertRaises(psycopg2.OperationalError):
+                importer.run()
+        
+        write_report.assert_called_once_with(status='failed')
+    
+    @patch('import_csvs.reset_rejects')
+    @patch('import_csvs.reset_checkpoints')
+    @patch('import_csvs.cur')
+    @patch('import_csvs.conn')
+    def test_only_new_runs_reset_rejects(self, conn, cur, reset_checkpoints, reset_rejects):
+        """Test that a full import starts a new reject file and a resumed one appends to it"""
+        progress = {'Exo.csv': import_csvs.FileProgress('hash', import_csvs.Progress(1, 1, False), import_csvs.FRESH)}
+        with patch('import_csvs.load_resume_progress', return_value=progress), \
+                patch.object(import_csvs.CsvImporter, 'connect'):
+            import_csvs.CsvImporter(['--resume'], csv_dir=self.test_dir).prepare()
+            reset_rejects.assert_not_called()
+            
+            import_csvs.CsvImporter(csv_dir=self.test_dir).prepare()
+            reset_rejects.assert_called_once_with()
+
+    @patch('import_csvs.neo4j_available', False)
+    @patch('import_csvs.graph_exists', True)
+    @patch('import_csvs.reset_checkpoints', side_effect=KeyboardInterrupt)
+    @patch('import_csvs.cur')
+    @patch('import_csvs.conn')
+    def test_cleared_graph_committed_with_checkpoints(self, conn, cur, reset_checkpoints):
+        """Test that a run interrupted after clearing the graph keeps the old graph and its checkpoints"""
+        with patch.object(import_csvs.CsvImporter, 'connect'):
+            with self.assertRaises(KeyboardInterrupt):
+                import_csvs.CsvImporter(csv_dir=self.test_dir).prepare()
+            cur.execute.assert_any_call("SELECT drop_graph(%s, true);", ('exo_graph',))
+            conn.commit.assert_not_called()
+
+            manifest = {'Exo.csv': {'hash': 'old', 'schema_version': import_csvs.SCHEMA_VERSION, 'neo4j_loaded': False}}
+            with patch('import_csvs.load_manifest', return_value=manifest), \
+                    patch('import_csvs.clear_graph_data') as clear_graph_data, \
+                    self.assertRaises(KeyboardInterrupt):
+                import_csvs.CsvImporter(['--incremental'], csv_dir=self.test_dir).prepare()
+            clear_graph_data.assert_called_once_with(['Exo'], [])
+            conn.commit.assert_not_called()
+
+    @patch('import_csvs.neo4j_available', False)
+    @patch('import_csvs.graph_exists', True)
+    @patch('import_csvs.reset_checkpoints')
+    @patch('import_csvs.cur')
+    @patch('import_csvs.conn')
+    def test_delta_rejects_survive_prepare(self, conn, cur, reset_checkpoints):
+        """Test that rows a delta rejects while preparing stay in the reject file of the run"""
+        reject_file = os.path.join(self.test_dir, 'rejects.csv')
+        manifest = {'Exo.csv': {'hash': 'old', 'schema_version': import_csvs.SCHEMA_VERSION, 'neo4j_loaded': False}}
+
+        def reject_row(*_):
+            import_csvs.write_rejects('Exo.csv', 'postgres', [(None, "col 'exoName' is not INTEGER", {'_id': 40})])
+            return [], []
+
+        with patch('import_csvs.REJECT_FILE', reject_file), \
+                patch('import_csvs.load_manifest', return_value=manifest), \
+                patch('import_csvs.load_manifest_contents', return_value={}), \
+                patch('import_csvs.apply_deltas', side_effect=reject_row), \
+                patch.object(import_csvs.CsvImporter, 'connect'):
+            import_csvs.write_rejects('Exo.csv', 'postgres', [(3, 'old run', {'_id': 1})])
+            import_csvs.CsvImporter(['--delta'], csv_dir=self.test_dir).prepare()
+
+        rejects = pd.read_csv(reject_file, sep=';')
+        self.assertEqual(rejects['error'].tolist(), ["col 'exoName' is not INTEGER"])
+
+    @patch('import_csvs.file_hash', return_value='hash')
+    def test_options_configure_module(self, file_hash):
+        """Test that the options of an importer select the graph it writes once a phase runs"""
+        importer = import_csvs.CsvImporter(['--blue-green'], csv_dir=self.test_dir)
+        self.assertEqual(import_csvs.GRAPH_NAME, 'exo_graph')
+        self.assertIsNone(import_csvs.TABLE_SCHEMA)
+        self.assertNotEqual(import_csvs.CSV_DIR, self.test_dir)
+        
+        importer.validate()
+        self.assertEqual(import_csvs.GRAPH_NAME, 'exo_graph_next')
+        self.assertEqual(import_csvs.TABLE_SCHEMA, 'exo_next')
+        self.assertEqual(import_csvs.CSV_DIR, self.test_dir)
+        self.assertEqual(importer.node_files, ['Exo.csv'])
+        file_hash.assert_not_called()
+    
+    @patch('import_csvs.neo4j_available', False)
+    @patch('import_csvs.ensure_age_edge_label')
+    @patch('import_csvs.cur')
+    @patch('import_csvs.conn')
+    def test_parallel_edge_workers(self, conn, cur, ensure_label):
+        """Test that each worker prepares its own pooled connection and commits or rolls back its file"""
+        pools, files = [], {}
+
+        def load_edge_file(file, cursor, neo4j_session=None, progress=None):
+            # The labels are created and committed on the main connection before any worker starts
+            conn.commit.assert_called_once()
+            files[cursor] = file
+            time.sleep(0.01)
+            if file == 'HAS_DOF.csv':
+                raise psycopg2.DataError('bad edge')
+            return 1, 0
+
+        importer = import_csvs.CsvImporter(['--workers', '2'], csv_dir=self.test_dir)
+        importer.list_files()
+        importer.edge_files = ['HAS_DOF.csv', 'ASSISTS_IN.csv', 'HAS_AIM.csv']
+        with patch('import_csvs.psycopg2.pool.ThreadedConnectionPool',
+                   side_effect=lambda *a, **k: pools.append(FakePool(*a)) or pools[-1]), \
+                patch('import_csvs.load_edge_file', side_effect=load_edge_file), \
+                patch.object(import_csvs.CsvImporter, 'connect'), \
+                self.assertRaises(psycopg2.DataError):
+            importer.load_edges()
+
+        self.assertEqual([c[0][0] for c in ensure_label.call_args_list], ['ASSISTS_IN', 'HAS_AIM', 'HAS_DOF'])
+        pool, = pools
+        self.assertEqual(pool.maxconn, 2)
+        self.assertLessEqual(pool.most_in_use, 2)
+        self.assertEqual(pool.in_use, 0)
+        self.assertTrue(pool.closed)
+        for worker_conn in pool.connections:
+            worker_cur = worker_conn.cursor.return_value.__enter__.return_value
+            queries = [c[0][0] for c in worker_cur.execute.call_args_list]
+            self.assertEqual(queries[0], "LOAD 'age';")
+            self.assertTrue(queries[1].startswith('SET search_path'))
+            failed = files[worker_cur] == 'HAS_DOF.csv'
+            self.assertEqual((worker_conn.commit.called, worker_conn.rollback.called), (not failed, failed))
+        self.assertEqual(importer.loaded_rows, {'ASSISTS_IN': 1, 'HAS_AIM': 1})
+        cur.execute.assert_not_called()
+
+    @patch('import_csvs.neo4j_available', False)
+    @patch('import_csvs.cur')
+    @patch('import_csvs.conn')
+    def test_workers_limited_by_caller_pool(self, conn, cur):
+        """Test that workers never ask the caller's pool for more connections than it has left"""
+        pool = FakePool(1, 2)
+        importer = import_csvs.CsvImporter(['--workers', '2'], pool=pool, csv_dir=self.test_dir)
+        importer.list_files()
+        importer.edge_files = ['HAS_AIM.csv', 'HAS_DOF.csv']
+        with patch('import_csvs.load_edge_file', return_value=(1, 0)) as load_edge_file, \
+                patch.object(import_csvs.CsvImporter, 'connect'):
+            importer.load_edges()
+
+        self.assertEqual(pool.connections, [])
+        self.assertEqual([c[0][:2] for c in load_edge_file.call_args_list], [('HAS_AIM.csv', cur), ('HAS_DOF.csv', cur)])
+
+    @patch('import_csvs.age_graph_exists', return_value=True)
+    def test_shared_pool_and_driver(self, graph_exists):
+        """Test that connections of the caller are borrowed once and given back, not closed"""
+        pool, driver = MagicMock(), MagicMock()
+        importer = import_csvs.CsvImporter(pool=pool, neo4j=driver, csv_dir=self.test_dir)
+        
+        importer.connect()
+        importer.connect()
+        self.assertIs(import_csvs.neo4j_driver, driver)
+        self.assertTrue(import_csvs.graph_exists)
+        importer.close()
+        
+        pool.getconn.assert_called_once()
+        pool.putconn.assert_called_once_with(pool.getconn.return_value)
+        pool.getconn.return_value.close.assert_not_called()
+        driver.close.assert_not_called()
+        self.assertIsNone(import_csvs.conn)
+
+
+class TestParallelParsing(unittest.TestCase):
+    """Test parsing CSV files in a process pool"""
+    
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.test_dir, 'Exo.csv')
+        rows = ''.join(f'{i};"Suit {i % 3}";{i / 2};\n' for i in range(40))
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write('_id;exoName;weight;\n' + rows + '99;"two\nlines";;\n')
+        self.expected = import_csvs.parse_csv(self.path, ';')
+        import_csvs._parsed_csv_cache.clear()
+    
+    def tearDown(self):
+        import_csvs._parsed_csv_cache.clear()
+        shutil.rmtree(self.test_dir)
+    
+    def test_columnar_round_trip(self):
+        """Test that a frame survives encoding with its values, missing values and dtypes"""
+        columnar = import_csvs.encode_frame(self.expected)
+        
+        self.assertEqual(columnar.arrays[1][0].dtype.name, 'int8')
+        pd.testing.assert_frame_equal(import_csvs.decode_frame(columnar), self.expected)
+    
+    def test_ranges_keep_quoted_line_breaks(self):
+        """Test that byte ranges cover all rows and never end inside a quoted field"""
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        ranges = import_csvs.csv_row_ranges(self.path, 50)
+        
+        self.assertEqual(ranges[0][0], data.index(b'\n') + 1)
+        self.assertEqual(ranges[-1][1], len(data))
+        self.assertTrue(all(a[1] == b[0] for a, b in zip(ranges, ranges[1:])))
+        self.assertTrue(all(import_csvs.count_quotes(data[start:end]) % 2 == 0 for start, end in ranges))
+    
+    def test_split_file_parsed_like_whole_file(self):
+        """Test that a file parsed in ranges by several processes is cached as one parse"""
+        with patch('import_csvs.PARSE_SPLIT_BYTES', 100):
+            import_csvs.parse_csv_files([self.path], 2)
+        
+        parsed = import_csvs.read_csv_file(self.path)
+        pd.testing.assert_frame_equal(parsed.frame, self.expected)
+        self.assertEqual(parsed.columns, ['_id', 'exoName', 'weight'])
+
+
 class TestErrorHandling(unittest.TestCase):
     """Test error handling and rollback"""
     